@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Cold start benchmark for the CLI.
+
+Runs `cli.py history` and `cli.py record` in fresh interpreters against a
+throwaway project and compares the median wall time with a budget. Bytecode
+is compiled first, so the numbers reflect an installed tree rather than
+the first run after an edit.
+
+Usage: python benchmarks/bench_cli_startup.py [runs] [--budget-ms MS]
+Exits with status 1 if a command is over budget.
+"""
+
+import argparse
+import compileall
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+CLI = ROOT / 'src' / 'scripts' / 'cli.py'
+PROJECT = 'bench_cli_startup'
+
+COMMANDS = {
+    'history': ['history', '--project', PROJECT],
+    'record': ['record', 'Benchmark change', 'bench.txt', '--project', PROJECT],
+}
+
+def time_run(command, runs):
+    """Return wall times in ms of running a command in new processes."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('runs', nargs='?', type=int, default=15)
+    parser.add_argument('--budget-ms', type=float, default=100.0)
+    args = parser.parse_args()
+
+    compileall.compile_dir(str(ROOT / 'src'), quiet=1)
+    baseline = statistics.median(time_run([sys.executable, '-c', 'pass'], args.runs))
+    print(f"{'interpreter only':<16} {baseline:7.1f} ms")
+
+    over = False
+    try:
+        for name, command in COMMANDS.items():
+            median = statistics.median(time_run([sys.executable, str(CLI)] + command, args.runs))
+            status = 'ok' if median <= args.budget_ms else 'OVER BUDGET'
+            over = over or median > args.budget_ms
+            print(f"{name:<16} {median:7.1f} ms  (budget {args.budget_ms:.0f} ms) {status}")
+    finally:
+        shutil.rmtree(ROOT / 'tracked_projects' / PROJECT, ignore_errors=True)
+    sys.exit(1 if over else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for StandardRecord serialization.
+
+Compares the previous dataclasses.asdict + indent=2 path with the
+hand-rolled codecs and the bulk dumps_many/loads_many API.
+
+Usage: python benchmarks/bench_record_serialization.py [count]
+"""
+
+import json
+import sys
+import timeit
+from dataclasses import asdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.scripts.models.record_format import (
+    StandardRecord, RecordMetadata, RecordType, RecordStatus,
+    ChangeContent, dumps_many, loads_many
+)
+
+def make_records(count):
+    """Build change records with a realistic amount of nested data."""
+    return [
+        StandardRecord(
+            metadata=RecordMetadata(
+                record_id=f"change_{i:08d}",
+                record_type=RecordType.CHANGE,
+                timestamp="2025-04-04T00:36:48.978317",
+                author="bench",
+                project="sigfile",
+                version="1.0",
+                status=RecordStatus.COMPLETED,
+                tags=["change", "implementation"],
+                related_records=[f"decision_{i:08d}"]
+            ),
+            content=ChangeContent(
+                description="Refactor record serialization",
+                purpose="Performance",
+                impact="Low",
+                changes={f"src/file_{j}.py": "modified" for j in range(5)},
+                testing="unit",
+                verification="pending",
+                affected_files=[f"src/file_{j}.py" for j in range(5)]
+            )
+        )
+        for i in range(count)
+    ]
+
+def legacy_to_json(record):
+    """The previous to_json: deep copy via asdict, then indent=2."""
+    data = asdict(record)
+    data['metadata']['record_type'] = data['metadata']['record_type'].value
+    data['metadata']['status'] = data['metadata']['status'].value
+    return json.dumps(data, indent=2)
+
+def legacy_from_json(json_str):
+    """The previous from_json: Enum calls and keyword construction."""
+    data = json.loads(json_str)
+    metadata = dict(data['metadata'])
+    metadata['record_type'] = RecordType(metadata['record_type'])
+    metadata['status'] = RecordStatus(metadata['status'])
+    return StandardRecord(
+        metadata=RecordMetadata(**metadata),
+        content=ChangeContent(**data['content'])
+    )
+
+def bench(label, func, repeat=3):
+    """Time func and return the best of several runs."""
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print(f"{label:<32} {best * 1000:9.1f} ms")
+    return best
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    records = make_records(count)
+    print(f"Serializing {count} records\n")
+
+    legacy_texts = [legacy_to_json(r) for r in records]
+    compact_texts = [r.to_json() for r in records]
+    bulk_text = dumps_many(records)
+
+    old_dump = bench("legacy to_json (asdict)", lambda: [legacy_to_json(r) for r in records])
+    new_dump = bench("to_json (compact)", lambda: [r.to_json() for r in records])
+    bulk_dump = bench("dumps_many", lambda: dumps_many(records))
+    old_load = bench("legacy from_json", lambda: [legacy_from_json(t) for t in legacy_texts])
+    new_load = bench("from_json", lambda: [StandardRecord.from_json(t) for t in compact_texts])
+    bulk_load = bench("loads_many", lambda: loads_many(bulk_text))
+
+    print(f"\nto_json speedup:    {old_dump / new_dump:5.1f}x (bulk {old_dump / bulk_dump:5.1f}x)")
+    print(f"from_json speedup:  {old_load / new_load:5.1f}x (bulk {old_load / bulk_load:5.1f}x)")
+    print(f"on-disk size:       {sum(map(len, legacy_texts)) / len(bulk_text):5.1f}x smaller")
+
+if __name__ == '__main__':
+    main()
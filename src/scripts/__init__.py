@@ -8,9 +8,15 @@ This package contains the core functionality for SigFile, including:
 - Decision tracking
 """
 
-from . import track_change
-from . import file_watcher
-from . import ai_tracking
-from . import decision_tracking
+import importlib
 
-__version__ = '1.0.0' 
\ No newline at end of file
+__version__ = '1.0.0'
+
+# Submodules are imported on first access so that importing one of them
+# (e.g. from the CLI) does not pay for the others.
+_SUBMODULES = ('track_change', 'file_watcher', 'ai_tracking', 'decision_tracking')
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
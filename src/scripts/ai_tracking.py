@@ -7,24 +7,24 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from .project_context import ProjectContext, get_project_context
+
 class AITracking:
     """Handles tracking and analysis of AI conversations."""
     
-    def __init__(self, project_name: str):
+    def __init__(self, project_name: str, context: Optional[ProjectContext] = None):
         """
         Initialize AI tracking for a project.
         
         Args:
             project_name: Name of the project to track
+            context: Shared project context (defaults to the process-wide one)
         """
         self.project_name = project_name
-        self.base_dir = Path('tracked_projects') / project_name
-        self.ai_dir = self.base_dir / 'ai_conversations'
-        self.thinking_dir = self.base_dir / 'thinking'
-        
-        # Create directories if they don't exist
-        self.ai_dir.mkdir(parents=True, exist_ok=True)
-        self.thinking_dir.mkdir(parents=True, exist_ok=True)
+        self.context = context or get_project_context(project_name)
+        self.base_dir = Path(self.context.base_dir)
+        self.ai_dir = Path(self.context.dir('ai_conversations'))
+        self.thinking_dir = Path(self.context.dir('thinking'))
         
         # Initialize session tracking
         self.current_session = None
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import time
+import logging
+import threading
+from array import array
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; aggregations fall back to array/Counter
+    np = None
+
+from .project_context import get_project_context
+
+logger = logging.getLogger(__name__)
+
+# Table -> ordered (column, array typecode). String columns hold ids into the
+# shared string table; times are Unix seconds.
+SCHEMA = {
+    'changes': (('time', 'd'), ('day', 'i'), ('author', 'i'), ('file', 'i')),
+    'decision_status': (('decision', 'i'), ('status', 'i'), ('time', 'd')),
+    'sessions': (('session', 'i'), ('name', 'i'), ('start', 'd'), ('duration', 'd')),
+}
+
+MANIFEST_FILE = 'manifest.json'
+STRINGS_FILE = 'strings.jsonl'
+
+# Export directory -> (bytes of the string file read, its StringTable), so an
+# export in the same process only reads the strings appended since
+_string_tables: Dict[str, Tuple[int, 'StringTable']] = {}
+_string_tables_lock = threading.Lock()
+
+def _parse_time(value) -> Optional[float]:
+    """Parse an ISO or YYYYMMDD_HHMMSS[_ffffff] timestamp to Unix seconds."""
+    if not value:
+        return None
+    for fmt in ('%Y%m%d_%H%M%S_%f', '%Y%m%d_%H%M%S'):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            continue
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+class StringTable:
+    """Dictionary encoding for string columns."""
+
+    def __init__(self, strings: Optional[List[str]] = None):
+        self.strings = strings or []
+        self.ids = {s: i for i, s in enumerate(self.strings)}
+        self.new_strings: List[str] = []
+
+    def encode(self, value: str) -> int:
+        """Return the id of a string, adding it if needed."""
+        value = value or ''
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(value)
+            self.ids[value] = string_id
+            self.new_strings.append(value)
+        return string_id
+
+    def load(self, value: str):
+        """Add a string already in the stored table."""
+        self.ids.setdefault(value, len(self.strings))
+        self.strings.append(value)
+
+class ColumnarStore:
+    """Typed column arrays plus a string table, with vectorized aggregations.
+
+    Columns are ``array.array`` objects; when NumPy is installed they are
+    viewed as NumPy arrays without copying.
+    """
+
+    def __init__(self, tables: Dict[str, Dict[str, array]], strings: List[str]):
+        self.tables = tables
+        self.strings = strings
+
+    def column(self, table: str, name: str):
+        """Get a column as a NumPy array if available, else as an array."""
+        values = self.tables[table][name]
+        if np is not None:
+            return np.frombuffer(values, dtype=values.typecode)
+        return values
+
+    def _count_by(self, table: str, name: str) -> Dict[str, int]:
+        """Count rows per string value of a column."""
+        ids = self.column(table, name)
+        if np is not None:
+            counts = np.bincount(ids)
+            return {self.strings[i]: int(counts[i]) for i in np.nonzero(counts)[0]}
+        return {self.strings[i]: c for i, c in Counter(ids).items()}
+
+    def changes_per_day(self) -> Dict[str, int]:
+        """Number of changed files per day (YYYYMMDD)."""
+        days = self.column('changes', 'day')
+        if np is not None:
+            values, counts = np.unique(days, return_counts=True)
+            return {str(int(d)): int(c) for d, c in zip(values, counts)}
+        return {str(d): c for d, c in sorted(Counter(days).items())}
+
+    def changes_per_author(self) -> Dict[str, int]:
+        """Number of changed files per author."""
+        return self._count_by('changes', 'author')
+
+    def changes_per_file(self) -> Dict[str, int]:
+        """Number of recorded changes per file."""
+        return self._count_by('changes', 'file')
+
+    def decision_status_durations(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Total seconds decisions have spent in each status.
+
+        Each status lasts until the decision's next status observation, or
+        until ``now`` for its current status.
+        """
+        now = time.time() if now is None else now
+        decisions = self.column('decision_status', 'decision')
+        statuses = self.column('decision_status', 'status')
+        times = self.column('decision_status', 'time')
+        if not len(decisions):
+            return {}
+
+        if np is not None:
+            order = np.lexsort((times, decisions))
+            decisions, statuses, times = decisions[order], statuses[order], times[order]
+            ends = np.append(times[1:], now)
+            last = np.append(decisions[1:] != decisions[:-1], True)
+            ends[last] = now
+            totals = np.bincount(statuses, weights=ends - times)
+            return {self.strings[i]: float(totals[i]) for i in np.unique(statuses)}
+
+        order = sorted(range(len(decisions)), key=lambda i: (decisions[i], times[i]))
+        totals: Dict[str, float] = {}
+        for pos, i in enumerate(order):
+            nxt = order[pos + 1] if pos + 1 < len(order) else None
+            end = times[nxt] if nxt is not None and decisions[nxt] == decisions[i] else now
+            status = self.strings[statuses[i]]
+            totals[status] = totals.get(status, 0.0) + end - times[i]
+        return totals
+
+    def session_lengths(self) -> Dict[str, float]:
+        """Duration in seconds of each finished AI session.
+
+        A session re-exported after it changed appears once, with its latest
+        duration.
+        """
+        sessions = self.column('sessions', 'session')
+        durations = self.column('sessions', 'duration')
+        if np is not None:
+            if not len(sessions):
+                return {}
+            reversed_ids = sessions[::-1]
+            _, first = np.unique(reversed_ids, return_index=True)
+            latest = len(sessions) - 1 - first
+            return {self.strings[sessions[i]]: float(durations[i])
+                    for i in latest if not np.isnan(durations[i])}
+
+        latest_rows = {}
+        for i, session in enumerate(sessions):
+            latest_rows[session] = i
+        return {self.strings[s]: durations[i] for s, i in latest_rows.items()
+                if durations[i] == durations[i]}
+
+    def report(self) -> Dict[str, Dict]:
+        """All aggregates, as printed by the report command."""
+        return {
+            'changes_per_day': self.changes_per_day(),
+            'changes_per_author': self.changes_per_author(),
+            'changes_per_file': self.changes_per_file(),
+            'decision_status_durations': self.decision_status_durations(),
+            'session_lengths': self.session_lengths()
+        }
+
+class AnalyticsExporter:
+    """Incrementally exports tracked project records into a columnar store.
+
+    Columns are append-only files of packed values (``<table>.<column>.bin``)
+    next to an append-only string table. The manifest records row counts,
+    the newest change record ingested per day (change records are written
+    once, in name order) and the decision and session files ingested; it is
+    written last, so a column file longer than the manifest says is ignored
+    on load and truncated by the next export.
+    """
+
+    def __init__(self, project_name: str, base_dir: Optional[Path] = None):
+        self.project_name = project_name
+        if base_dir is None:
+            base_dir = get_project_context(project_name).base_dir
+        self.base_dir = Path(base_dir)
+        self.export_dir = self.base_dir / 'analytics'
+
+    def _load_manifest(self) -> Dict:
+        """Load the manifest, or an empty one for a first export."""
+        try:
+            with open(self.export_dir / MANIFEST_FILE) as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'rows': {table: 0 for table in SCHEMA}, 'strings': 0,
+                    'sources': {}, 'change_marks': {}, 'decision_status': {}}
+        # Exports that listed every change record keep only the newest per day
+        marks = manifest.setdefault('change_marks', {})
+        sources = manifest['sources']
+        for key in [key for key in sources if key.startswith('changes' + os.sep)]:
+            day, name = key.split(os.sep)[1:3]
+            marks[day] = max(marks.get(day, ''), name)
+            del sources[key]
+        return manifest
+
+    def _load_strings(self, count: int) -> List[str]:
+        """Load the first ``count`` strings of the string table."""
+        strings = []
+        if count:
+            with open(self.export_dir / STRINGS_FILE) as f:
+                for line in f:
+                    if len(strings) >= count:
+                        break
+                    strings.append(json.loads(line))
+        return strings
+
+    def _string_table(self, manifest: Dict) -> StringTable:
+        """The string table as the manifest describes it.
+
+        A table this process exported with before is reused, reading only
+        the strings other exports appended since.
+        """
+        with _string_tables_lock:
+            offset, strings = _string_tables.pop(str(self.export_dir), (0, None))
+        size = manifest.get('strings_bytes', 0)
+        if strings is None or offset > size or len(strings.strings) > manifest['strings']:
+            offset, strings = 0, StringTable()
+        if offset < size:
+            with open(self.export_dir / STRINGS_FILE, 'rb') as f:
+                f.seek(offset)
+                for line in f.read(size - offset).splitlines():
+                    strings.load(json.loads(line))
+        if len(strings.strings) != manifest['strings']:
+            strings = StringTable(self._load_strings(manifest['strings']))
+        return strings
+
+    def _iter_sources(self) -> Iterator[Tuple[str, str, int]]:
+        """Yield (kind, path, mtime_ns) for every exportable source file.
+
+        Change records come in name order within their day, without an
+        mtime: they are written once.
+        """
+        changes_dir = self.base_dir / 'changes'
+        if changes_dir.is_dir():
+            with os.scandir(changes_dir) as days:
+                for day in days:
+                    if not (day.is_dir() and day.name.isdigit()):
+                        continue
+                    with os.scandir(day.path) as entries:
+                        names = sorted(entry.name for entry in entries
+                                       if entry.name.startswith('change_') and entry.name.endswith('.txt'))
+                    for name in names:
+                        yield 'change', os.path.join(day.path, name), 0
+        for kind, dirname in (('decision', 'decisions'), ('session', 'ai_conversations')):
+            source_dir = self.base_dir / dirname
+            if source_dir.is_dir():
+                with os.scandir(source_dir) as entries:
+                    for entry in entries:
+                        if entry.name.endswith('.json') and not entry.name.startswith('.'):
+                            yield kind, entry.path, entry.stat().st_mtime_ns
+
+    def _read_change(self, path: str) -> Tuple[Optional[float], str, List[str]]:
+        """Parse a change text file into (time, author, files)."""
+        fields = {}
+        with open(path) as f:
+            for line in f:
+                key, sep, value = line.partition(':')
+                if sep:
+                    fields[key.strip()] = value.strip()
+        return (_parse_time(fields.get('Timestamp')), fields.get('Author', ''),
+                fields.get('Files Changed', '').split())
+
+    def export(self, changes: Optional[List[str]] = None) -> Dict[str, int]:
+        """Append rows for new or changed sources; return rows added per table.
+
+        With ``changes``, only those change records are ingested instead of
+        scanning every source, for records exported as they are written.
+        """
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        manifest = self._load_manifest()
+        strings = self._string_table(manifest)
+        sources = manifest['sources']
+        marks = manifest['change_marks']
+        last_status = manifest['decision_status']
+        new_rows = {table: {name: array(code) for name, code in columns}
+                    for table, columns in SCHEMA.items()}
+
+        if changes is None:
+            found = self._iter_sources()
+        else:
+            found = (('change', path, 0) for path in sorted(changes, key=lambda path: (
+                os.path.basename(os.path.dirname(path)), os.path.basename(path))))
+        for kind, path, mtime in found:
+            key = os.path.relpath(path, self.base_dir)
+            if kind == 'change':
+                day, name = os.path.basename(os.path.dirname(path)), os.path.basename(path)
+                if name <= marks.get(day, ''):
+                    continue  # change records are written once
+            elif sources.get(key) == mtime:
+                continue
+            try:
+                if kind == 'change':
+                    when, author, files = self._read_change(path)
+                    marks[day] = name
+                    if when is None:
+                        continue
+                    day = int(datetime.fromtimestamp(when).strftime('%Y%m%d'))
+                    rows = new_rows['changes']
+                    for file_name in files:
+                        rows['time'].append(when)
+                        rows['day'].append(day)
+                        rows['author'].append(strings.encode(author))
+                        rows['file'].append(strings.encode(file_name))
+                else:
+                    with open(path) as f:
+                        data = json.load(f)
+                    if kind == 'decision':
+                        self._add_decision(data, path, mtime, strings, last_status, new_rows)
+                    else:
+                        self._add_session(data, key, strings, new_rows)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping {path} in analytics export: {e}")
+                continue
+            if kind != 'change':
+                sources[key] = mtime
+
+        added = self._append(manifest, strings, new_rows)
+        strings.new_strings = []
+        with _string_tables_lock:
+            _string_tables[str(self.export_dir)] = (manifest['strings_bytes'], strings)
+        logger.info(f"Analytics export added rows: {added}")
+        return added
+
+    def _add_decision(self, data: Dict, path: str, mtime: int, strings: StringTable,
+                      last_status: Dict[str, str], new_rows: Dict) -> None:
+        """Append a status observation if a decision is new or changed status."""
+        decision_id = data.get('id') or data.get('decision_id') or Path(path).stem
+        status = data.get('status') or 'unknown'
+        if last_status.get(decision_id) == status:
+            return
+        if decision_id in last_status:
+            when = _parse_time(data.get('updated_at')) or mtime / 1e9
+        else:
+            when = _parse_time(data.get('timestamp')) or mtime / 1e9
+        last_status[decision_id] = status
+        rows = new_rows['decision_status']
+        rows['decision'].append(strings.encode(decision_id))
+        rows['status'].append(strings.encode(status))
+        rows['time'].append(when)
+
+    def _add_session(self, data: Dict, key: str, strings: StringTable, new_rows: Dict) -> None:
+        """Append a row for an AI session file; later rows supersede earlier ones."""
+        start = _parse_time(data.get('start_time'))
+        if start is None:
+            return
+        duration = data.get('duration_seconds')
+        if duration is None:
+            end = _parse_time(data.get('end_time'))
+            duration = end - start if end is not None else float('nan')
+        rows = new_rows['sessions']
+        rows['session'].append(strings.encode(key))
+        rows['name'].append(strings.encode(data.get('session_name', '')))
+        rows['start'].append(start)
+        rows['duration'].append(float(duration))
+
+    def _append(self, manifest: Dict, strings: StringTable, new_rows: Dict) -> Dict[str, int]:
+        """Append new rows and strings, then commit the manifest."""
+        added = {}
+        for table, columns in new_rows.items():
+            count = len(next(iter(columns.values())))
+            added[table] = count
+            for name, values in columns.items():
+                column_file = self.export_dir / f"{table}.{name}.bin"
+                with open(column_file, 'ab') as f:
+                    # Drop any tail left behind by an interrupted export
+                    f.truncate(manifest['rows'][table] * values.itemsize)
+                    values.tofile(f)
+            manifest['rows'][table] += count
+
+        with open(self.export_dir / STRINGS_FILE, 'ab') as f:
+            f.truncate(manifest.get('strings_bytes', 0))
+            for value in strings.new_strings:
+                f.write((json.dumps(value) + '\n').encode('utf-8'))
+            manifest['strings_bytes'] = f.seek(0, os.SEEK_END)
+        manifest['strings'] = len(strings.strings)
+
+        tmp_path = self.export_dir / (MANIFEST_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.export_dir / MANIFEST_FILE)
+        return added
+
+    def load(self) -> ColumnarStore:
+        """Load the exported columns into a ColumnarStore."""
+        manifest = self._load_manifest()
+        tables = {}
+        for table, columns in SCHEMA.items():
+            count = manifest['rows'].get(table, 0)
+            tables[table] = {}
+            for name, code in columns:
+                values = array(code)
+                if count:
+                    with open(self.export_dir / f"{table}.{name}.bin", 'rb') as f:
+                        values.fromfile(f, count)
+                tables[table][name] = values
+        return ColumnarStore(tables, self._load_strings(manifest['strings']))
+
+def main():
+    """Command line interface for analytics export."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Columnar analytics over tracked records')
+    parser.add_argument('command', choices=['export', 'report'], help='Command to execute')
+    parser.add_argument('--project', default='sigfile', help='Project name')
+    args = parser.parse_args()
+
+    exporter = AnalyticsExporter(args.project)
+    added = exporter.export()
+    if args.command == 'export':
+        print(json.dumps(added, indent=2))
+    else:
+        print(json.dumps(exporter.load().report(), indent=2))
+
+if __name__ == '__main__':
+    main()
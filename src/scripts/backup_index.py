@@ -0,0 +1,244 @@
+import os
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .day_sealer import register_hash_source
+from .project_context import get_project_context
+
+logger = logging.getLogger(__name__)
+
+# Largest number of parameters used in one IN (...) query
+QUERY_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS backups (
+    backup_path TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    taken REAL NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS backups_by_path ON backups (path, taken);
+-- From ``taken`` on, ``path`` holds the content of ``backup_path`` (a move), or nothing (NULL: deleted)
+CREATE TABLE IF NOT EXISTS path_events (
+    path TEXT NOT NULL,
+    taken REAL NOT NULL,
+    backup_path TEXT,
+    PRIMARY KEY (path, taken)
+) WITHOUT ROWID;
+"""
+
+class BackupEntry(NamedTuple):
+    path: str
+    backup_path: str
+    taken: float
+    size: int
+    sha256: Optional[str]
+
+class BackupIndex:
+    """Index of a project's backups by the path they were taken of.
+
+    Backup file names only keep the base name of the original and a
+    timestamp, so the original path and the real time a backup was taken
+    are recorded here when the backup is made. Retention and restore work
+    from the index and never walk the backup tree. Backed by SQLite in WAL
+    mode, like the role store.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._depth = 0
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Group updates into one atomic transaction (nesting is allowed)."""
+        with self._lock:
+            outer = self._depth == 0
+            if outer:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield self._conn
+            except BaseException:
+                self._depth -= 1
+                if outer:
+                    self._conn.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if outer:
+                self._conn.execute("COMMIT")
+
+    def _query(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        """Run a read query and return all rows."""
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def add(self, path: str, backup_path: str, taken: float, size: int, sha256: Optional[str] = None):
+        """Record a backup of ``path``."""
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO backups (backup_path, path, taken, size, sha256) "
+                         "VALUES (?, ?, ?, ?, ?)", (backup_path, path, taken, size, sha256))
+
+    def moved(self, src_path: str, dest_path: str, taken: float):
+        """Record a rename: ``dest_path`` takes the latest backup of ``src_path``, which is then gone."""
+        with self.transaction() as conn:
+            backup_path = self._held(src_path, taken)
+            if backup_path is not None:
+                conn.execute("INSERT OR REPLACE INTO path_events (path, taken, backup_path) VALUES (?, ?, ?)",
+                             (dest_path, taken, backup_path))
+            conn.execute("INSERT OR REPLACE INTO path_events (path, taken, backup_path) VALUES (?, ?, NULL)",
+                         (src_path, taken))
+
+    def deleted(self, path: str, taken: float):
+        """Record that ``path`` was deleted."""
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO path_events (path, taken, backup_path) VALUES (?, ?, NULL)",
+                         (path, taken))
+
+    def _held(self, path: str, taken: float) -> Optional[str]:
+        """The backup holding the content of ``path`` at ``taken``, if any."""
+        backup = self._query("SELECT taken, backup_path FROM backups WHERE path = ? AND taken <= ? "
+                             "ORDER BY taken DESC LIMIT 1", (path, taken))
+        event = self._query("SELECT taken, backup_path FROM path_events WHERE path = ? AND taken <= ? "
+                            "ORDER BY taken DESC LIMIT 1", (path, taken))
+        # A move or deletion outranks a backup taken at the same time
+        if event and (not backup or event[0][0] >= backup[0][0]):
+            return event[0][1]
+        return backup[0][1] if backup else None
+
+    def versions(self, path: str) -> List[BackupEntry]:
+        """Backups of one path, newest first."""
+        rows = self._query("SELECT path, backup_path, taken, size, sha256 FROM backups "
+                           "WHERE path = ? ORDER BY taken DESC", (path,))
+        return [BackupEntry(*row) for row in rows]
+
+    def as_of(self, taken: float) -> List[BackupEntry]:
+        """The content of every path at ``taken``: its newest backup, or the one it was moved from.
+
+        Paths deleted or moved away by then are left out.
+        """
+        # SQLite returns the other columns from the row holding the MAX()
+        rows = self._query("SELECT path, backup_path, MAX(taken), size, sha256 FROM backups "
+                           "WHERE taken <= ? GROUP BY path", (taken,))
+        entries = {row[0]: BackupEntry(*row) for row in rows}
+        moved = {}
+        for path, when, backup_path in self._query("SELECT path, MAX(taken), backup_path FROM path_events "
+                                                   "WHERE taken <= ? GROUP BY path", (taken,)):
+            entry = entries.get(path)
+            if entry is not None and entry.taken > when:
+                continue  # Backed up again since
+            entries.pop(path, None)
+            if backup_path is not None:
+                moved[path] = backup_path
+        sources = list(set(moved.values()))
+        found = {}
+        for start in range(0, len(sources), QUERY_CHUNK):
+            chunk = sources[start:start + QUERY_CHUNK]
+            marks = ','.join('?' * len(chunk))
+            for row in self._query(f"SELECT backup_path, taken, size, sha256 FROM backups "
+                                   f"WHERE backup_path IN ({marks})", chunk):
+                found[row[0]] = row
+        for path, backup_path in moved.items():
+            # Moves of backups removed since are forgotten with them
+            if backup_path in found:
+                entries[path] = BackupEntry(path, *found[backup_path])
+        return [entries[path] for path in sorted(entries)]
+
+    def hashes(self, directory: str) -> List[Tuple[str, int, Optional[str]]]:
+        """Backup path, size and hash of every backup in one directory."""
+        prefix = os.path.join(directory, '')
+        # A range on the primary key: every path starting with the prefix
+        rows = self._query("SELECT backup_path, size, sha256 FROM backups WHERE backup_path >= ? AND backup_path < ?",
+                           (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)))
+        return [row for row in rows if os.path.dirname(row[0]) == os.path.dirname(prefix)]
+
+    def entries(self) -> List[BackupEntry]:
+        """All backups grouped by path, each path's newest first."""
+        rows = self._query("SELECT path, backup_path, taken, size, sha256 FROM backups "
+                           "ORDER BY path, taken DESC")
+        return [BackupEntry(*row) for row in rows]
+
+    def totals(self) -> Dict[str, int]:
+        """Number of backups, of distinct paths, and their total size."""
+        count, paths, size = self._query("SELECT COUNT(*), COUNT(DISTINCT path), COALESCE(SUM(size), 0) "
+                                         "FROM backups")[0]
+        return {'backups': count, 'paths': paths, 'bytes': size}
+
+    def remove(self, backup_paths: List[str]):
+        """Forget deleted backups, and the moves that pointed at them, in one transaction."""
+        with self.transaction() as conn:
+            for start in range(0, len(backup_paths), QUERY_CHUNK):
+                chunk = backup_paths[start:start + QUERY_CHUNK]
+                marks = ','.join('?' * len(chunk))
+                conn.execute(f"DELETE FROM backups WHERE backup_path IN ({marks})", chunk)
+                conn.execute(f"DELETE FROM path_events WHERE backup_path IN ({marks})", chunk)
+
+    def reindex(self, backups_dir: str) -> int:
+        """Add backups made before the index existed, found by walking ``backups_dir``.
+
+        Their original path is unknown, so they are indexed by base name,
+        and by modification time as the time they were taken. Returns the
+        number of backups added.
+        """
+        from .day_sealer import SEAL_MANIFEST
+
+        known = {row[0] for row in self._query("SELECT backup_path FROM backups")}
+        found = []
+        with os.scandir(backups_dir) as days:
+            for day in days:
+                if not (day.is_dir(follow_symlinks=False) and day.name.isdigit()):
+                    continue
+                with os.scandir(day.path) as entries:
+                    for entry in entries:
+                        if (entry.path in known or not entry.is_file(follow_symlinks=False)
+                                or entry.name == SEAL_MANIFEST or entry.name.endswith('.tmp')):
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                        # <name>_YYYYMMDD_HHMMSS_ffffff
+                        name = entry.name.rsplit('_', 3)[0]
+                        found.append((entry.path, name, st.st_mtime, st.st_size, None))
+        with self.transaction() as conn:
+            conn.executemany("INSERT OR IGNORE INTO backups (backup_path, path, taken, size, sha256) "
+                             "VALUES (?, ?, ?, ?, ?)", found)
+        logger.info(f"Indexed {len(found)} backups under {backups_dir}")
+        return len(found)
+
+_indexes: Dict[str, BackupIndex] = {}
+_indexes_lock = threading.Lock()
+
+def get_backup_index(project_name: str) -> BackupIndex:
+    """Get the process-wide backup index of a project."""
+    db_path = get_project_context(project_name).path('backups.db')
+    index = _indexes.get(db_path)
+    # Reopen if the project directory was removed under the open database
+    if index is None or not os.path.exists(db_path):
+        with _indexes_lock:
+            index = _indexes.get(db_path)
+            if index is None or not os.path.exists(db_path):
+                if index is not None:
+                    index.close()
+                    get_project_context(project_name).forget()
+                index = _indexes[db_path] = BackupIndex(db_path)
+                # Sealing a backup day takes the hashes recorded here rather than rereading the backups
+                register_hash_source(get_project_context(project_name).path('backups'),
+                                     lambda directory: _recorded_hashes(project_name, directory))
+    return index
+
+def _recorded_hashes(project_name: str, directory: str) -> Dict[str, str]:
+    """Hashes recorded in the index for the backups of one directory, by file name."""
+    return {os.path.basename(backup_path): sha256
+            for backup_path, _, sha256 in get_backup_index(project_name).hashes(directory) if sha256}
@@ -0,0 +1,166 @@
+import os
+import sys
+import errno
+import queue
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# _IOW(0x94, 9, int): share the source's extents (btrfs, XFS, bcachefs, ...)
+FICLONE = 0x40049409
+
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Errors meaning "this copy method does not apply here", not "the copy failed"
+_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTTY,
+                errno.EBADF, errno.EPERM, getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP)}
+
+def _kernel_copy(copy: Callable[[int], int]) -> bool:
+    """Run a kernel copy loop; False if the method is unsupported before anything was copied."""
+    copied = 0
+    while True:
+        try:
+            n = copy(copied)
+        except OSError as e:
+            if copied == 0 and e.errno in _UNSUPPORTED:
+                return False
+            raise
+        if n == 0:
+            return True
+        copied += n
+
+def copy_file(src_fd: int, dst_fd: int, digest=None) -> str:
+    """Copy an open file into an empty one without passing data through user space.
+
+    Tries a reflink first, which copies nothing until either file is
+    changed, then ``copy_file_range`` and ``sendfile``, and finally plain
+    reads and writes. Both files are read and written from their current
+    positions. Returns the method used. Only the plain read fallback sees
+    the data; it also feeds it to ``digest`` (a hashlib object), if given.
+    """
+    if fcntl is not None and sys.platform.startswith('linux'):
+        try:
+            fcntl.ioctl(dst_fd, FICLONE, src_fd)
+            return 'reflink'
+        except OSError:
+            pass
+    if hasattr(os, 'copy_file_range'):
+        if _kernel_copy(lambda _: os.copy_file_range(src_fd, dst_fd, COPY_CHUNK_SIZE)):
+            return 'copy_file_range'
+    if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+        start = os.lseek(src_fd, 0, os.SEEK_CUR)
+        if _kernel_copy(lambda copied: os.sendfile(dst_fd, src_fd, start + copied, COPY_CHUNK_SIZE)):
+            return 'sendfile'
+    while True:
+        chunk = os.read(src_fd, 1024 * 1024)
+        if not chunk:
+            return 'read'
+        if digest is not None:
+            digest.update(chunk)
+        view = memoryview(chunk)
+        while view:
+            view = view[os.write(dst_fd, view):]
+
+class BackupPool:
+    """Backs up changed files on worker threads, off the watcher's event thread.
+
+    Paths are sharded over the workers, each with its own bounded queue, so
+    the backups of one file run in the order they were submitted. A path
+    already waiting in a queue is not queued again: that backup has yet to
+    read the file and will copy its latest content. When a queue is full,
+    ``submit`` waits (backpressure) up to its timeout.
+    """
+
+    def __init__(self, backup: Callable[[str], object], workers: int = 4, maxsize: int = 256):
+        self.backup = backup
+        self.workers = workers
+        self.maxsize = maxsize
+        self._queues: List[queue.Queue] = []
+        self._threads: List[threading.Thread] = []
+        self._queued = set()
+        self._lock = threading.Lock()
+        self.metrics = {'submitted': 0, 'coalesced': 0, 'dropped': 0, 'completed': 0, 'missing': 0, 'failed': 0}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads)
+
+    def start(self):
+        """Start the worker threads."""
+        if self.running:
+            return
+        for i in range(self.workers):
+            work = queue.Queue(self.maxsize)
+            thread = threading.Thread(target=self._work, args=(work,), name=f'backup-{i}', daemon=True)
+            self._queues.append(work)
+            self._threads.append(thread)
+            thread.start()
+
+    def submit(self, file_path: str, timeout: Optional[float] = None) -> bool:
+        """Queue a backup of ``file_path``; False if it was dropped because its queue stayed full."""
+        if not self.running:
+            raise RuntimeError("Backup pool is not running")
+        with self._lock:
+            if file_path in self._queued:
+                self.metrics['coalesced'] += 1
+                return True
+            self._queued.add(file_path)
+            self.metrics['submitted'] += 1
+        try:
+            self._queues[hash(file_path) % self.workers].put(file_path, timeout=timeout)
+            return True
+        except queue.Full:
+            with self._lock:
+                self._queued.discard(file_path)
+                self.metrics['dropped'] += 1
+            logger.warning(f"Dropped backup of {file_path}: queue full")
+            return False
+
+    def _work(self, work: queue.Queue):
+        while True:
+            file_path = work.get()
+            try:
+                if file_path is None:
+                    return
+                with self._lock:
+                    self._queued.discard(file_path)
+                self.backup(file_path)
+                outcome = 'completed'
+            except FileNotFoundError:
+                # Deleted or renamed again before its turn
+                outcome = 'missing'
+            except Exception as e:
+                logger.error(f"Error backing up {file_path}: {str(e)}", exc_info=True)
+                outcome = 'failed'
+            finally:
+                work.task_done()
+            with self._lock:
+                self.metrics[outcome] += 1
+
+    def join(self):
+        """Wait until every queued backup is done."""
+        for work in self._queues:
+            work.join()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'queued': sum(q.qsize() for q in self._queues), **self.metrics}
+
+    def stop(self):
+        """Finish the queued backups and stop the workers."""
+        if not self.running:
+            return
+        for work in self._queues:
+            work.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._queues = []
+        self._threads = []
+        self._queued.clear()
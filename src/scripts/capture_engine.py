@@ -0,0 +1,114 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class CaptureEngine:
+    """Runs capture streams as asyncio tasks on one event loop thread.
+
+    Each stream (file, chat, thinking, ...) has a bounded queue and a
+    consumer task that hands items to its handler in a thread pool, so
+    blocking I/O never stalls the loop. Items of one stream are handled in
+    order. Producers on other threads call ``submit``, which crosses into
+    the loop thread-safely and waits while the stream's queue is full. An
+    idle engine is parked in the selector; nothing polls.
+    """
+
+    def __init__(self, handlers: Dict[str, Callable[[Any], None]], maxsize: int = 1000,
+                 max_workers: Optional[int] = None):
+        self.handlers = dict(handlers)
+        self.maxsize = maxsize
+        self.max_workers = max_workers or max(1, len(self.handlers))
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self.dropped = {name: 0 for name in self.handlers}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._tasks = []
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the loop thread and one consumer task per stream."""
+        if self.running:
+            return
+        ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+        self._executor = concurrent.futures.ThreadPoolExecutor(self.max_workers, thread_name_prefix='capture')
+        self._loop.set_default_executor(self._executor)
+        self._thread = threading.Thread(target=self._run, args=(ready,), name='capture-loop', daemon=True)
+        self._thread.start()
+        if not ready.wait(5.0):
+            self._executor.shutdown(wait=False)
+            self._thread = self._loop = self._executor = None
+            raise RuntimeError("Capture loop did not start")
+
+    def _run(self, ready: threading.Event):
+        asyncio.set_event_loop(self._loop)
+        # Queues are created here so they belong to this loop on every Python version
+        for name in self.handlers:
+            self.queues[name] = asyncio.Queue(maxsize=self.maxsize)
+            self._tasks.append(self._loop.create_task(self._consume(name)))
+        self._loop.call_soon(ready.set)
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    async def _consume(self, name: str):
+        queue = self.queues[name]
+        handler = self.handlers[name]
+        while True:
+            item = await queue.get()
+            try:
+                await self._loop.run_in_executor(None, handler, item)
+            except Exception as e:
+                logger.error(f"Error in {name} capture: {str(e)}", exc_info=True)
+            finally:
+                queue.task_done()
+
+    def submit(self, name: str, item: Any, timeout: Optional[float] = None) -> bool:
+        """Queue an item from any thread other than the loop's.
+
+        Waits while the queue is full, up to ``timeout`` seconds, after which
+        the item is dropped and counted. Returns whether it was queued.
+        """
+        if not self.running:
+            raise RuntimeError("Capture engine is not running")
+        future = asyncio.run_coroutine_threadsafe(self.queues[name].put(item), self._loop)
+        try:
+            future.result(timeout)
+            return True
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            self.dropped[name] += 1
+            logger.warning(f"Dropped {name} capture item: queue full")
+            return False
+
+    async def _shutdown(self, drain_timeout: float):
+        if drain_timeout:
+            try:
+                await asyncio.wait_for(asyncio.gather(*(q.join() for q in self.queues.values())),
+                                       drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Capture queues not drained before shutdown")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stop(self, drain_timeout: float = 5.0):
+        """Finish queued items (up to ``drain_timeout``), cancel the streams and stop the loop."""
+        if not self.running:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(drain_timeout), self._loop).result(drain_timeout + 5.0)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+        self._thread = self._loop = self._executor = None
+        self._tasks = []
+        self.queues = {}
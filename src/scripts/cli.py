@@ -3,19 +3,13 @@
 import os
 import sys
 import argparse
-from pathlib import Path
 from typing import List, Optional
-import subprocess
 
 # Add the project root to Python path
-project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
-
-from src.scripts.track_change import (
-    record_change, create_backup, show_history,
-    setup, generate_handoff
-)
-from src.scripts.command_aliases import CommandAliases
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+# Each command imports only the modules it needs, to keep startup fast
 from src.scripts.cli_logging import cli_logger
 
 def setup_cli():
@@ -48,6 +42,12 @@ def setup_cli():
     # Project argument
     permissions_parser.add_argument('--project', help='Project name')
     
+    # Who-may subcommand
+    who_may_parser = devenv_subparsers.add_parser('who-may', help='Show which roles may perform an operation on a file')
+    who_may_parser.add_argument('operation', choices=['read', 'write', 'execute', 'immutable'], help='Operation to check')
+    who_may_parser.add_argument('file', help='File to check')
+    who_may_parser.add_argument('--project', help='Project name')
+    
     # DevMode command (keeping for backward compatibility)
     devmode_parser = subparsers.add_parser('dev-mode', help='Enable or disable development mode')
     devmode_parser.add_argument('action', choices=['enable', 'disable'], help='Action to perform')
@@ -82,11 +82,71 @@ def setup_cli():
     backup_parser.add_argument('file', help='File to backup')
     backup_parser.add_argument('--project', help='Project name')
     
+    # Backup retention command
+    gc_parser = subparsers.add_parser('gc', help='Delete old backups by a retention policy')
+    gc_parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted and reclaimed')
+    gc_parser.add_argument('--keep-all', default='24h', help='Keep every backup this recent (default 24h)')
+    gc_parser.add_argument('--hourly', default='7d', help='Keep one backup per hour this far back (default 7d)')
+    gc_parser.add_argument('--daily', default='90d', help='Keep one backup per day this far back (default 90d)')
+    gc_parser.add_argument('--keep-last', type=int, default=3, help='Always keep this many backups per file (default 3)')
+    gc_parser.add_argument('--batch-size', type=int, default=500, help='Backups deleted per batch (default 500)')
+    gc_parser.add_argument('--rate', type=float, default=1000, help='Most backups deleted per second (default 1000)')
+    gc_parser.add_argument('--reindex', action='store_true', help='First index backups made before the index existed')
+    gc_parser.add_argument('--project', help='Project name')
+    
+    # Scrub command
+    scrub_parser = subparsers.add_parser('scrub', help='Verify sealed records and backups against their recorded hashes')
+    scrub_parser.add_argument('--limit', type=float, help='Stop after reading this many MiB; the next run resumes there')
+    scrub_parser.add_argument('--rate', type=float, default=8, help='Most MiB read per second (default 8, 0 for no limit)')
+    scrub_parser.add_argument('--restart', action='store_true', help='Start a new pass instead of resuming the last one')
+    scrub_parser.add_argument('--status', action='store_true', help='Only show progress and open findings')
+    scrub_parser.add_argument('--project', help='Project name')
+    
+    # Scan command
+    scan_parser = subparsers.add_parser('scan', help='Back up uncommitted changes of git worktrees, found from the git index')
+    scan_parser.add_argument('paths', nargs='*', help='Worktrees or directories in them (default: current directory)')
+    scan_parser.add_argument('--dry-run', action='store_true', help='Only list the changed files')
+    scan_parser.add_argument('--project', help='Project name')
+    
+    # Restore command
+    restore_parser = subparsers.add_parser('restore', help="Restore a project's files as of a point in time")
+    restore_parser.add_argument('--at', required=True, help='Point in time (YYYYMMDD for the end of that day, or ISO 8601)')
+    restore_parser.add_argument('--to', required=True, help='Directory to restore into')
+    restore_parser.add_argument('--root', help='Directory the restored paths are made relative to (default: their common parent)')
+    restore_parser.add_argument('--workers', type=int, help='Files restored in parallel')
+    restore_parser.add_argument('--no-verify', action='store_true', help='Do not check restored files against their backup hashes')
+    restore_parser.add_argument('--force', action='store_true', help='Overwrite files already in the target directory')
+    restore_parser.add_argument('--project', help='Project name')
+    
+    # Finalize command
+    finalize_parser = subparsers.add_parser('finalize', help="Seal a day's records")
+    finalize_parser.add_argument('--date', help='Date to seal (YYYYMMDD, default today)')
+    finalize_parser.add_argument('--project', help='Project name')
+    
     # History command
     history_parser = subparsers.add_parser('history', help='Show change history')
     history_parser.add_argument('--date', help='Date to show history for (YYYYMMDD)')
+    history_parser.add_argument('--since', help='Only show changes from this date or time on (YYYYMMDD or ISO 8601)')
+    history_parser.add_argument('--limit', type=int, help='Maximum number of changes to show')
+    history_parser.add_argument('--format', choices=['text', 'json'], default='text', help='Output format')
+    history_parser.add_argument('--follow', action='store_true', help='Keep printing new changes as they are recorded')
+    history_parser.add_argument('--no-pager', action='store_true', help='Write to stdout even on a terminal')
     history_parser.add_argument('--project', help='Project name')
     
+    # Serve command
+    serve_parser = subparsers.add_parser('serve', help='Serve a read-only HTTP/JSON query API')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default 127.0.0.1)')
+    serve_parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default 8765)')
+    serve_parser.add_argument('--allow-origin', help='Web origin allowed to read the API cross-origin')
+    
+    # Daemon command
+    daemon_parser = subparsers.add_parser('daemon', help='Manage the resident SigFile daemon')
+    daemon_parser.add_argument('action', choices=['start', 'stop', 'status', 'run', 'capture'],
+                               help='start in the background, stop, show status, run in the foreground, '
+                                    'or capture a project in the daemon')
+    daemon_parser.add_argument('root', nargs='?', help='Root of the project files to capture (default: cwd)')
+    daemon_parser.add_argument('--project', help='Project name')
+    
     # Handoff command
     handoff_parser = subparsers.add_parser('handoff', help='Generate a handoff document')
     handoff_parser.add_argument('chat_name', help='Name of the chat')
@@ -98,6 +158,11 @@ def setup_cli():
     # Setup command
     setup_parser = subparsers.add_parser('setup', help='Initialize SigFile')
     
+    # Analytics command
+    analytics_parser = subparsers.add_parser('analytics', help='Export and aggregate records in columnar form')
+    analytics_parser.add_argument('action', choices=['export', 'report'], help='Export new records, or export and print aggregates')
+    analytics_parser.add_argument('--project', help='Project name')
+    
     # AI command
     ai_parser = subparsers.add_parser('ai', help='AI-related commands')
     ai_subparsers = ai_parser.add_subparsers(dest='ai_command', help='AI commands')
@@ -118,6 +183,7 @@ def setup_cli():
 
 def show_man_page():
     """Show the man page for the CLI tool."""
+    import subprocess
     try:
         man_path = os.path.join(os.path.dirname(__file__), 'man', 'sigfile-cli.1')
         if os.path.exists(man_path):
@@ -127,6 +193,285 @@ def show_man_page():
     except subprocess.CalledProcessError:
         print("Error displaying man page. Please check the documentation.")
 
+def format_record(record, output_format):
+    """Format a change record as a text block or a JSON line."""
+    if output_format == 'json':
+        import json
+        return json.dumps({key: value for key, value in record.items() if key != 'content'}) + '\n'
+    return f"{record['id']}\n{record['content'].rstrip()}\n\n"
+
+def open_pager():
+    """Start $PAGER (default less) for terminal output, or return None."""
+    import shlex
+    import subprocess
+    if not sys.stdout.isatty():
+        return None
+    try:
+        command = shlex.split(os.environ.get('PAGER') or 'less -FRX')
+        return subprocess.Popen(command, stdin=subprocess.PIPE, universal_newlines=True)
+    except (OSError, ValueError):
+        return None
+
+def remote_history(client, args, page_size=200):
+    """Yield history records from the daemon, one page at a time.
+    
+    If the daemon goes away part way, the rest is read in-process.
+    """
+    from src.scripts.daemon_client import DaemonUnavailable
+    before, remaining = None, args.limit
+    while remaining is None or remaining > 0:
+        size = page_size if remaining is None else min(page_size, remaining)
+        try:
+            page = client.call('history', project=args.project, date=args.date, since=args.since,
+                               limit=size, before=before)
+        except DaemonUnavailable:
+            from src.scripts.track_change import iter_history
+            yield from iter_history(args.project, date=args.date, since=args.since,
+                                    limit=remaining, before=before)
+            return
+        yield from page
+        if len(page) < size:
+            return
+        before = page[-1]['id']
+        if remaining is not None:
+            remaining -= len(page)
+
+def stream_history(args, client=None):
+    """Write history records to a pager or stdout as they are read."""
+    if client is not None:
+        records = remote_history(client, args)
+    else:
+        from src.scripts.track_change import iter_history
+        records = iter_history(args.project, date=args.date, since=args.since,
+                               limit=10 if args.follow and args.limit is None else args.limit)
+    if args.follow:
+        from src.scripts.track_change import follow_history
+        # Oldest first, so records recorded from now on continue the list
+        for record in reversed(list(records)):
+            sys.stdout.write(format_record(record, args.format))
+        sys.stdout.flush()
+        try:
+            for record in follow_history(args.project):
+                sys.stdout.write(format_record(record, args.format))
+                sys.stdout.flush()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    pager = None if args.no_pager else open_pager()
+    out = pager.stdin if pager else sys.stdout
+    try:
+        for record in records:
+            out.write(format_record(record, args.format))
+    except BrokenPipeError:
+        pass  # The pager was closed before the end
+    finally:
+        if pager:
+            try:
+                pager.stdin.close()
+            except BrokenPipeError:
+                pass
+            pager.wait()
+
+def remote_request(args):
+    """Map a command to a daemon request and success message, or None if it runs in-process."""
+    if args.command == 'record':
+        return ('record', {'project': args.project, 'description': args.description,
+                           'files': ' '.join(args.files)}, f"Recorded change: {args.description}")
+    if args.command == 'backup':
+        return ('backup', {'project': args.project, 'file': os.path.abspath(args.file)},
+                f"Created backup for: {args.file}")
+    if args.command == 'finalize':
+        return 'finalize', {'project': args.project, 'date': args.date}, None
+    if args.command == 'history' and not args.follow:
+        return 'history', None, None
+    if args.command == 'dev-mode':
+        file = os.path.abspath(args.file) if args.file else None
+        target = 'all files' if file is None else args.file
+        return ('dev_mode', {'project': args.project, 'action': args.action, 'file': file},
+                f"Development mode {args.action}d for {target}")
+    if args.command == 'decision' and args.new and args.title:
+        return ('decision', {'project': args.project, 'decision_type': args.type or 'implementation',
+                             'title': args.title, 'context': args.context or 'Context not provided',
+                             'affected_files': args.affected_files or []},
+                f"Created new decision: {args.title}")
+    if args.command == 'devenv' and args.devenv_command == 'who-may':
+        return 'who_may', {'project': args.project, 'file': os.path.abspath(args.file),
+                           'operation': args.operation}, None
+    return None
+
+def run_remote(args):
+    """Run a command in the daemon if one is running.
+    
+    Returns False when the command should run in-process instead.
+    """
+    request = remote_request(args)
+    if request is None or os.getenv('SIGFILE_NO_DAEMON'):
+        return False
+    from src.scripts.daemon_client import DaemonClient, DaemonDisconnected, DaemonUnavailable
+    command, params, message = request
+    try:
+        client = DaemonClient().connect()
+    except DaemonUnavailable:
+        return False
+    with client:
+        if command == 'history':
+            stream_history(args, client)
+            return True
+        try:
+            result = client.call(command, **params)
+        except DaemonDisconnected:
+            # Sent, so it may have been carried out: running it again could repeat it
+            raise RuntimeError(f"SigFile daemon went away during {command}; it may or may not have completed")
+        except DaemonUnavailable:
+            # The daemon went away before the request was sent
+            return False
+    if command == 'finalize':
+        message = f"Sealed {result} files"
+    if command == 'who_may':
+        print(', '.join(result) or 'none')
+    else:
+        cli_logger.log_success(message)
+    return True
+
+def run_daemon_command(action, project=None, root=None):
+    """Start, stop, query or run the resident daemon, or have it capture a project."""
+    from src.scripts.daemon_client import DaemonUnavailable, call, socket_path, wait_for_daemon
+    if action == 'run':
+        from src.scripts.daemon import serve
+        serve()
+    elif action == 'start':
+        import subprocess
+        if wait_for_daemon(timeout=0):
+            cli_logger.log_warning("SigFile daemon is already running")
+            return
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), 'daemon', 'run'],
+                         stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                         stderr=subprocess.DEVNULL, start_new_session=True)
+        if not wait_for_daemon():
+            raise RuntimeError(f"SigFile daemon did not start on {socket_path()}")
+        cli_logger.log_success(f"SigFile daemon started on {socket_path()}")
+    else:
+        try:
+            if action == 'stop':
+                call('shutdown')
+                cli_logger.log_success("SigFile daemon stopped")
+            elif action == 'capture':
+                root = call('capture', project=project, root=os.path.abspath(root or os.getcwd()))
+                cli_logger.log_success(f"SigFile daemon is capturing {project} from {root}")
+            else:
+                status = call('ping')
+                print(f"running (pid {status['pid']}, up {status['uptime']:.0f}s) on {socket_path()}")
+        except DaemonUnavailable:
+            print("SigFile daemon is not running")
+
+def format_bytes(size: float) -> str:
+    """Format a byte count for people."""
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024 or unit == 'GiB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+def run_gc(args):
+    """Thin out a project's backups, or report what that would delete."""
+    from src.scripts.backup_index import get_backup_index
+    from src.scripts.project_context import get_project_context
+    from src.scripts.retention import RetentionPolicy, apply_retention, parse_duration, plan_retention
+
+    index = get_backup_index(args.project)
+    if args.reindex:
+        added = index.reindex(get_project_context(args.project).dir('backups'))
+        cli_logger.log_success(f"Indexed {added} older backups")
+    policy = RetentionPolicy(parse_duration(args.keep_all), parse_duration(args.hourly),
+                             parse_duration(args.daily), args.keep_last)
+    plan = plan_retention(index, policy)
+    report = plan.report()
+    print(f"{'Would delete' if args.dry_run else 'Deleting'} {report['delete']} backups, "
+          f"reclaiming {format_bytes(report['reclaimed_bytes'])}; keeping {report['keep']} "
+          f"({format_bytes(report['kept_bytes'])}): "
+          + ', '.join(f"{count} {rule}" for rule, count in sorted(report['kept_by_rule'].items())))
+    for item in report['top_paths']:
+        print(f"  {format_bytes(item['bytes']):>10}  {item['backups']:>5}  {item['path']}")
+    if args.dry_run:
+        return
+    result = apply_retention(index, plan, batch_size=args.batch_size, max_rate=args.rate)
+    cli_logger.log_success(f"Deleted {result['deleted']} backups, reclaimed {format_bytes(result['reclaimed_bytes'])}"
+                           + (f" ({result['failed']} could not be deleted)" if result['failed'] else ''))
+
+def run_scrub(args):
+    """Verify a project's sealed records and backups, resuming the last pass."""
+    import time
+    from src.scripts.backup_index import get_backup_index
+    from src.scripts.project_context import get_project_context
+    from src.scripts.scrubber import Scrubber
+
+    scrubber = Scrubber(get_project_context(args.project), get_backup_index(args.project),
+                        max_rate=args.rate * 1024 * 1024 or None)
+    if not args.status:
+        result = scrubber.scrub(max_bytes=args.limit and int(args.limit * 1024 * 1024), restart=args.restart)
+        cli_logger.log_success(f"Verified {result['files']} files ({format_bytes(result['bytes'])}); "
+                               + ('pass complete' if result['complete'] else 'pass paused, run again to resume'))
+    state = scrubber.load_state()
+    if state.get('last_pass'):
+        print(f"Last complete pass: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(state['last_pass']))}")
+    if state.get('cursor'):
+        print(f"Resumes after: {'/'.join(state['cursor'])}")
+    problems = state.get('problems', {})
+    if problems:
+        cli_logger.log_warning(f"{len(problems)} files failed verification")
+        for path, finding in sorted(problems.items()):
+            print(f"  {finding['problem']}: {path}")
+    if problems and not args.status:
+        sys.exit(1)
+
+def run_scan(args):
+    """Back up the files of git worktrees that differ from their index, and note the deleted ones."""
+    from src.scripts.file_watcher import FileWatcher
+    from src.scripts.git_index import GitChangeDetector
+    from src.scripts.project_context import PROJECTS_ROOT
+    from src.scripts.track_change import create_backup, index_change
+    from src.scripts.watch_service import get_watch_service
+
+    paths = []
+    for path in args.paths or [os.getcwd()]:
+        if GitChangeDetector.for_path(path) is None:
+            cli_logger.log_warning(f"Not in a git worktree, skipped: {path}")
+        else:
+            paths.append(path)
+    if not paths:
+        return
+    # Attached to the watch service but never started: nothing is watched
+    watcher = FileWatcher(paths, enable_ai_features=False, service=get_watch_service())
+    watcher.ignore_patterns.append(os.path.join(PROJECTS_ROOT, '*'))
+    watcher.event_handler.move_window = 0
+    watcher.scan(baseline=False)
+    backed_up = 0
+    for change in watcher.get_changes():
+        change_type, file_path = change['metadata']['change_type'], change['files'][-1]
+        print(f"  {change_type}: {file_path}")
+        if change_type == 'deleted' and not args.dry_run:
+            index_change(change, args.project)
+        elif not args.dry_run:
+            create_backup(file_path, args.project)
+            backed_up += 1
+    if not args.dry_run:
+        cli_logger.log_success(f"Backed up {backed_up} changed files")
+
+def run_restore(args):
+    """Restore a project's files as of a point in time."""
+    from src.scripts.backup_index import get_backup_index
+    from src.scripts.restore import parse_time, restore_snapshot
+
+    result = restore_snapshot(get_backup_index(args.project), parse_time(args.at), os.path.abspath(args.to),
+                              root=args.root and os.path.abspath(args.root), workers=args.workers,
+                              verify=not args.no_verify, overwrite=args.force)
+    cli_logger.log_success(f"Restored {result['restored']} files ({format_bytes(result['bytes'])}) to {args.to} "
+                           f"in {result['seconds']:.2f}s, {result['verified']} verified by hash")
+    if result['skipped']:
+        print(f"Skipped {result['skipped']} files already present (use --force to overwrite)")
+    for path, problem in sorted(result['failed'].items()):
+        print(f"  failed: {path}: {problem}")
+
 def main():
     """Main entry point for the CLI."""
     parser = setup_cli()
@@ -144,26 +489,54 @@ def main():
         # Log command execution
         cli_logger.log_command(args.command, vars(args))
         
-        if args.command == 'devenv':
-            from src.scripts.permission_manager import permission_manager, FileRole
+        # Hand the command to a running daemon, if there is one
+        if run_remote(args):
+            return
+        
+        if args.command == 'daemon':
+            run_daemon_command(args.action, args.project, args.root)
+        
+        elif args.command == 'gc':
+            run_gc(args)
+        
+        elif args.command == 'scrub':
+            run_scrub(args)
+        
+        elif args.command == 'scan':
+            run_scan(args)
+        
+        elif args.command == 'restore':
+            run_restore(args)
+        
+        elif args.command == 'serve':
+            from src.scripts.query_api import serve
+            serve(args.host, args.port, allow_origin=args.allow_origin)
+        
+        elif args.command == 'devenv':
+            from src.scripts.permission_manager import FileRole, get_permission_manager
             from src.scripts.track_change import OptimizedCapture
             
             # Create a capture instance for recording decisions
             capture = OptimizedCapture(args.project)
+            permission_manager = get_permission_manager(args.project)
+            
+            if args.devenv_command == 'who-may':
+                roles = permission_manager.who_may(args.file, args.operation)
+                print(', '.join(sorted(role.value for role in roles)) or 'none')
             
-            if args.devenv_command == 'permissions':
+            elif args.devenv_command == 'permissions':
                 if args.god_mode:
                     if args.on:
                         # Enable god mode (all permissions enabled for all roles)
                         for role in FileRole:
                             for perm in ['read', 'write', 'execute', 'immutable']:
-                                permission_manager.role_permissions[role][perm] = True
+                                permission_manager.set_role_permission(role, perm, True)
                         cli_logger.log_success("God mode enabled: All permissions enabled for all roles")
                     else:
                         # Disable god mode
                         for role in FileRole:
                             for perm in ['read', 'write', 'execute', 'immutable']:
-                                permission_manager.role_permissions[role][perm] = False
+                                permission_manager.set_role_permission(role, perm, False)
                         cli_logger.log_success("God mode disabled: All permissions reset to default")
         
         elif args.command == 'dev-mode':
@@ -209,25 +582,44 @@ def main():
                         cli_logger.log_debug(f"  - {file}")
         
         elif args.command == 'record':
+            from src.scripts.track_change import record_change
             record_change(args.description, ' '.join(args.files), args.project)
             cli_logger.log_success(f"Recorded change: {args.description}")
         
         elif args.command == 'backup':
+            from src.scripts.track_change import create_backup
             create_backup(args.file, args.project)
             cli_logger.log_success(f"Created backup for: {args.file}")
         
+        elif args.command == 'finalize':
+            from src.scripts.track_change import finalize_day
+            sealed = finalize_day(args.project, args.date)
+            cli_logger.log_success(f"Sealed {sealed} files")
+        
         elif args.command == 'history':
-            show_history(args.date, args.project)
+            stream_history(args)
             cli_logger.log_debug(f"Showed history for date: {args.date or 'today'}")
         
         elif args.command == 'setup':
+            from src.scripts.track_change import setup
             setup()
             cli_logger.log_success("SigFile setup completed")
         
         elif args.command == 'handoff':
+            from src.scripts.track_change import generate_handoff
             generate_handoff(args.chat_name, args.chat_id, args.summary, args.next_steps, args.project)
             cli_logger.log_success(f"Generated handoff for chat: {args.chat_name}")
         
+        elif args.command == 'analytics':
+            from src.scripts.analytics import AnalyticsExporter
+            import json
+            
+            exporter = AnalyticsExporter(args.project)
+            added = exporter.export()
+            cli_logger.log_success(f"Exported analytics rows: {added}")
+            if args.action == 'report':
+                print(json.dumps(exporter.load().report(), indent=2))
+        
         elif args.command == 'ai':
             if args.ai_command == 'start':
                 # TODO: Implement AI session start
@@ -9,6 +9,11 @@ from ..models.record_format import (
 )
 from ..models.record_manager import RecordManager
 from ..models.ai_record_assistant import AIRecordAssistant
+from ..project_context import get_project_context
+
+def _manager(project_root) -> RecordManager:
+    """Create a RecordManager sharing the process-wide context of its root."""
+    return RecordManager(project_root, get_project_context(base_dir=str(project_root)))
 
 @click.group()
 def record():
@@ -22,7 +27,7 @@ def record():
 @click.option('--ai/--no-ai', default=False)
 def create(type: str, project: str, author: str, ai: bool):
     """Create a new record."""
-    manager = RecordManager(project)
+    manager = _manager(project)
     
     if ai:
         assistant = AIRecordAssistant(manager)
@@ -105,7 +110,7 @@ def create(type: str, project: str, author: str, ai: bool):
 @click.option('--tag', multiple=True)
 def update(record_path: str, status: Optional[str], tag: List[str]):
     """Update an existing record."""
-    manager = RecordManager(Path(record_path).parent)
+    manager = _manager(Path(record_path).parent)
     
     if status:
         manager.update_record(
@@ -129,7 +134,7 @@ def update(record_path: str, status: Optional[str], tag: List[str]):
 @click.argument('record_path')
 def validate(record_path: str):
     """Validate a record."""
-    manager = RecordManager(Path(record_path).parent)
+    manager = _manager(Path(record_path).parent)
     record = StandardRecord.from_json(Path(record_path).read_text())
     
     errors = record.validate()
@@ -145,7 +150,7 @@ def validate(record_path: str):
 def show(record_path: str):
     """Display a record."""
     record = StandardRecord.from_json(Path(record_path).read_text())
-    click.echo(record.to_json())
+    click.echo(record.to_json(pretty=True))
 
 @record.command()
 @click.option('--type', type=click.Choice([t.value for t in RecordType]))
@@ -154,6 +159,6 @@ def show(record_path: str):
 @click.option('--author')
 def list(type: Optional[str], status: Optional[str], tag: Optional[str], author: Optional[str]):
     """List records matching criteria."""
-    manager = RecordManager(".")  # Current directory
+    manager = _manager(".")  # Current directory
     # Implementation would search for matching records
     click.echo("Listing records...")  # Placeholder 
\ No newline at end of file
@@ -3,9 +3,10 @@
 import os
 import sys
 import logging
-from pathlib import Path
 from typing import Optional
 
+from .lazy_logging import LazyFileHandler
+
 class CLILogger:
     """Logger configuration for CLI tool."""
     
@@ -16,9 +17,8 @@ class CLILogger:
     
     def setup_logging(self):
         """Set up logging configuration for CLI tool."""
-        # Create logs directory if it doesn't exist
-        logs_dir = Path(__file__).parent.parent / 'logs' / self.project_name
-        logs_dir.mkdir(parents=True, exist_ok=True)
+        # The logs directory and file are created on the first record written
+        logs_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs', self.project_name)
         
         # Clear any existing handlers
         self.logger.handlers = []
@@ -37,8 +37,8 @@ class CLILogger:
         self.logger.addHandler(console_handler)
         
         # File handler for detailed logs
-        log_file = logs_dir / 'cli.log'
-        file_handler = logging.FileHandler(log_file, mode='a')
+        log_file = os.path.join(logs_dir, 'cli.log')
+        file_handler = LazyFileHandler(log_file, mode='a')
         file_handler.setLevel(logging.DEBUG)
         file_formatter = logging.Formatter(
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -48,7 +48,7 @@ class CLILogger:
         self.logger.addHandler(file_handler)
         
         # Add command execution logging
-        self.logger.info(f"CLI tool initialized for project: {self.project_name}")
+        self.logger.debug(f"CLI tool initialized for project: {self.project_name}")
     
     def log_command(self, command: str, args: Optional[dict] = None):
         """Log command execution."""
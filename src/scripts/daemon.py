@@ -0,0 +1,207 @@
+"""Resident SigFile daemon.
+
+Keeps project contexts, trackers and the permission store loaded between
+commands and serves them over a Unix domain socket (see daemon_client for
+the protocol), so a command costs a socket round-trip instead of an
+interpreter start. A project is captured in the background, from its own
+root, once a ``capture`` request asks for it, until the daemon stops.
+"""
+
+import json
+import logging
+import os
+import signal
+import socketserver
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .daemon_client import DaemonUnavailable, call, socket_path
+
+logger = logging.getLogger(__name__)
+
+class SigfileService:
+    """Commands served by the daemon, with per-project state kept warm.
+
+    Capture is opt-in: a ``capture`` request names a project and the root
+    of its files, and from then on the project's file watcher, backups and
+    scrubber run in the daemon until it shuts down. Roots of different
+    projects may not overlap, so no change is recorded for two projects.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._trackers = {}
+        self._roots: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.commands: Dict[str, Callable[..., Any]] = {
+            'ping': self.ping,
+            'capture': self.capture,
+            'record': self.record,
+            'backup': self.backup,
+            'finalize': self.finalize,
+            'history': self.history,
+            'dev_mode': self.dev_mode,
+            'decision': self.decision,
+            'who_may': self.who_may,
+        }
+
+    def _tracker(self, project: str):
+        """Get the project's capture instance, creating it (not capturing) on first use."""
+        with self._lock:
+            tracker = self._trackers.get(project)
+            if tracker is None:
+                from .track_change import OptimizedCapture
+                tracker = self._trackers[project] = OptimizedCapture(project)
+            return tracker
+
+    def capture(self, project: str, root: str) -> str:
+        """Start capturing the files under ``root`` for ``project``; returns the root."""
+        root = os.path.abspath(root)
+        with self._lock:
+            if project in self._roots:
+                if self._roots[project] != root:
+                    raise ValueError(f"{project} is already captured from {self._roots[project]}")
+                return root
+            for other, other_root in self._roots.items():
+                if os.path.commonpath([root, other_root]) in (root, other_root):
+                    raise ValueError(f"{root} overlaps {other_root}, captured for {other}")
+            from .track_change import OptimizedCapture
+            tracker = OptimizedCapture(project, watch_paths=[root])
+            tracker.start_capture()
+            self._trackers[project] = tracker
+            self._roots[project] = root
+        logger.info(f"Capturing {project} from {root}")
+        return root
+
+    def close(self):
+        """Stop capturing every captured project."""
+        with self._lock:
+            captured = [self._trackers[project] for project in self._roots]
+            self._roots = {}
+        for tracker in captured:
+            try:
+                tracker.stop_capture()
+            except Exception as e:
+                logger.error(f"Error stopping capture of {tracker.project_name}: {str(e)}")
+
+    def ping(self) -> Dict:
+        return {'pid': os.getpid(), 'uptime': time.time() - self.started}
+
+    def record(self, project: str, description: str, files: str) -> str:
+        from .track_change import record_change
+        return record_change(description, files, project)
+
+    def backup(self, project: str, file: str) -> str:
+        from .track_change import create_backup
+        return create_backup(file, project)
+
+    def finalize(self, project: str, date: Optional[str] = None) -> int:
+        from .track_change import finalize_day
+        return finalize_day(project, date)
+
+    def history(self, project: str, date: Optional[str] = None, since: Optional[str] = None,
+                limit: Optional[int] = None, before: Optional[str] = None) -> list:
+        from .track_change import iter_history
+        return list(iter_history(project, date=date, since=since, limit=limit, before=before))
+
+    def dev_mode(self, project: str, action: str, file: Optional[str] = None):
+        capture = self._tracker(project)
+        with self._lock:
+            if action == 'enable':
+                capture.enable_dev_mode(file)
+            else:
+                capture.disable_dev_mode(file)
+
+    def decision(self, project: str, decision_type: str, title: str, context: str,
+                 affected_files: Optional[list] = None):
+        capture = self._tracker(project)
+        with self._lock:
+            capture._record_development_decision(decision_type, title, context, "Pending",
+                                                        affected_files or [])
+
+    def who_may(self, project: str, file: str, operation: str) -> list:
+        from .permission_manager import get_permission_manager
+        return sorted(role.value for role in get_permission_manager(project).who_may(file, operation))
+
+    def dispatch(self, request: Dict) -> Dict:
+        """Run one request and build its reply."""
+        handler = self.commands.get(request.get('command'))
+        if handler is None:
+            return {'ok': False, 'error': f"Unknown command: {request.get('command')}"}
+        params = request.get('params', {})
+        try:
+            return {'ok': True, 'result': handler(**params)}
+        except Exception as e:
+            logger.error(f"Error handling {request.get('command')}: {str(e)}")
+            return {'ok': False, 'error': str(e)}
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Serves requests of one client connection until it closes."""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                reply = {'ok': False, 'error': 'Malformed request'}
+                request = {}
+            else:
+                if request.get('command') == 'shutdown':
+                    reply = {'ok': True, 'result': None}
+                else:
+                    reply = self.server.service.dispatch(request)
+            self.wfile.write(json.dumps(reply, default=str).encode() + b'\n')
+            if request.get('command') == 'shutdown':
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server with one thread per client connection."""
+    daemon_threads = True
+
+    def __init__(self, path: str, service: Optional[SigfileService] = None):
+        self.service = service or SigfileService()
+        super().__init__(path, _RequestHandler)
+        os.chmod(path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        self.service.close()
+
+def _remove_stale_socket(path: str):
+    """Remove a socket left behind by a daemon that is no longer running."""
+    if not os.path.exists(path):
+        return
+    try:
+        call('ping', path)
+    except DaemonUnavailable:
+        os.unlink(path)
+    else:
+        raise RuntimeError(f"A daemon is already running on {path}")
+
+def create_server(path: Optional[str] = None, service: Optional[SigfileService] = None) -> DaemonServer:
+    """Bind the daemon socket, replacing a stale one."""
+    path = path or socket_path()
+    _remove_stale_socket(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return DaemonServer(path, service)
+
+def serve(path: Optional[str] = None):
+    """Run the daemon in the foreground until shut down or terminated."""
+    server = create_server(path)
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM,
+                      lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+    logger.info(f"SigFile daemon listening on {server.server_address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.unlink(server.server_address)
+        except FileNotFoundError:
+            pass
+        logger.info("SigFile daemon stopped")
@@ -0,0 +1,102 @@
+"""Thin client of the resident SigFile daemon.
+
+Requests and replies are single JSON lines over a Unix domain socket. This
+module only needs the standard library, so hooks and editor integrations
+can talk to the daemon without importing the tracking code.
+"""
+
+import json
+import os
+import socket
+import time
+from typing import Any, Optional
+
+from .project_context import PROJECTS_ROOT
+
+class DaemonUnavailable(Exception):
+    """No daemon is listening on the socket."""
+
+class DaemonDisconnected(DaemonUnavailable):
+    """The daemon went away after a request was sent, so it may have been carried out."""
+
+class DaemonError(Exception):
+    """The daemon received a request but could not carry it out."""
+
+def socket_path() -> str:
+    """Get the daemon socket path, overridable with $SIGFILE_SOCKET."""
+    return os.environ.get('SIGFILE_SOCKET') or os.path.join(PROJECTS_ROOT, '.sigfiled.sock')
+
+class DaemonClient:
+    """Connection to the daemon, reused across requests."""
+
+    def __init__(self, path: Optional[str] = None, timeout: float = 30.0):
+        self.path = path or socket_path()
+        self.timeout = timeout
+        self._sock = None
+        self._reader = None
+
+    def connect(self) -> 'DaemonClient':
+        """Open the connection, raising DaemonUnavailable if no daemon listens."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError as e:
+            sock.close()
+            raise DaemonUnavailable(f"No daemon at {self.path}: {e}") from e
+        self._sock = sock
+        self._reader = sock.makefile('rb')
+        return self
+
+    def call(self, command: str, **params) -> Any:
+        """Send one request and return its result."""
+        if self._sock is None:
+            self.connect()
+        # The daemon only acts on whole lines, so a failed send was never carried out
+        try:
+            self._sock.sendall(json.dumps({'command': command, 'params': params}).encode() + b'\n')
+        except OSError as e:
+            self.close()
+            raise DaemonUnavailable(f"Lost connection to daemon: {e}") from e
+        try:
+            line = self._reader.readline()
+        except OSError as e:
+            self.close()
+            raise DaemonDisconnected(f"Lost connection to daemon: {e}") from e
+        if not line:
+            self.close()
+            raise DaemonDisconnected("Daemon closed the connection")
+        reply = json.loads(line)
+        if not reply.get('ok'):
+            raise DaemonError(reply.get('error', 'Unknown daemon error'))
+        return reply.get('result')
+
+    def close(self):
+        """Close the connection; the next call reconnects."""
+        if self._sock is not None:
+            self._reader.close()
+            self._sock.close()
+            self._sock = self._reader = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def call(command: str, path: Optional[str] = None, **params) -> Any:
+    """Send a single request to the daemon over a fresh connection."""
+    with DaemonClient(path) as client:
+        return client.call(command, **params)
+
+def wait_for_daemon(path: Optional[str] = None, timeout: float = 5.0) -> bool:
+    """Wait until a daemon answers on the socket, returning False on timeout."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            call('ping', path)
+            return True
+        except DaemonUnavailable:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
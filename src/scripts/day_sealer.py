@@ -0,0 +1,187 @@
+import os
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Dict, IO, Iterable, Optional, Set
+
+if TYPE_CHECKING:
+    from .file_attributes import BulkResult
+
+logger = logging.getLogger(__name__)
+
+# Per-directory record of what was sealed and the content hashes
+SEAL_MANIFEST = '.seal_manifest.json'
+
+# Per-root list of the day directories sealed as complete, one name per line
+COMPLETE_DAYS = '.complete_days'
+
+# Records stay writable by the writer process only until sealed
+WRITER_MODE = 0o600
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Day directory last seen per record root by this process
+_current_days: Dict[str, str] = {}
+_lock = threading.Lock()
+
+# Record root -> lookup of the hashes already recorded elsewhere for a directory's files, by name
+_hash_sources: Dict[str, Callable[[str], Dict[str, str]]] = {}
+
+def register_hash_source(root: str, source: Callable[[str], Dict[str, str]]):
+    """Take the hashes of files sealed under ``root`` from ``source`` instead of reading the files.
+
+    Their manifest entries then carry no hash of their own, so each file's
+    hash is kept in one place.
+    """
+    _hash_sources[os.path.abspath(root)] = source
+
+def open_record(file_path: str, mode: str = 'w') -> IO:
+    """Create a record file that only the writer can read and write."""
+    flags = os.O_WRONLY | os.O_CREAT | (os.O_APPEND if 'a' in mode else os.O_TRUNC)
+    try:
+        fd = os.open(file_path, flags, WRITER_MODE)
+    except FileNotFoundError:
+        # The cached day directory was removed since it was created
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        fd = os.open(file_path, flags, WRITER_MODE)
+    return os.fdopen(fd, mode)
+
+def file_hash(file_path: str) -> str:
+    """Get the SHA-256 hex digest of a file's content."""
+    import hashlib
+    
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_manifest(directory: str) -> Dict:
+    """Load a directory's seal manifest, or an empty one."""
+    try:
+        with open(os.path.join(directory, SEAL_MANIFEST), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'complete': False, 'files': {}}
+
+def _save_manifest(directory: str, manifest: Dict):
+    """Write a seal manifest atomically."""
+    path = os.path.join(directory, SEAL_MANIFEST)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def seal_directory(directory: str, complete: bool = False, names: Optional[Iterable[str]] = None) -> 'BulkResult':
+    """Seal every not yet sealed file in a directory in one bulk pass.
+
+    Sealed files are added to the directory's manifest with their size and
+    content hash, unless a registered hash source already has their hash.
+    ``names`` limits sealing to those files. ``complete`` marks the
+    directory as finished, so later rollover passes skip it.
+    """
+    # Imported here: writers only need open_record and note_record
+    from .file_attributes import apply_immutable
+    
+    if names is not None:
+        names = set(names)
+    manifest = load_manifest(directory)
+    sealed = manifest.setdefault('files', {})
+    with os.scandir(directory) as entries:
+        pending = [entry.path for entry in entries
+                   if entry.is_file(follow_symlinks=False) and entry.name not in sealed
+                   and entry.name != SEAL_MANIFEST and not entry.name.endswith('.tmp')
+                   and (names is None or entry.name in names)]
+
+    result = apply_immutable(pending)
+    source = _hash_sources.get(os.path.dirname(os.path.abspath(directory)))
+    known = source(directory) if source is not None and pending else {}
+    sealed_at = datetime.now().isoformat()
+    for path in pending:
+        if path not in result.failures:
+            name = os.path.basename(path)
+            sealed[name] = {'size': os.path.getsize(path), 'sealed_at': sealed_at}
+            if name not in known:
+                sealed[name]['sha256'] = file_hash(path)
+    newly_complete = complete and not manifest.get('complete')
+    manifest['complete'] = bool(manifest.get('complete')) or complete
+    _save_manifest(directory, manifest)
+    if newly_complete:
+        _mark_complete(directory)
+    logger.info(f"Sealed {len(pending) - result.failed} files in {directory}")
+    return result
+
+def _mark_complete(directory: str):
+    """Add a day directory to its root's list of complete days."""
+    root, day = os.path.split(os.path.abspath(directory))
+    with open(os.path.join(root, COMPLETE_DAYS), 'a') as f:
+        f.write(day + '\n')
+
+def _complete_days(root: str) -> Set[str]:
+    try:
+        with open(os.path.join(root, COMPLETE_DAYS), 'r') as f:
+            return set(f.read().split())
+    except OSError:
+        return set()
+
+def seal_completed_days(root: str, current_day: str) -> int:
+    """Seal the day directories under ``root`` older than ``current_day``.
+
+    Days already complete are known from the root's COMPLETE_DAYS list,
+    so their manifests are not read. Returns the number of day
+    directories sealed.
+    """
+    sealed = 0
+    complete = _complete_days(root)
+    with os.scandir(root) as entries:
+        days = [entry for entry in entries
+                if entry.is_dir(follow_symlinks=False) and entry.name.isdigit() and entry.name < current_day
+                and entry.name not in complete]
+    for entry in days:
+        if load_manifest(entry.path).get('complete'):
+            _mark_complete(entry.path)  # Completed before the list was kept
+        else:
+            seal_directory(entry.path, complete=True)
+            sealed += 1
+    return sealed
+
+def note_record(day_dir: str):
+    """Note a record written to a day directory.
+
+    The first record a process writes under a root, and the first one after
+    the day rolls over, seals the earlier day directories in bulk.
+    """
+    root, day = os.path.split(os.path.abspath(day_dir))
+    with _lock:
+        if _current_days.get(root) == day:
+            return
+        _current_days[root] = day
+    try:
+        seal_completed_days(root, day)
+    except Exception as e:
+        logger.error(f"Error sealing completed days under {root}: {str(e)}")
+
+def forget_files(directory: str, names) -> int:
+    """Drop deleted files from a directory's seal manifest; returns how many were listed."""
+    manifest = load_manifest(directory)
+    sealed = manifest.get('files', {})
+    dropped = [name for name in names if sealed.pop(name, None) is not None]
+    if dropped:
+        _save_manifest(directory, manifest)
+    return len(dropped)
+
+def verify_directory(directory: str) -> Dict[str, str]:
+    """Check sealed files against their manifest hashes.
+
+    Returns file name -> problem for every file that is missing or changed.
+    Files whose hash is kept by a hash source are only checked for existence.
+    """
+    problems = {}
+    for name, entry in load_manifest(directory).get('files', {}).items():
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            problems[name] = 'missing'
+        elif 'sha256' in entry and file_hash(path) != entry['sha256']:
+            problems[name] = 'hash mismatch'
+    return problems
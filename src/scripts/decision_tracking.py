@@ -1,18 +1,114 @@
 #!/usr/bin/env python3
 
 import os
+import sys
 import json
+import bisect
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+
+from .project_context import ProjectContext, get_project_context
+
+# Fields kept in the header cache; enough to render a listing without
+# opening the decision file itself.
+HEADER_FIELDS = ('id', 'title', 'description', 'timestamp', 'status')
+# Kept next to the decisions directory, not in it: writing it there would
+# change the directory mtime that the id listing is cached by
+HEADER_CACHE_SUFFIX = '_headers.json'
 
 class DecisionTracker:
-    def __init__(self, project_name: str = "logiclens"):
+    def __init__(self, project_name: str = "logiclens", context: Optional[ProjectContext] = None):
         """Initialize decision tracker for a project."""
         self.project_name = project_name
         self.project_root = Path(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-        self.decisions_dir = self.project_root / "tracked_projects" / project_name / "decisions"
-        self.decisions_dir.mkdir(parents=True, exist_ok=True)
+        self.context = context or get_project_context(project_name)
+        self.decisions_dir = Path(self.context.dir('decisions'))
+        
+        # Sorted (ascending) decision ids, refreshed when the directory changes
+        self._ids: List[str] = []
+        self._ids_mtime: Optional[int] = None
+        
+        # Header cache: id -> header dict (plus the file mtime it was read at)
+        self._headers: Optional[Dict[str, Dict]] = None
+        self._headers_dirty = False
+    
+    def _header_cache_path(self) -> Path:
+        """Path of the persisted header cache, beside the decisions directory."""
+        return self.decisions_dir.with_name(f'.{self.decisions_dir.name}{HEADER_CACHE_SUFFIX}')
+    
+    def _load_header_cache(self) -> Dict[str, Dict]:
+        """Load the persisted header cache, once per tracker."""
+        if self._headers is None:
+            try:
+                with open(self._header_cache_path()) as f:
+                    self._headers = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._headers = {}
+        return self._headers
+    
+    def _save_header_cache(self) -> None:
+        """Persist the header cache if it changed."""
+        if not self._headers_dirty:
+            return
+        cache_path = self._header_cache_path()
+        tmp_path = cache_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self._headers, f)
+        os.replace(tmp_path, cache_path)
+        self._headers_dirty = False
+    
+    def _decision_ids(self) -> List[str]:
+        """Return all decision ids in ascending order.
+        
+        Only directory entries are listed; no decision file is opened. The
+        listing is reused until the directory's mtime changes.
+        """
+        mtime = os.stat(self.decisions_dir).st_mtime_ns
+        if mtime != self._ids_mtime:
+            ids = []
+            with os.scandir(self.decisions_dir) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if name.startswith('decision_') and name.endswith('.json'):
+                        ids.append(name[:-5])
+            ids.sort()
+            self._ids = ids
+            self._ids_mtime = mtime
+        return self._ids
+    
+    @staticmethod
+    def _make_header(decision: Dict) -> Dict:
+        """Extract the cached header fields from a full decision."""
+        return {field: decision.get(field) for field in HEADER_FIELDS}
+    
+    def _get_header(self, decision_id: str) -> Optional[Dict]:
+        """Get a decision header, reading the file only on a cache miss."""
+        headers = self._load_header_cache()
+        decision_file = self.decisions_dir / f"{decision_id}.json"
+        try:
+            mtime = os.stat(decision_file).st_mtime_ns
+        except FileNotFoundError:
+            headers.pop(decision_id, None)
+            return None
+        
+        cached = headers.get(decision_id)
+        # Entries cached before a field was added are reread like misses
+        if cached is not None and cached.get('mtime') == mtime and all(field in cached for field in HEADER_FIELDS):
+            return {field: cached.get(field) for field in HEADER_FIELDS}
+        
+        with open(decision_file) as f:
+            header = self._make_header(json.load(f))
+        headers[decision_id] = dict(header, mtime=mtime)
+        self._headers_dirty = True
+        return header
+    
+    def _page_ids(self, after: Optional[str], limit: Optional[int]) -> List[str]:
+        """Select the ids of one page, newest first, strictly after the cursor."""
+        ids = self._decision_ids()
+        end = len(ids) if after is None else bisect.bisect_left(ids, after)
+        start = 0 if not limit else max(0, end - limit)
+        return ids[start:end][::-1]
 
     def record_decision(self, title: str, description: str, context: Optional[Dict] = None) -> str:
         """Record a new decision."""
@@ -25,6 +121,7 @@ class DecisionTracker:
             "description": description,
             "context": context or {},
             "timestamp": datetime.now().isoformat(),
+            "status": "proposed",
             "project": self.project_name
         }
         
@@ -32,6 +129,13 @@ class DecisionTracker:
         with open(decision_file, 'w') as f:
             json.dump(decision, f, indent=2)
         
+        # Keep the header cache warm so the next listing does not reread it
+        headers = self._load_header_cache()
+        headers[decision_id] = dict(self._make_header(decision),
+                                    mtime=os.stat(decision_file).st_mtime_ns)
+        self._headers_dirty = True
+        self._save_header_cache()
+        
         return decision_id
 
     def get_decision(self, decision_id: str) -> Optional[Dict]:
@@ -42,15 +146,38 @@ class DecisionTracker:
                 return json.load(f)
         return None
 
-    def list_decisions(self, limit: Optional[int] = None) -> List[Dict]:
-        """List all decisions, optionally limited to a specific number."""
+    def list_decisions(self, limit: Optional[int] = None, after: Optional[str] = None) -> List[Dict]:
+        """List decisions newest first, optionally limited and starting after a cursor id."""
         decisions = []
-        for decision_file in sorted(self.decisions_dir.glob("decision_*.json"), reverse=True):
-            with open(decision_file) as f:
-                decisions.append(json.load(f))
-            if limit and len(decisions) >= limit:
-                break
+        for decision_id in self._page_ids(after, limit):
+            decision = self.get_decision(decision_id)
+            if decision is not None:
+                decisions.append(decision)
         return decisions
+    
+    def list_headers(self, after: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """List decision headers (id, title, description, timestamp, status) newest first.
+        
+        Pass the id of the last header of a page as ``after`` to get the next
+        page. Only the files of the requested page are consulted, and only
+        when they are missing from the header cache.
+        """
+        headers = []
+        for decision_id in self._page_ids(after, limit):
+            header = self._get_header(decision_id)
+            if header is not None:
+                headers.append(header)
+        self._save_header_cache()
+        return headers
+    
+    def iter_header_pages(self, page_size: int = 20, after: Optional[str] = None) -> Iterator[List[Dict]]:
+        """Lazily yield pages of decision headers, newest first."""
+        while True:
+            page = self.list_headers(after=after, limit=page_size)
+            if not page:
+                return
+            yield page
+            after = page[-1]['id']
 
     def search_decisions(self, query: str) -> List[Dict]:
         """Search decisions by title or description."""
@@ -81,6 +208,8 @@ def main():
     # List command
     list_parser = subparsers.add_parser('list', help='List decisions')
     list_parser.add_argument('--limit', type=int, help='Limit number of decisions')
+    list_parser.add_argument('--after', help='Start listing after this decision ID')
+    list_parser.add_argument('--page-size', type=int, default=20, help='Decisions per page')
     
     # Search command
     search_parser = subparsers.add_parser('search', help='Search decisions')
@@ -94,12 +223,23 @@ def main():
         print(f"Decision recorded with ID: {decision_id}")
     
     elif args.command == 'list':
-        decisions = tracker.list_decisions(args.limit)
-        for decision in decisions:
-            print(f"\nDecision: {decision['id']}")
-            print(f"Title: {decision['title']}")
-            print(f"Description: {decision['description']}")
-            print(f"Timestamp: {decision['timestamp']}")
+        interactive = sys.stdin.isatty() and sys.stdout.isatty()
+        remaining = args.limit
+        for page in tracker.iter_header_pages(args.page_size, args.after):
+            if remaining is not None:
+                page = page[:remaining]
+                remaining -= len(page)
+            for header in page:
+                print(f"\nDecision: {header['id']}")
+                print(f"Title: {header['title']}")
+                print(f"Description: {header['description']}")
+                print(f"Status: {header['status'] or 'unknown'}")
+                print(f"Timestamp: {header['timestamp']}")
+            if remaining is not None and remaining <= 0:
+                break
+            if interactive and len(page) == args.page_size:
+                if input("\n-- More (Enter to continue, q to quit) -- ").strip().lower() == 'q':
+                    break
     
     elif args.command == 'search':
         decisions = tracker.search_decisions(args.query)
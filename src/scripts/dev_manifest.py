@@ -0,0 +1,147 @@
+import os
+import stat
+import time
+import logging
+from fnmatch import fnmatch
+from typing import Dict, Iterable, List, Set, Tuple
+
+from .day_sealer import SEAL_MANIFEST, load_manifest
+from .file_attributes import READ_ONLY_MODE, BulkResult, apply_attributes, is_immutable
+
+logger = logging.getLogger(__name__)
+
+# Mode given to sealed files while dev mode is on
+DEV_MODE = stat.S_IREAD | stat.S_IWRITE | stat.S_IRGRP | stat.S_IWGRP
+
+# Working state that must stay writable and is never sealed
+MUTABLE_DIRS = {'logs', 'analytics'}
+MUTABLE_FILES = ('permissions.db*', '*.tmp', '.header_cache.json', '.decisions_headers.json', '.seal_manifest.json')
+
+# Where archived records go, inside the directory they were archived from
+ARCHIVE_DIR = 'archive'
+
+def _is_mutable(name: str) -> bool:
+    """Check whether a file name matches the working state patterns."""
+    return any(fnmatch(name, pattern) for pattern in MUTABLE_FILES)
+
+class DevModeManifest:
+    """Enter and leave dev mode on a directory tree in O(changed) time.
+
+    Entering dev mode records which files were sealed (their mode and
+    immutable flag) and a listing of every directory in a RoleStore before
+    unsealing those files; both come from the seal manifests wherever a
+    directory has a complete one. Leaving restores exactly the recorded
+    files and seals files created during the session, found by listing
+    only the directories whose mtime changed. The manifest lives in the store, so a
+    session can be ended by a different process than the one that began it.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def is_active(self, root: str) -> bool:
+        """Check whether a dev mode session is active on ``root``."""
+        return self.store.dev_session_started(os.path.abspath(root)) is not None
+
+    def enter(self, root: str, exclude: Iterable[str] = ()) -> BulkResult:
+        """Unseal the sealed files under ``root`` and record the manifest.
+
+        Sealed files are taken from the seal manifests of completed
+        directories, so those are neither listed nor probed; only
+        directories without a complete manifest (the kind and current day
+        directories, and trees sealed before manifests existed) are
+        scanned for read-only files.
+        """
+        root = os.path.abspath(root)
+        if self.is_active(root):
+            logger.info(f"Dev mode already active on {root}")
+            return BulkResult()
+        excluded = {os.path.abspath(path) for path in exclude}
+
+        sealed: List[Tuple[str, int, bool]] = []
+        dirs: List[Tuple[str, int, List[str]]] = []
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+                manifest = load_manifest(directory)
+                if manifest.get('complete'):
+                    names = list(manifest['files'])
+                    sealed.extend((path, READ_ONLY_MODE, True) for path in
+                                  (os.path.join(directory, name) for name in names) if path not in excluded)
+                    # Archives are the only directories made inside completed ones
+                    archive = os.path.join(directory, ARCHIVE_DIR)
+                    if os.path.isdir(archive):
+                        stack.append(archive)
+                        names.append(ARCHIVE_DIR)
+                    dirs.append((directory, mtime, names + [SEAL_MANIFEST]))
+                    continue
+                with os.scandir(directory) as entries:
+                    entries = list(entries)
+            except OSError as e:
+                logger.warning(f"Could not list {directory}: {str(e)}")
+                continue
+            dirs.append((directory, mtime, [entry.name for entry in entries]))
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in MUTABLE_DIRS:
+                        stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False) and entry.path not in excluded:
+                    mode = entry.stat(follow_symlinks=False).st_mode
+                    if not mode & stat.S_IWUSR:
+                        sealed.append((entry.path, stat.S_IMODE(mode), is_immutable(entry.path)))
+
+        # Record the manifest first so an interrupted unseal can still be undone
+        self.store.begin_dev_session(root, time.time(), sealed, dirs)
+        result = apply_attributes((path, False, DEV_MODE) for path, _, _ in sealed)
+        # Files deleted without their seal manifest being updated have nothing to unseal
+        for path in [path for path in result.failures if not os.path.lexists(path)]:
+            del result.failures[path]
+        logger.info(f"Dev mode entered on {root}: unsealed {result.succeeded} of {len(sealed)} files")
+        return result
+
+    def exit(self, root: str) -> BulkResult:
+        """Re-seal the recorded files and files created during the session."""
+        root = os.path.abspath(root)
+        if not self.is_active(root):
+            logger.info(f"No dev mode session on {root}")
+            return BulkResult()
+
+        items = [(path, immutable, mode) for path, mode, immutable in self.store.dev_files(root)]
+        items.extend((path, True, None) for path in self._created_files(self.store.dev_dirs(root)))
+        result = apply_attributes(items)
+
+        # Files deleted during the session have nothing left to seal
+        for path in [path for path in result.failures if not os.path.lexists(path)]:
+            del result.failures[path]
+        self.store.end_dev_session(root)
+        logger.info(f"Dev mode left on {root}: sealed {result.succeeded} files")
+        return result
+
+    def _created_files(self, dirs: Dict[str, Tuple[int, Set[str]]]) -> List[str]:
+        """Find files created in the recorded directories since entering dev mode."""
+        created: List[str] = []
+        for directory, (mtime, names) in dirs.items():
+            try:
+                if os.stat(directory).st_mtime_ns == mtime:
+                    continue
+                with os.scandir(directory) as entries:
+                    entries = [entry for entry in entries if entry.name not in names]
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in MUTABLE_DIRS:
+                        created.extend(self._walk_files(entry.path))
+                elif entry.is_file(follow_symlinks=False) and not _is_mutable(entry.name):
+                    created.append(entry.path)
+        return created
+
+    def _walk_files(self, directory: str) -> List[str]:
+        """List the files in a directory created during the session."""
+        files: List[str] = []
+        for current, subdirs, names in os.walk(directory):
+            subdirs[:] = [name for name in subdirs if name not in MUTABLE_DIRS]
+            files.extend(os.path.join(current, name) for name in names if not _is_mutable(name))
+        return files
@@ -0,0 +1,194 @@
+import os
+import sys
+import stat
+import errno
+import struct
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Linux inode flag ioctls (see linux/fs.h); the flags word is an int
+FS_IOC_GETFLAGS = 0x80086601
+FS_IOC_SETFLAGS = 0x40086602
+FS_IMMUTABLE_FL = 0x00000010
+
+# Errors meaning the filesystem or caller cannot use inode flags at all
+UNSUPPORTED_ERRNOS = {errno.ENOTTY, errno.EOPNOTSUPP, errno.ENOSYS, errno.EINVAL, errno.EPERM, errno.EACCES}
+
+READ_ONLY_MODE = stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH
+
+# Files handled per task when running on a thread pool
+CHUNK_SIZE = 256
+
+@dataclass
+class BulkResult:
+    """Aggregate outcome of a bulk attribute change."""
+    succeeded: int = 0
+    methods: Dict[str, int] = field(default_factory=dict)
+    failures: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def failed(self) -> int:
+        return len(self.failures)
+
+    def merge(self, other: 'BulkResult'):
+        """Fold another result into this one."""
+        self.succeeded += other.succeeded
+        for method, count in other.methods.items():
+            self.methods[method] = self.methods.get(method, 0) + count
+        self.failures.update(other.failures)
+
+def _apply_linux(file_path: str, immutable: bool, mode: Optional[int]) -> str:
+    """Apply mode and immutable flag through one file descriptor.
+    
+    Falls back to plain chmod when the inode flags ioctls are unsupported
+    by the filesystem or not permitted for this process. Symbolic links are
+    never followed: they raise, so bulk callers report them as failures.
+    """
+    try:
+        fd = os.open(file_path, os.O_RDONLY | os.O_NONBLOCK | getattr(os, 'O_NOFOLLOW', 0))
+    except OSError as e:
+        if e.errno == errno.ELOOP:
+            raise _symlink_error(file_path)
+        if e.errno != errno.EACCES:
+            raise
+        # Unreadable, so no descriptor; chmod follows links (Linux has no lchmod)
+        if stat.S_ISLNK(os.lstat(file_path).st_mode):
+            raise _symlink_error(file_path)
+        if mode is not None:
+            os.chmod(file_path, mode)
+        return 'chmod'
+    try:
+        try:
+            flags = struct.unpack('i', fcntl.ioctl(fd, FS_IOC_GETFLAGS, struct.pack('i', 0)))[0]
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRNOS:
+                raise
+            flags = None
+        
+        # The flag blocks mode changes, so clear it before chmod
+        if flags is not None and flags & FS_IMMUTABLE_FL and (mode is not None or not immutable):
+            flags = _set_flags(fd, flags & ~FS_IMMUTABLE_FL)
+        if mode is not None:
+            os.fchmod(fd, mode)
+        if flags is not None and immutable and not flags & FS_IMMUTABLE_FL:
+            flags = _set_flags(fd, flags | FS_IMMUTABLE_FL)
+        return 'chmod' if flags is None or (immutable and not flags & FS_IMMUTABLE_FL) else 'ioctl'
+    finally:
+        os.close(fd)
+
+def _symlink_error(file_path: str) -> OSError:
+    return OSError(errno.ELOOP, 'Symbolic link not followed', file_path)
+
+def _set_flags(fd: int, flags: int) -> Optional[int]:
+    """Set inode flags, returning them, or None if not permitted."""
+    try:
+        fcntl.ioctl(fd, FS_IOC_SETFLAGS, struct.pack('i', flags))
+        return flags
+    except OSError as e:
+        if e.errno in UNSUPPORTED_ERRNOS:
+            return None
+        raise
+
+def _apply_bsd(file_path: str, immutable: bool, mode: Optional[int]) -> str:
+    """Apply mode and the user immutable flag with chflags."""
+    st = os.lstat(file_path)
+    if stat.S_ISLNK(st.st_mode):
+        raise _symlink_error(file_path)
+    flags = st.st_flags
+    supported = True
+    if flags & stat.UF_IMMUTABLE:
+        os.chflags(file_path, flags & ~stat.UF_IMMUTABLE)
+    if mode is not None:
+        os.chmod(file_path, mode)
+    if immutable:
+        try:
+            os.chflags(file_path, flags | stat.UF_IMMUTABLE)
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRNOS:
+                raise
+            supported = False
+    return 'chflags' if supported else 'chmod'
+
+def set_immutable(file_path: str, immutable: bool = True, mode: Optional[int] = None) -> str:
+    """Set or clear a file's immutable flag in-process.
+    
+    Uses the FS_IOC_GETFLAGS/FS_IOC_SETFLAGS ioctls on Linux and chflags on
+    macOS/BSD. When the flag cannot be used (unsupported filesystem, missing
+    privilege, Windows) only the permission bits are changed. ``mode``
+    defaults to read-only when sealing and is left alone when unsealing.
+    
+    Returns the method that took effect: 'ioctl', 'chflags' or 'chmod'.
+    """
+    if mode is None and immutable:
+        mode = READ_ONLY_MODE
+    if sys.platform.startswith('linux') and fcntl is not None:
+        return _apply_linux(file_path, immutable, mode)
+    if hasattr(os, 'chflags') and hasattr(stat, 'UF_IMMUTABLE'):
+        return _apply_bsd(file_path, immutable, mode)
+    if mode is not None:
+        os.chmod(file_path, mode)
+    return 'chmod'
+
+def is_immutable(file_path: str) -> bool:
+    """Check whether a file has its immutable flag set."""
+    try:
+        if sys.platform.startswith('linux') and fcntl is not None:
+            fd = os.open(file_path, os.O_RDONLY | os.O_NONBLOCK | getattr(os, 'O_NOFOLLOW', 0))
+            try:
+                flags = struct.unpack('i', fcntl.ioctl(fd, FS_IOC_GETFLAGS, struct.pack('i', 0)))[0]
+            finally:
+                os.close(fd)
+            return bool(flags & FS_IMMUTABLE_FL)
+        if hasattr(stat, 'UF_IMMUTABLE'):
+            return bool(getattr(os.lstat(file_path), 'st_flags', 0) & stat.UF_IMMUTABLE)
+    except OSError:
+        pass
+    return False
+
+def _apply_chunk(items: List[Tuple[str, bool, Optional[int]]]) -> BulkResult:
+    """Apply attribute changes to one chunk of (path, immutable, mode) items."""
+    result = BulkResult()
+    for path, immutable, mode in items:
+        try:
+            method = set_immutable(path, immutable, mode)
+            result.succeeded += 1
+            result.methods[method] = result.methods.get(method, 0) + 1
+        except Exception as e:
+            result.failures[path] = str(e)
+    return result
+
+def apply_attributes(items: Iterable[Tuple[str, bool, Optional[int]]],
+                     max_workers: Optional[int] = None) -> BulkResult:
+    """Apply per-file (path, immutable, mode) changes using a thread pool.
+
+    Per-file errors do not stop the batch; they are collected in the
+    returned BulkResult.
+    """
+    items = list(items)
+    chunks = [items[i:i + CHUNK_SIZE] for i in range(0, len(items), CHUNK_SIZE)]
+    result = BulkResult()
+    if len(chunks) <= 1:
+        for chunk in chunks:
+            result.merge(_apply_chunk(chunk))
+    else:
+        workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for chunk_result in executor.map(_apply_chunk, chunks):
+                result.merge(chunk_result)
+    if result.failures:
+        logger.warning(f"Could not update {result.failed} of {len(items)} files")
+    return result
+
+def apply_immutable(file_paths: Iterable[str], immutable: bool = True, mode: Optional[int] = None,
+                    max_workers: Optional[int] = None) -> BulkResult:
+    """Set or clear the immutable flag on many files using a thread pool."""
+    return apply_attributes(((path, immutable, mode) for path in file_paths), max_workers)
@@ -3,80 +3,273 @@ import time
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional, List, Any
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, List, Any, Tuple
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler, FileModifiedEvent, FileCreatedEvent, FileDeletedEvent
 import logging
 import hashlib
 from .record_format import RecordFormat
+from .git_index import GitChangeDetector, GitIndexError
+
+# Files at least this large are not hashed on the event thread
+LARGE_FILE_SIZE = 16 * 1024 * 1024
+
+# (dev, ino, mtime_ns, size) identifying unchanged file content
+StatKey = Tuple[int, int, int, int]
+
+def _stat_key(st: os.stat_result) -> StatKey:
+    return (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+# Length of the random suffix of mkstemp-style temporary names (.a.txt.XXXXXX)
+TEMP_SUFFIX_LENGTH = 6
+
+def _is_temp_for(src_path: str, dest_path: str) -> bool:
+    """Whether ``src_path`` is named like an editor's temporary copy of ``dest_path``
+    (.a.txt.swp, a.txt~, .#a.txt, a.txt.tmp or .a.txt.tmp, .a.txt.XXXXXX) in the same directory."""
+    src_dir, src_name = os.path.split(src_path)
+    dest_dir, name = os.path.split(dest_path)
+    if src_dir != dest_dir:
+        return False
+    if src_name in (f'.{name}.swp', f'{name}~', f'.#{name}', f'{name}.tmp', f'.{name}.tmp'):
+        return True
+    suffix = src_name[len(name) + 2:] if src_name.startswith(f'.{name}.') else ''
+    return len(suffix) == TEMP_SUFFIX_LENGTH and suffix.isalnum()
 
 class FileChangeHandler(FileSystemEventHandler):
-    def __init__(self, callback):
+    """Turns watcher events into file change records.
+
+    Content hashes are cached by path and stat data, so a file is only
+    rehashed when it changed. Renames are recorded as one ``moved`` record
+    that carries the cached hash over, and an editor's atomic save (write a
+    temporary file, rename it over the original) as a modification of the
+    original. A delete is held for ``move_window`` seconds so that a create
+    of the same inode or content (where the platform reports a move as a
+    delete and a create) is recorded as a move instead.
+    """
+
+    HASH_CACHE_SIZE = 10000
+
+    def __init__(self, callback, move_window: float = 0.5):
         self.callback = callback
+        self.move_window = move_window
         self.logger = logging.getLogger('file_watcher')
+        self._hashes: 'OrderedDict[str, Tuple[StatKey, str]]' = OrderedDict()
+        # path -> (deadline, stat key, hash) of deletes that may be half of a move
+        self._pending_deletes: 'OrderedDict[str, Tuple[float, Optional[StatKey], str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
 
-    def _get_file_hash(self, file_path: str) -> str:
-        """Calculate SHA-256 hash of file contents."""
+    def _get_file_hash(self, file_path: str, st: Optional[os.stat_result] = None) -> str:
+        """Calculate SHA-256 hash of file contents, reusing the cached hash if the file is unchanged."""
         try:
+            st = st or os.stat(file_path)
+            key = _stat_key(st)
+            with self._lock:
+                cached = self._hashes.get(file_path)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+            digest = hashlib.sha256()
             with open(file_path, 'rb') as f:
-                return hashlib.sha256(f.read()).hexdigest()
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            self._cache_hash(file_path, key, digest.hexdigest())
+            return digest.hexdigest()
         except Exception as e:
             self.logger.error(f"Error calculating file hash: {e}")
             return ""
 
-    def _get_file_info(self, file_path: str) -> Dict[str, Any]:
+    def _event_hash(self, file_path: str, st: os.stat_result) -> str:
+        """The hash for an event's record. Large files are not read on the event thread,
+        so they only get a hash already cached."""
+        if st.st_size < LARGE_FILE_SIZE:
+            return self._get_file_hash(file_path, st)
+        with self._lock:
+            cached = self._hashes.get(file_path)
+        return cached[1] if cached is not None and cached[0] == _stat_key(st) else ''
+
+    def cached_hash(self, file_path: str, st: os.stat_result) -> Optional[str]:
+        """The hash already computed for a file, if its stat data ``st`` still matches it."""
+        with self._lock:
+            cached = self._hashes.get(file_path)
+        return cached[1] if cached is not None and cached[1] and cached[0] == _stat_key(st) else None
+
+    def _cache_hash(self, file_path: str, key: StatKey, file_hash: str):
+        with self._lock:
+            self._hashes[file_path] = (key, file_hash)
+            self._hashes.move_to_end(file_path)
+            while len(self._hashes) > self.HASH_CACHE_SIZE:
+                self._hashes.popitem(last=False)
+
+    def _get_file_info(self, file_path: str, st: Optional[os.stat_result] = None,
+                       file_hash: Optional[str] = None) -> Dict[str, Any]:
         """Get file metadata."""
         try:
-            stat = os.stat(file_path)
+            st = st or os.stat(file_path)
             return {
-                'size': stat.st_size,
-                'created': datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                'hash': self._get_file_hash(file_path)
+                'size': st.st_size,
+                'created': datetime.fromtimestamp(st.st_ctime).isoformat(),
+                'modified': datetime.fromtimestamp(st.st_mtime).isoformat(),
+                'hash': self._event_hash(file_path, st) if file_hash is None else file_hash
             }
         except Exception as e:
             self.logger.error(f"Error getting file info: {e}")
             return {}
 
+    def _record(self, change_type: str, file_path: str, files: List[str], description: str,
+                metadata: Optional[Dict] = None, file_info: Optional[Dict] = None):
+        record = RecordFormat.create_record(
+            record_type='file_change',
+            title=f"File {change_type.capitalize()}: {os.path.basename(file_path)}",
+            description=description,
+            files=files,
+            metadata={'change_type': change_type, **(metadata or {})},
+            context={'file_info': file_info} if file_info is not None else None
+        )
+        self.callback(record)
+
     def on_modified(self, event):
         if not event.is_directory:
-            record = RecordFormat.create_record(
-                record_type='file_change',
-                title=f"File Modified: {os.path.basename(event.src_path)}",
-                description=f"File {event.src_path} was modified",
-                files=[event.src_path],
-                metadata={'change_type': 'modified'},
-                context={'file_info': self._get_file_info(event.src_path)}
-            )
-            self.callback(record)
+            self._record('modified', event.src_path, [event.src_path], f"File {event.src_path} was modified",
+                         file_info=self._get_file_info(event.src_path))
 
     def on_created(self, event):
-        if not event.is_directory:
-            record = RecordFormat.create_record(
-                record_type='file_change',
-                title=f"File Created: {os.path.basename(event.src_path)}",
-                description=f"File {event.src_path} was created",
-                files=[event.src_path],
-                metadata={'change_type': 'created'},
-                context={'file_info': self._get_file_info(event.src_path)}
-            )
-            self.callback(record)
+        if event.is_directory:
+            return
+        try:
+            st = os.stat(event.src_path)
+        except OSError:
+            st = None
+        source = self._match_delete(event.src_path, st) if st is not None else None
+        if source is not None:
+            src_path, file_hash = source
+            self._record_move(src_path, event.src_path, st, file_hash, replaced=False)
+            return
+        self._record('created', event.src_path, [event.src_path], f"File {event.src_path} was created",
+                     file_info=self._get_file_info(event.src_path, st) if st is not None else {})
 
     def on_deleted(self, event):
-        if not event.is_directory:
-            record = RecordFormat.create_record(
-                record_type='file_change',
-                title=f"File Deleted: {os.path.basename(event.src_path)}",
-                description=f"File {event.src_path} was deleted",
-                files=[event.src_path],
-                metadata={'change_type': 'deleted'}
-            )
-            self.callback(record)
+        if event.is_directory:
+            self._forget(event.src_path + os.sep)
+            return
+        with self._lock:
+            cached = self._hashes.pop(event.src_path, None)
+        if self.move_window <= 0:
+            self._record_delete(event.src_path)
+            return
+        key, file_hash = cached if cached is not None else (None, '')
+        with self._lock:
+            self._pending_deletes[event.src_path] = (time.monotonic() + self.move_window, key, file_hash)
+        self._schedule_flush()
+
+    def on_moved(self, event):
+        if event.is_directory:
+            # Contents are reported by their own moved events; keep their hashes
+            self._rename_cached(event.src_path + os.sep, event.dest_path + os.sep)
+            return
+        try:
+            st = os.stat(event.dest_path)
+        except OSError:
+            st = None
+        with self._lock:
+            cached = self._hashes.pop(event.src_path, None)
+            self._hashes.pop(event.dest_path, None)
+        # Only an editor's temporary copy renamed over its original is a save; other renames are moves
+        replaced = _is_temp_for(event.src_path, event.dest_path)
+        file_hash = cached[1] if cached is not None and st is not None and cached[0] == _stat_key(st) else None
+        self._record_move(event.src_path, event.dest_path, st, file_hash, replaced)
+
+    def _record_move(self, src_path: str, dest_path: str, st: Optional[os.stat_result], file_hash: Optional[str],
+                     replaced: bool):
+        """Record a rename; the content is only hashed when no hash is known and the file is small.
+
+        ``replaced`` tells that ``src_path`` was a temporary copy of the
+        file at ``dest_path`` it was renamed over.
+        """
+        if st is not None and file_hash is None and st.st_size >= LARGE_FILE_SIZE:
+            file_hash = ''
+        if st is not None and file_hash:
+            self._cache_hash(dest_path, _stat_key(st), file_hash)
+        file_info = self._get_file_info(dest_path, st, file_hash) if st is not None else {}
+        if replaced:
+            # An atomic save: the original was replaced by the new content
+            self._record('modified', dest_path, [dest_path], f"File {dest_path} was modified",
+                         {'replaced_by': src_path}, file_info)
+        else:
+            self._record('moved', dest_path, [src_path, dest_path], f"File {src_path} was moved to {dest_path}",
+                         {'src_path': src_path, 'dest_path': dest_path}, file_info)
+
+    def _record_delete(self, file_path: str):
+        self._record('deleted', file_path, [file_path], f"File {file_path} was deleted")
+
+    def _match_delete(self, file_path: str, st: os.stat_result) -> Optional[Tuple[str, Optional[str]]]:
+        """Find a pending delete of the same inode, or else the same content."""
+        key = _stat_key(st)
+        with self._lock:
+            if not self._pending_deletes:
+                return None
+            candidates = list(self._pending_deletes.items())
+        for src_path, (_, old_key, file_hash) in candidates:
+            if old_key is not None and old_key[:2] == key[:2] and old_key[3] == key[3]:
+                return self._claim_delete(src_path, file_hash if old_key == key else None)
+        same_size = [(p, h) for p, (_, k, h) in candidates if h and k is not None and k[3] == st.st_size]
+        if same_size and st.st_size < LARGE_FILE_SIZE:
+            file_hash = self._get_file_hash(file_path, st)
+            for src_path, old_hash in same_size:
+                if old_hash == file_hash:
+                    return self._claim_delete(src_path, file_hash)
+        return None
+
+    def _claim_delete(self, src_path: str, file_hash: Optional[str]) -> Optional[Tuple[str, Optional[str]]]:
+        with self._lock:
+            if self._pending_deletes.pop(src_path, None) is None:
+                return None  # Already flushed as a delete
+        return src_path, file_hash
+
+    def _schedule_flush(self):
+        with self._lock:
+            if self._timer is not None or not self._pending_deletes:
+                return
+            delay = max(0.0, next(iter(self._pending_deletes.values()))[0] - time.monotonic())
+            self._timer = threading.Timer(delay, self.flush_deletes)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush_deletes(self, force: bool = False):
+        """Record the deletes whose move window has passed (all of them with ``force``)."""
+        now = time.monotonic()
+        with self._lock:
+            self._timer = None
+            expired = [path for path, (deadline, _, _) in self._pending_deletes.items()
+                       if force or deadline <= now]
+            for path in expired:
+                del self._pending_deletes[path]
+        for path in expired:
+            self._record_delete(path)
+        self._schedule_flush()
+
+    def _forget(self, prefix: str):
+        with self._lock:
+            for path in [p for p in self._hashes if p.startswith(prefix)]:
+                del self._hashes[path]
+
+    def _rename_cached(self, src_prefix: str, dest_prefix: str):
+        with self._lock:
+            for path in [p for p in self._hashes if p.startswith(src_prefix)]:
+                self._hashes[dest_prefix + path[len(src_prefix):]] = self._hashes.pop(path)
 
 class FileWatcher:
-    def __init__(self, paths=None, ignore_patterns=None, enable_ai_features=True):
-        """Initialize the file watcher with paths and ignore patterns."""
-        self.paths = paths or ['.']  # Default to current directory if no paths provided
+    def __init__(self, paths=None, ignore_patterns=None, enable_ai_features=True, service=None, backups=None):
+        """Initialize the file watcher with paths and ignore patterns.
+        
+        With a ``service`` (see watch_service), events come from its shared
+        observer instead of an observer of this watcher's own. With
+        ``backups`` (a running backup_workers.BackupPool), created and
+        modified files are queued for backup.
+        """
+        # Default to current directory if no paths provided
+        self.paths = [Path(path) for path in (paths or ['.'])]
         self.ignore_patterns = ignore_patterns or [
             '*.code-workspace',
             '*.sublime-*',
@@ -86,58 +279,61 @@ class FileWatcher:
             '*.pyc'
         ]
         self.enable_ai_features = enable_ai_features
+        self.backups = backups
         self.logger = logging.getLogger('track_change')
         
         # Setup logging
         self.logger.setLevel(logging.INFO)
         
         # Initialize observer
-        self.observer = Observer()
+        self.service = service
+        self.observer = Observer() if service is None else None
         self.changes = []
         self.change_history = []
+        self._git_detectors: Dict[Path, Optional[GitChangeDetector]] = {}
+        self._git_dirty: Dict[Path, Dict] = {}
         
         # Setup event handler
         self.event_handler = FileChangeHandler(self._handle_change)
         
         # Start watching paths
-        for path in self.paths:
+        for path in self.paths if service is None else []:
             if path.exists():
                 self.observer.schedule(self.event_handler, str(path), recursive=True)
                 self.logger.info(f"Watching path: {path}")
             else:
                 self.logger.warning(f"Path does not exist: {path}")
 
-    def _handle_change(self, file_path, change_type):
-        """Handle a file change event."""
+    def subscribe(self, callback):
+        """Deliver change records of files not ignored to ``callback`` (on the observer thread)."""
+        def deliver(record):
+            # A move is kept unless both of its ends are ignored
+            if not all(self._should_ignore(path) for path in record['files']):
+                self._queue_backup(record)
+                callback(record)
+        self.event_handler.callback = deliver
+
+    def _handle_change(self, record):
+        """Keep a change record when no subscriber takes them."""
         try:
-            # Create metadata for the change
-            metadata = {
-                'timestamp': datetime.now().isoformat(),
-                'change_type': change_type,
-                'file_path': file_path
-            }
-            
-            # Add AI-specific metadata if enabled
             if self.enable_ai_features:
-                metadata['ai_enabled'] = True
-                metadata['ide_info'] = self._detect_ide()
-            
-            # Create backup of the file
-            create_backup(file_path, PROJECT_NAME)
-            
-            # Record the change
-            record = {
-                'file': file_path,
-                'type': change_type,
-                'metadata': metadata
-            }
-            
-            return record
-            
+                record['metadata']['ai_enabled'] = True
+                record['metadata']['ide_info'] = self._detect_ide()
+            self._queue_backup(record)
+            self.changes.append(record)
+            self.change_history.append(record)
         except Exception as e:
             self.logger.error(f"Error handling file change: {str(e)}", exc_info=True)
             raise
 
+    def _queue_backup(self, record):
+        """Queue a backup of a created or modified file; moves keep their content."""
+        if self.backups is None or record['metadata'].get('change_type') not in ('created', 'modified'):
+            return
+        file_path = record['files'][-1]
+        if not self._should_ignore(file_path):
+            self.backups.submit(file_path)
+
     def _detect_ide(self):
         """Detect the current IDE environment."""
         # Check for common IDE-specific files and environment variables
@@ -154,22 +350,92 @@ class FileWatcher:
         from fnmatch import fnmatch
         return any(fnmatch(file_path, pattern) for pattern in self.ignore_patterns)
 
-    def watch(self):
-        """Watch for file changes in the specified paths."""
+    def scan(self, baseline: bool = True) -> List:
+        """Find the files changed since the last scan and dispatch them like watcher events.
+
+        Paths inside a git worktree are checked against the git index (see
+        git_index). That lstats every tracked file, so the cost grows with
+        the size of the tree even when little changed, but only the
+        directories and files that changed are read. Other paths are
+        walked. The first scan only records a baseline; with ``baseline``
+        False it reports every file that already differs from the git index
+        instead (walked paths have nothing to compare with and report none).
+        """
+        events = []
         try:
             for path in self.paths:
-                if os.path.exists(path):
-                    for root, _, files in os.walk(path):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            if not self._should_ignore(file_path):
-                                # Check if file has been modified
-                                if self._is_modified(file_path):
-                                    self._handle_change(file_path, 'modified')
+                if not path.exists():
+                    continue
+                detector = self._git_detector(path)
+                if detector is None:
+                    events.extend(self._walk_changes(path))
+                    continue
+                try:
+                    events.extend(self._git_changes(path, detector, baseline))
+                except (OSError, GitIndexError) as e:
+                    self.logger.warning(f"Cannot use git index for {path}, walking instead: {e}")
+                    self._git_detectors[path] = None
+                    events.extend(self._walk_changes(path))
+            for event in events:
+                self.event_handler.dispatch(event)
+            return events
         except Exception as e:
-            self.logger.error(f"Error watching files: {str(e)}", exc_info=True)
+            self.logger.error(f"Error scanning files: {str(e)}", exc_info=True)
             raise
 
+    def _git_detector(self, path: Path) -> Optional[GitChangeDetector]:
+        if path not in self._git_detectors:
+            self._git_detectors[path] = GitChangeDetector.for_path(str(path))
+        return self._git_detectors[path]
+
+    def _git_changes(self, path: Path, detector: GitChangeDetector, baseline: bool = True) -> List:
+        """Events for paths whose git status or signature changed since the last scan."""
+        prefix = os.path.join(os.path.realpath(path), '')
+        dirty = {p: change for p, change in detector.changes().items()
+                 if p.startswith(prefix) and not self._should_ignore(p)}
+        previous = self._git_dirty.get(path)
+        self._git_dirty[path] = dirty
+        if previous is None:
+            if baseline:
+                return []
+            previous = {}
+        events = []
+        for file_path, (status, signature) in dirty.items():
+            before = previous.get(file_path)
+            if before == (status, signature):
+                continue
+            if status == 'deleted':
+                events.append(FileDeletedEvent(file_path))
+            elif status == 'untracked' and before is None:
+                events.append(FileCreatedEvent(file_path))
+            else:
+                events.append(FileModifiedEvent(file_path))
+        for file_path, (status, signature) in previous.items():
+            if file_path in dirty:
+                continue
+            # Clean again: reverted, or committed or deleted while untracked
+            try:
+                st = os.lstat(file_path)
+            except OSError:
+                if signature is not None:
+                    events.append(FileDeletedEvent(file_path))
+                continue
+            if signature != (st.st_mtime_ns, st.st_size):
+                events.append(FileCreatedEvent(file_path) if signature is None else FileModifiedEvent(file_path))
+        return events
+
+    def _walk_changes(self, path: Path) -> List:
+        """Events for files modified since the last walk."""
+        events = []
+        for root, _, files in os.walk(path):
+            for file in files:
+                file_path = os.path.join(root, file)
+                if not self._should_ignore(file_path):
+                    # Check if file has been modified
+                    if self._is_modified(file_path):
+                        events.append(FileModifiedEvent(file_path))
+        return events
+
     def _is_modified(self, file_path):
         """Check if a file has been modified since last check."""
         try:
@@ -193,13 +459,20 @@ class FileWatcher:
 
     def start(self) -> None:
         """Start watching for changes."""
-        self.observer.start()
+        if self.service is not None:
+            self.service.subscribe(id(self), self.paths, self.event_handler)
+        else:
+            self.observer.start()
         self.logger.info("File watcher started")
 
     def stop(self) -> None:
         """Stop watching for changes."""
-        self.observer.stop()
-        self.observer.join()
+        if self.service is not None:
+            self.service.unsubscribe(id(self))
+        else:
+            self.observer.stop()
+            self.observer.join()
+        self.event_handler.flush_deletes(force=True)
         self.logger.info("File watcher stopped")
 
     def get_changes(self) -> List[Dict]:
@@ -230,4 +503,6 @@ class FileWatcher:
 
     def is_watching(self) -> bool:
         """Check if the watcher is active."""
+        if self.service is not None:
+            return any(self.event_handler in self.service.owners(str(path)) for path in self.paths)
         return self.observer.is_alive() 
\ No newline at end of file
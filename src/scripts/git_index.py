@@ -0,0 +1,508 @@
+import os
+import stat
+import struct
+import hashlib
+import logging
+from fnmatch import fnmatch
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Entry flags
+FLAG_ASSUME_VALID = 0x8000
+FLAG_EXTENDED = 0x4000
+FLAG_STAGE_MASK = 0x3000
+FLAG_NAME_MASK = 0x0fff
+EXT_FLAG_SKIP_WORKTREE = 0x4000
+EXT_FLAG_INTENT_TO_ADD = 0x2000
+
+_ENTRY = struct.Struct('>10I')
+_STAT_DATA = struct.Struct('>9I')  # ctime s/ns, mtime s/ns, dev, ino, uid, gid, size
+
+# (mtime_ns, size) of a dirty path, or None when it is gone
+Signature = Optional[Tuple[int, int]]
+
+class GitIndexError(Exception):
+    """The index cannot be read, or uses a feature not supported here."""
+
+class IndexEntry(NamedTuple):
+    path: str
+    ctime: Tuple[int, int]
+    mtime: Tuple[int, int]
+    ino: int
+    mode: int
+    uid: int
+    gid: int
+    size: int
+    oid: bytes
+    flags: int
+    ext_flags: int
+
+    @property
+    def stage(self) -> int:
+        return (self.flags & FLAG_STAGE_MASK) >> 12
+
+    @property
+    def assume_unchanged(self) -> bool:
+        return bool(self.flags & FLAG_ASSUME_VALID or self.ext_flags & EXT_FLAG_SKIP_WORKTREE)
+
+class UntrackedDir:
+    """A directory of the untracked cache (the index's UNTR extension)."""
+    __slots__ = ('name', 'untracked', 'dirs', 'stat', 'check_only')
+
+    def __init__(self, name: str, untracked: List[str]):
+        self.name = name
+        self.untracked = untracked
+        self.dirs: List['UntrackedDir'] = []
+        self.stat: Optional[Tuple[int, ...]] = None
+        self.check_only = False
+
+class UntrackedCache(NamedTuple):
+    ident: str
+    info_exclude: Tuple[int, ...]
+    excludes_file: Tuple[int, ...]
+    dir_flags: int
+    exclude_per_dir: str
+    root: Optional[UntrackedDir]
+
+class GitIndex(NamedTuple):
+    version: int
+    entries: List[IndexEntry]
+    untracked: Optional[UntrackedCache]
+    mtime: Tuple[int, int]
+
+def _varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Decode git's offset varint (varint.c), returning the value and the next position."""
+    c = data[pos]
+    pos += 1
+    value = c & 0x7f
+    while c & 0x80:
+        c = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (c & 0x7f)
+    return value, pos
+
+def _cstring(data: bytes, pos: int) -> Tuple[bytes, int]:
+    end = data.index(b'\0', pos)
+    return data[pos:end], end + 1
+
+def _ewah_bits(data: bytes, pos: int) -> Tuple[List[int], int]:
+    """Decode an EWAH compressed bitmap, returning the set bit positions and the next position."""
+    bit_size, word_count = struct.unpack_from('>II', data, pos)
+    words = struct.unpack_from(f'>{word_count}Q', data, pos + 8)
+    pos += 12 + 8 * word_count
+    bits = []
+    word_pos = 0
+    i = 0
+    while i < word_count:
+        rlw = words[i]
+        running_bit, running_len, literals = rlw & 1, (rlw >> 1) & 0xffffffff, rlw >> 33
+        if running_bit:
+            bits.extend(range(word_pos * 64, (word_pos + running_len) * 64))
+        word_pos += running_len
+        for word in words[i + 1:i + 1 + literals]:
+            while word:
+                low = word & -word
+                bits.append(word_pos * 64 + low.bit_length() - 1)
+                word ^= low
+            word_pos += 1
+        i += 1 + literals
+    return [bit for bit in bits if bit < bit_size], pos
+
+def _read_untracked(data: bytes, hash_size: int) -> UntrackedCache:
+    """Parse the UNTR extension (see git's dir.c, read_untracked_extension)."""
+    length, pos = _varint(data, 0)
+    ident = data[pos:pos + length].rstrip(b'\0').decode('utf-8', 'replace')
+    pos += length
+    info_exclude = _STAT_DATA.unpack_from(data, pos)
+    excludes_file = _STAT_DATA.unpack_from(data, pos + _STAT_DATA.size)
+    dir_flags, = struct.unpack_from('>I', data, pos + 2 * _STAT_DATA.size)
+    pos += 2 * _STAT_DATA.size + 4 + 2 * hash_size
+    exclude_per_dir, pos = _cstring(data, pos)
+    dir_count, pos = _varint(data, pos)
+    if not dir_count:
+        return UntrackedCache(ident, info_exclude, excludes_file, dir_flags, os.fsdecode(exclude_per_dir), None)
+
+    # Directories are stored depth first; the bitmaps below index this order
+    order: List[UntrackedDir] = []
+
+    def read_dir(pos: int) -> Tuple[UntrackedDir, int]:
+        untracked_count, pos = _varint(data, pos)
+        child_count, pos = _varint(data, pos)
+        name, pos = _cstring(data, pos)
+        untracked = []
+        for _ in range(untracked_count):
+            entry, pos = _cstring(data, pos)
+            untracked.append(os.fsdecode(entry))
+        node = UntrackedDir(os.fsdecode(name).rstrip('/'), untracked)
+        order.append(node)
+        for _ in range(child_count):
+            child, pos = read_dir(pos)
+            node.dirs.append(child)
+        return node, pos
+
+    root, pos = read_dir(pos)
+    if len(order) != dir_count:
+        raise GitIndexError("Untracked cache directory count mismatch")
+    valid, pos = _ewah_bits(data, pos)
+    check_only, pos = _ewah_bits(data, pos)
+    _, pos = _ewah_bits(data, pos)
+    for bit in check_only:
+        order[bit].check_only = True
+    for bit in valid:
+        order[bit].stat = _STAT_DATA.unpack_from(data, pos)
+        pos += _STAT_DATA.size
+    return UntrackedCache(ident, info_exclude, excludes_file, dir_flags, os.fsdecode(exclude_per_dir), root)
+
+def read_index(path: str, hash_size: int = 20) -> GitIndex:
+    """Parse a git index file of version 2, 3 or 4.
+
+    ``hash_size`` is 20 for SHA-1 repositories and 32 for SHA-256 ones.
+    Split indexes are not supported and raise GitIndexError.
+    """
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        data = f.read()
+    if len(data) < 12 + hash_size or data[:4] != b'DIRC':
+        raise GitIndexError(f"Not a git index: {path}")
+    version, count = struct.unpack_from('>II', data, 4)
+    if version not in (2, 3, 4):
+        raise GitIndexError(f"Unsupported index version {version}")
+
+    entries = []
+    pos = 12
+    previous = b''
+    fixed_size = _ENTRY.size + hash_size + 2
+    for _ in range(count):
+        start = pos
+        (ctime_s, ctime_ns, mtime_s, mtime_ns, _dev, ino,
+         mode, uid, gid, size) = _ENTRY.unpack_from(data, pos)
+        pos += _ENTRY.size
+        oid = data[pos:pos + hash_size]
+        pos += hash_size
+        flags, = struct.unpack_from('>H', data, pos)
+        pos += 2
+        ext_flags = 0
+        if flags & FLAG_EXTENDED:
+            if version < 3:
+                raise GitIndexError("Extended entry flags in a version 2 index")
+            ext_flags, = struct.unpack_from('>H', data, pos)
+            pos += 2
+        if version == 4:
+            # Names are prefix-compressed against the previous entry
+            strip, pos = _varint(data, pos)
+            suffix, pos = _cstring(data, pos)
+            name = previous[:len(previous) - strip] + suffix
+        else:
+            name, pos = _cstring(data, pos)
+            # Entries are NUL-padded to a multiple of eight bytes
+            entry_size = fixed_size + (2 if flags & FLAG_EXTENDED else 0) + len(name)
+            pos = start + ((entry_size + 8) & ~7)
+        previous = name
+        entries.append(IndexEntry(os.fsdecode(name), (ctime_s, ctime_ns), (mtime_s, mtime_ns), ino,
+                                  mode, uid, gid, size, oid, flags, ext_flags))
+
+    untracked = None
+    end = len(data) - hash_size
+    while pos + 8 <= end:
+        signature = data[pos:pos + 4]
+        length, = struct.unpack_from('>I', data, pos + 4)
+        body = data[pos + 8:pos + 8 + length]
+        pos += 8 + length
+        if signature == b'UNTR':
+            try:
+                untracked = _read_untracked(body, hash_size)
+            except (struct.error, ValueError, IndexError, GitIndexError) as e:
+                logger.warning(f"Ignoring unreadable untracked cache in {path}: {e}")
+        elif signature == b'link':
+            raise GitIndexError("Split indexes are not supported")
+        elif not b'A' <= signature[:1] <= b'Z' and signature != b'sdir':
+            raise GitIndexError(f"Unsupported index extension {signature!r}")
+    return GitIndex(version, entries, untracked, (st.st_mtime_ns // 10**9, st.st_mtime_ns % 10**9))
+
+def find_git_dir(path: str) -> Optional[Tuple[str, str]]:
+    """Find the (worktree, git directory) containing ``path``, or None."""
+    path = os.path.realpath(path)
+    while True:
+        dot_git = os.path.join(path, '.git')
+        if os.path.isdir(dot_git):
+            return path, dot_git
+        if os.path.isfile(dot_git):
+            # Linked worktrees and submodules point at their git directory
+            with open(dot_git) as f:
+                line = f.readline().strip()
+            if line.startswith('gitdir:'):
+                return path, os.path.normpath(os.path.join(path, line[len('gitdir:'):].strip()))
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+def _hash_size(git_dir: str) -> int:
+    """Object id size of a repository: 32 bytes when it uses SHA-256."""
+    common_dir = git_dir
+    try:
+        with open(os.path.join(git_dir, 'commondir')) as f:
+            common_dir = os.path.join(git_dir, f.read().strip())
+    except OSError:
+        pass
+    try:
+        with open(os.path.join(common_dir, 'config')) as f:
+            for line in f:
+                key, _, value = line.partition('=')
+                if key.strip().lower() == 'objectformat' and value.strip().lower() == 'sha256':
+                    return 32
+    except OSError:
+        pass
+    return 20
+
+def _stat_matches(cached: Tuple[int, int, int, int, int, int, int, int, int], st: os.stat_result) -> bool:
+    """Compare on-disk stat data (as git stores it, truncated to 32 bits) with an lstat result."""
+    ctime_s, ctime_ns, mtime_s, mtime_ns, _dev, ino, uid, gid, size = cached
+    return (mtime_s == int(st.st_mtime) & 0xffffffff
+            and (not mtime_ns or mtime_ns == st.st_mtime_ns % 10**9)
+            and ctime_s == int(st.st_ctime) & 0xffffffff
+            and (not ctime_ns or ctime_ns == st.st_ctime_ns % 10**9)
+            and ino == st.st_ino & 0xffffffff
+            and uid == st.st_uid & 0xffffffff and gid == st.st_gid & 0xffffffff
+            and size == st.st_size & 0xffffffff)
+
+class _IgnoreRules:
+    """The subset of gitignore matching needed for directories the untracked cache cannot vouch for."""
+
+    def __init__(self, worktree: str, git_dir: str):
+        self.worktree = worktree
+        self._rules: Dict[str, List[Tuple[str, bool, bool, bool]]] = {}
+        self._base = self._load(os.path.join(git_dir, 'info', 'exclude'))
+
+    @staticmethod
+    def _load(path: str) -> List[Tuple[str, bool, bool, bool]]:
+        rules = []
+        try:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return rules
+        for line in lines:
+            line = line.rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            line = line[1:] if negate else line
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            anchored = '/' in line
+            rules.append((line.lstrip('/').replace('**/', '*'), negate, dir_only, anchored))
+        return rules
+
+    def _dir_rules(self, rel_dir: str) -> List[Tuple[str, bool, bool, bool]]:
+        if rel_dir not in self._rules:
+            self._rules[rel_dir] = self._load(os.path.join(self.worktree, rel_dir, '.gitignore'))
+        return self._rules[rel_dir]
+
+    def ignored(self, rel_path: str, is_dir: bool) -> bool:
+        """Whether a path relative to the worktree is ignored; later and deeper rules win."""
+        parts = rel_path.split('/')
+        levels = [('', self._base)] + [('/'.join(parts[:i]), self._dir_rules('/'.join(parts[:i])))
+                                        for i in range(len(parts))]
+        result = False
+        for base, rules in levels:
+            relative = rel_path[len(base) + 1:] if base else rel_path
+            for pattern, negate, dir_only, anchored in rules:
+                if dir_only and not is_dir:
+                    continue
+                if fnmatch(relative if anchored else parts[-1], pattern):
+                    result = not negate
+        return result or parts[-1] == '.git'
+
+class GitChangeDetector:
+    """Finds the changed paths of a git worktree from its index, like ``git status``.
+
+    Tracked files are lstat'ed and compared with the stat data cached in
+    the index; only files whose stat data differs (or that are racily
+    clean) are read and hashed. Untracked files come from the index's
+    untracked cache: a directory whose stat data still matches the cache
+    is not listed again, so only directories that changed are read.
+    Without a usable cache the worktree is walked for untracked files.
+
+    Results map absolute paths to a status ('modified', 'deleted',
+    'unmerged', 'untracked') and the (mtime_ns, size) signature of the
+    file, so callers can tell when a dirty file changed again.
+    """
+
+    def __init__(self, worktree: str, git_dir: str):
+        self.worktree = worktree
+        self.git_dir = git_dir
+        self.index_path = os.path.join(git_dir, 'index')
+        self.hash_size = _hash_size(git_dir)
+        self._index: Optional[GitIndex] = None
+        self._index_key = None
+        self._tracked: Dict[str, IndexEntry] = {}
+        self._tracked_dirs = set()
+
+    @classmethod
+    def for_path(cls, path: str) -> Optional['GitChangeDetector']:
+        """A detector for the worktree containing ``path``, or None outside git."""
+        found = find_git_dir(path)
+        if found is None or not os.path.exists(os.path.join(found[1], 'index')):
+            return None
+        return cls(*found)
+
+    def _load(self) -> GitIndex:
+        """Parse the index again only when git has rewritten it."""
+        st = os.stat(self.index_path)
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if key != self._index_key:
+            self._index = read_index(self.index_path, self.hash_size)
+            self._index_key = key
+            self._tracked = {entry.path: entry for entry in self._index.entries}
+            self._tracked_dirs = {path.rsplit('/', 1)[0] for path in self._tracked if '/' in path}
+            for path in list(self._tracked_dirs):
+                while '/' in path:
+                    path = path.rsplit('/', 1)[0]
+                    self._tracked_dirs.add(path)
+        return self._index
+
+    def _blob_oid(self, path: str, st: os.stat_result) -> bytes:
+        digest = hashlib.sha256() if self.hash_size == 32 else hashlib.sha1()
+        if stat.S_ISLNK(st.st_mode):
+            target = os.fsencode(os.readlink(path))
+            digest.update(b'blob %d\0' % len(target) + target)
+            return digest.digest()
+        digest.update(b'blob %d\0' % st.st_size)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.digest()
+
+    def _entry_changed(self, entry: IndexEntry, path: str, st: os.stat_result, racy_before: Tuple[int, int]) -> bool:
+        if stat.S_IFMT(entry.mode) != stat.S_IFMT(st.st_mode):
+            return True
+        if stat.S_ISREG(st.st_mode) and (entry.mode & 0o100) != (st.st_mode & 0o100):
+            return True
+        if entry.size != st.st_size & 0xffffffff:
+            return True
+        racy = entry.mtime >= racy_before
+        stat_clean = (entry.mtime[0] == int(st.st_mtime) & 0xffffffff
+                      and (not entry.mtime[1] or entry.mtime[1] == st.st_mtime_ns % 10**9)
+                      and entry.ctime[0] == int(st.st_ctime) & 0xffffffff
+                      and entry.ino == st.st_ino & 0xffffffff)
+        if stat_clean and not racy:
+            return False
+        # Same size but touched (or written too close to the index): compare content
+        try:
+            return self._blob_oid(path, st) != entry.oid
+        except OSError:
+            return True
+
+    def tracked_changes(self) -> Dict[str, Tuple[str, Signature]]:
+        """Tracked files that differ from the index.
+
+        Every tracked file is lstat'ed, so this costs one system call per
+        index entry however few files changed.
+        """
+        index = self._load()
+        changes = {}
+        for entry in index.entries:
+            if entry.assume_unchanged or stat.S_ISDIR(entry.mode) or entry.mode == 0o160000:
+                continue
+            path = os.path.join(self.worktree, entry.path)
+            if entry.stage:
+                changes[path] = ('unmerged', None)
+                continue
+            try:
+                st = os.lstat(path)
+            except (FileNotFoundError, NotADirectoryError):
+                changes[path] = ('deleted', None)
+                continue
+            if entry.ext_flags & EXT_FLAG_INTENT_TO_ADD or self._entry_changed(entry, path, st, index.mtime):
+                changes[path] = ('modified', (st.st_mtime_ns, st.st_size))
+        return changes
+
+    def _cache_usable(self, cache: UntrackedCache) -> bool:
+        if cache.root is None or not cache.ident.startswith(f'Location {self.worktree}, '):
+            return False
+        try:
+            st = os.stat(os.path.join(self.git_dir, 'info', 'exclude'))
+        except OSError:
+            return not any(cache.info_exclude)
+        return _stat_matches(cache.info_exclude, st)
+
+    def _add_untracked(self, rel_path: str, changes: Dict, ignore: _IgnoreRules):
+        """Record an untracked file, or every file under an untracked directory."""
+        path = os.path.join(self.worktree, rel_path)
+        try:
+            st = os.lstat(path)
+        except OSError:
+            return
+        if not stat.S_ISDIR(st.st_mode):
+            changes[path] = ('untracked', (st.st_mtime_ns, st.st_size))
+            return
+        for root, dirs, files in os.walk(path):
+            rel_root = os.path.relpath(root, self.worktree).replace(os.sep, '/')
+            dirs[:] = [d for d in dirs if not ignore.ignored(f'{rel_root}/{d}', True)]
+            for name in files:
+                if not ignore.ignored(f'{rel_root}/{name}', False):
+                    self._add_untracked(f'{rel_root}/{name}', changes, ignore)
+
+    def _list_dir(self, rel_dir: str, changes: Dict, ignore: _IgnoreRules) -> List[str]:
+        """Read one directory for untracked entries; returns its tracked subdirectories."""
+        subdirs = []
+        try:
+            with os.scandir(os.path.join(self.worktree, rel_dir)) as entries:
+                for entry in entries:
+                    rel_path = f'{rel_dir}/{entry.name}' if rel_dir else entry.name
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if rel_path in self._tracked:
+                        continue
+                    if is_dir and rel_path in self._tracked_dirs:
+                        subdirs.append(rel_path)
+                    elif not ignore.ignored(rel_path, is_dir):
+                        self._add_untracked(rel_path, changes, ignore)
+        except (FileNotFoundError, NotADirectoryError):
+            pass
+        return subdirs
+
+    def untracked_changes(self) -> Dict[str, Tuple[str, Signature]]:
+        """Untracked files that are not ignored."""
+        index = self._load()
+        ignore = _IgnoreRules(self.worktree, self.git_dir)
+        changes = {}
+        cache = index.untracked
+        if cache is None or not self._cache_usable(cache):
+            pending = ['']
+            while pending:
+                pending.extend(self._list_dir(pending.pop(), changes, ignore))
+            return changes
+
+        stack = [('', cache.root)]
+        while stack:
+            rel_dir, node = stack.pop()
+            try:
+                st = os.lstat(os.path.join(self.worktree, rel_dir))
+            except OSError:
+                continue
+            if node.stat is None or not _stat_matches(node.stat, st) or node.check_only:
+                # Entries were added or removed since git last looked
+                listed = set(self._list_dir(rel_dir, changes, ignore))
+            else:
+                listed = set()
+                for name in node.untracked:
+                    self._add_untracked(f'{rel_dir}/{name}' if rel_dir else name, changes, ignore)
+            for child in node.dirs:
+                child_dir = f'{rel_dir}/{child.name}' if rel_dir else child.name
+                listed.discard(child_dir)
+                stack.append((child_dir, child))
+            # Tracked directories the cache has never seen
+            pending = list(listed)
+            while pending:
+                pending.extend(self._list_dir(pending.pop(), changes, ignore))
+        return changes
+
+    def changes(self) -> Dict[str, Tuple[str, Signature]]:
+        """All paths that differ from the index, tracked or not."""
+        changes = self.untracked_changes()
+        changes.update(self.tracked_changes())
+        return changes
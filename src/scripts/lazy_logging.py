@@ -0,0 +1,16 @@
+import os
+import logging
+
+class LazyFileHandler(logging.FileHandler):
+    """File handler that creates its directory and opens the file on the first record.
+
+    Attaching it costs no system calls, so modules can configure logging at
+    import time without slowing down commands that never log to the file.
+    """
+
+    def __init__(self, filename: str, mode: str = 'a', encoding: str = None):
+        super().__init__(filename, mode, encoding, delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
@@ -1,10 +1,13 @@
-from dataclasses import dataclass, asdict
-from typing import Dict, List, Optional, Union
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Union
 from datetime import datetime
 from enum import Enum
 import json
 from pathlib import Path
 
+# Separators for compact on-disk JSON; pretty printing is for display only
+COMPACT_SEPARATORS = (',', ':')
+
 class RecordType(Enum):
     """Types of records supported by the system."""
     DECISION = "decision"
@@ -20,9 +23,19 @@ class RecordStatus(Enum):
     COMPLETED = "completed"
     ARCHIVED = "archived"
 
+# Value -> member lookups; much cheaper than calling the Enum per record
+_RECORD_TYPES = {t.value: t for t in RecordType}
+_RECORD_STATUSES = {s.value: s for s in RecordStatus}
+
+def _enum_value(value: Any) -> Any:
+    """Return the value of an Enum member, or the value itself."""
+    return value.value if isinstance(value, Enum) else value
+
 @dataclass
 class RecordMetadata:
     """Metadata common to all records."""
+    __slots__ = ('record_id', 'record_type', 'timestamp', 'author', 'project', 'version', 'status', 'tags', 'related_records')
+    
     record_id: str
     record_type: RecordType
     timestamp: str
@@ -32,10 +45,43 @@ class RecordMetadata:
     status: RecordStatus
     tags: List[str]
     related_records: List[str]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-ready dict. Nested lists are shared, not copied."""
+        return {
+            'record_id': self.record_id,
+            'record_type': _enum_value(self.record_type),
+            'timestamp': self.timestamp,
+            'author': self.author,
+            'project': self.project,
+            'version': self.version,
+            'status': _enum_value(self.status),
+            'tags': self.tags,
+            'related_records': self.related_records
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RecordMetadata':
+        """Create metadata from a dict, resolving enum values by lookup."""
+        record_type = data['record_type']
+        status = data['status']
+        return cls(
+            data['record_id'],
+            _RECORD_TYPES.get(record_type, record_type),
+            data['timestamp'],
+            data['author'],
+            data['project'],
+            data['version'],
+            _RECORD_STATUSES.get(status, status),
+            data['tags'],
+            data['related_records']
+        )
 
 @dataclass
 class DecisionContent:
     """Content specific to decision records."""
+    __slots__ = ('title', 'context', 'decision', 'rationale', 'alternatives', 'consequences', 'implementation_status', 'affected_files')
+    
     title: str
     context: str
     decision: str
@@ -44,10 +90,30 @@ class DecisionContent:
     consequences: List[str]
     implementation_status: str
     affected_files: List[str]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-ready dict. Nested containers are shared, not copied."""
+        return {
+            'title': self.title,
+            'context': self.context,
+            'decision': self.decision,
+            'rationale': self.rationale,
+            'alternatives': self.alternatives,
+            'consequences': self.consequences,
+            'implementation_status': self.implementation_status,
+            'affected_files': self.affected_files
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DecisionContent':
+        """Create content from a dict."""
+        return cls(**data)
 
 @dataclass
 class ChangeContent:
     """Content specific to change records."""
+    __slots__ = ('description', 'purpose', 'impact', 'changes', 'testing', 'verification', 'affected_files')
+    
     description: str
     purpose: str
     impact: str
@@ -55,10 +121,29 @@ class ChangeContent:
     testing: str
     verification: str
     affected_files: List[str]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-ready dict. Nested containers are shared, not copied."""
+        return {
+            'description': self.description,
+            'purpose': self.purpose,
+            'impact': self.impact,
+            'changes': self.changes,
+            'testing': self.testing,
+            'verification': self.verification,
+            'affected_files': self.affected_files
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ChangeContent':
+        """Create content from a dict."""
+        return cls(**data)
 
 @dataclass
 class DebugContent:
     """Content specific to debug records."""
+    __slots__ = ('issue', 'root_cause', 'solution', 'prevention', 'testing', 'documentation', 'affected_files')
+    
     issue: str
     root_cause: str
     solution: str
@@ -66,59 +151,133 @@ class DebugContent:
     testing: str
     documentation: str
     affected_files: List[str]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-ready dict. Nested containers are shared, not copied."""
+        return {
+            'issue': self.issue,
+            'root_cause': self.root_cause,
+            'solution': self.solution,
+            'prevention': self.prevention,
+            'testing': self.testing,
+            'documentation': self.documentation,
+            'affected_files': self.affected_files
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DebugContent':
+        """Create content from a dict."""
+        return cls(**data)
 
 @dataclass
 class HandoffContent:
     """Content specific to handoff records."""
+    __slots__ = ('summary', 'current_status', 'next_steps', 'risks', 'dependencies')
+    
     summary: str
     current_status: str
     next_steps: List[str]
     risks: List[str]
     dependencies: List[str]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-ready dict. Nested containers are shared, not copied."""
+        return {
+            'summary': self.summary,
+            'current_status': self.current_status,
+            'next_steps': self.next_steps,
+            'risks': self.risks,
+            'dependencies': self.dependencies
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'HandoffContent':
+        """Create content from a dict."""
+        return cls(**data)
 
 @dataclass
 class ConversationContent:
     """Content specific to conversation records."""
+    __slots__ = ('participants', 'topics', 'messages', 'decisions', 'action_items')
+    
     participants: List[str]
     topics: List[str]
     messages: List[Dict[str, str]]
     decisions: List[str]
     action_items: List[str]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-ready dict. Nested containers are shared, not copied."""
+        return {
+            'participants': self.participants,
+            'topics': self.topics,
+            'messages': self.messages,
+            'decisions': self.decisions,
+            'action_items': self.action_items
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ConversationContent':
+        """Create content from a dict."""
+        return cls(**data)
+
+CONTENT_CLASSES = {
+    RecordType.DECISION: DecisionContent,
+    RecordType.CHANGE: ChangeContent,
+    RecordType.DEBUG: DebugContent,
+    RecordType.HANDOFF: HandoffContent,
+    RecordType.CONVERSATION: ConversationContent
+}
 
 @dataclass
 class StandardRecord:
     """Standardized record format that supports all record types."""
+    __slots__ = ('metadata', 'content')
+    
     metadata: RecordMetadata
     content: Union[DecisionContent, ChangeContent, DebugContent, 
                   HandoffContent, ConversationContent]
     
-    def to_json(self) -> str:
-        """Convert record to JSON string."""
-        return json.dumps(asdict(self), indent=2)
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert record to a JSON-ready dict without deep-copying it."""
+        return {
+            'metadata': self.metadata.to_dict(),
+            'content': self.content.to_dict()
+        }
     
     @classmethod
-    def from_json(cls, json_str: str) -> 'StandardRecord':
-        """Create record from JSON string."""
-        data = json.loads(json_str)
+    def from_dict(cls, data: Dict[str, Any]) -> 'StandardRecord':
+        """Create record from a dict."""
+        metadata = RecordMetadata.from_dict(data['metadata'])
+        record_type = metadata.record_type
+        if not isinstance(record_type, RecordType):
+            record_type = RecordType(record_type)
         return cls(
-            metadata=RecordMetadata(**data['metadata']),
-            content=cls._parse_content(data['content'], 
-                                     RecordType(data['metadata']['record_type']))
+            metadata=metadata,
+            content=CONTENT_CLASSES[record_type].from_dict(data['content'])
         )
     
+    def to_json(self, pretty: bool = False) -> str:
+        """Convert record to JSON string.
+        
+        The default is compact JSON for storage; pass ``pretty=True`` for
+        indented output meant for display.
+        """
+        if pretty:
+            return json.dumps(self.to_dict(), indent=2)
+        return json.dumps(self.to_dict(), separators=COMPACT_SEPARATORS)
+    
+    @classmethod
+    def from_json(cls, json_str: str) -> 'StandardRecord':
+        """Create record from JSON string."""
+        return cls.from_dict(json.loads(json_str))
+    
     @staticmethod
     def _parse_content(content_data: Dict, record_type: RecordType) -> Union[
         DecisionContent, ChangeContent, DebugContent, HandoffContent, ConversationContent
     ]:
         """Parse content based on record type."""
-        content_classes = {
-            RecordType.DECISION: DecisionContent,
-            RecordType.CHANGE: ChangeContent,
-            RecordType.DEBUG: DebugContent,
-            RecordType.HANDOFF: HandoffContent,
-            RecordType.CONVERSATION: ConversationContent
-        }
-        return content_classes[record_type](**content_data)
+        return CONTENT_CLASSES[record_type].from_dict(content_data)
     
     def validate(self) -> List[str]:
         """Validate the record and return list of errors."""
@@ -163,4 +322,15 @@ class StandardRecord:
             if not self.content.messages:
                 errors.append("Conversation missing messages")
         
-        return errors 
\ No newline at end of file
+        return errors
+
+def dumps_many(records: Iterable[StandardRecord]) -> str:
+    """Serialize many records as compact JSON Lines, one record per line."""
+    encode = json.JSONEncoder(separators=COMPACT_SEPARATORS).encode
+    return '\n'.join(encode(record.to_dict()) for record in records)
+
+def loads_many(data: str) -> List[StandardRecord]:
+    """Parse records written by dumps_many."""
+    decode = json.JSONDecoder().decode
+    from_dict = StandardRecord.from_dict
+    return [from_dict(decode(line)) for line in data.splitlines() if line]
@@ -0,0 +1,82 @@
+import os
+import time
+import threading
+from typing import List
+
+# Crockford base32, as used by ULIDs: sortable, case-insensitive, no I/L/O/U
+ENCODING = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+RANDOM_BITS = 80
+RANDOM_MAX = (1 << RANDOM_BITS) - 1
+
+class ULIDGenerator:
+    """Generates time-sortable, collision-free 26 character ULIDs.
+
+    The first 48 bits are the millisecond timestamp and the remaining 80 bits
+    are random. IDs generated within the same millisecond reuse the previous
+    random part plus one, so they stay strictly increasing in this process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+
+    def _next(self) -> int:
+        """Return the next ULID as a 128-bit integer."""
+        with self._lock:
+            return self._reserve(1)
+
+    def _reserve(self, count: int) -> int:
+        """Reserve ``count`` consecutive ULIDs and return the first; the lock must be held."""
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms <= self._last_ms:
+            # Same (or a rewound) millisecond: stay monotonic
+            now_ms = self._last_ms
+            random_part = self._last_random + 1
+        else:
+            random_part = int.from_bytes(os.urandom(10), 'big')
+        if random_part + count - 1 > RANDOM_MAX:
+            now_ms += 1
+            random_part = int.from_bytes(os.urandom(10), 'big') >> 1  # Leave room for the batch
+        self._last_ms = now_ms
+        self._last_random = random_part + count - 1
+        return (now_ms << RANDOM_BITS) | random_part
+
+    def generate(self) -> str:
+        """Generate a new ULID string."""
+        return self._encode(self._next())
+
+    def generate_many(self, count: int) -> List[str]:
+        """Generate ``count`` consecutive ULIDs under one lock acquisition."""
+        with self._lock:
+            first = self._reserve(count)
+        return [self._encode(first + i) for i in range(count)]
+
+    @staticmethod
+    def _encode(value: int) -> str:
+        chars = []
+        for _ in range(26):
+            chars.append(ENCODING[value & 0x1F])
+            value >>= 5
+        return ''.join(reversed(chars))
+
+_generator = ULIDGenerator()
+
+def generate_ulid() -> str:
+    """Generate a new ULID from the process-wide generator."""
+    return _generator.generate()
+
+def new_record_id(prefix: str) -> str:
+    """Generate a unique, time-sortable record ID with the given prefix."""
+    return f"{prefix}_{_generator.generate()}"
+
+def new_record_ids(prefix: str, count: int) -> List[str]:
+    """Generate ``count`` consecutive record IDs with the given prefix."""
+    return [f"{prefix}_{ulid}" for ulid in _generator.generate_many(count)]
+
+def ulid_timestamp(ulid: str) -> float:
+    """Return the creation time encoded in a ULID as a Unix timestamp."""
+    value = 0
+    for char in ulid[:10].upper():
+        value = (value << 5) | ENCODING.index(char)
+    return value / 1000.0
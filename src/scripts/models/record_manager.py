@@ -1,10 +1,31 @@
 import json
+import mmap
+import os
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass, asdict
 import logging
 from .decision_analyzer import DecisionAnalyzer
+from .record_id import new_record_id, new_record_ids
+
+# Record files are written exactly as json.dump(..., indent=2) would write
+# them, so an entry can be appended by rewriting only this trailer.
+ENTRIES_TRAILER = b"\n    }\n  ]\n}"
+
+# Start of the entries list in that layout; json.dumps never writes a raw
+# newline inside a string, so a line starting with two spaces and a quote
+# is always a top-level key.
+ENTRIES_KEY = b'\n  "entries": ['
+TOP_LEVEL_KEY = b'\n  "'
+
+# Bytes at the end of a record searched for its last top-level key
+TAIL_WINDOW = 64 * 1024
+
+# Records seen to end in their entries list, by path, with the (inode, size,
+# mtime) they had then; while that still matches, appends skip the check
+MAX_KNOWN_RECORDS = 4096
+_entries_last: Dict[str, Tuple[int, int, int]] = {}
 
 @dataclass
 class RecordEntry:
@@ -19,31 +40,39 @@ class RecordEntry:
 class RecordManager:
     """Manages automated creation and updating of project records."""
     
-    def __init__(self, project_root: str):
+    def __init__(self, project_root: str, context=None):
+        """Manage records under ``project_root``.
+        
+        ``context`` is an optional shared ProjectContext for the same root;
+        it creates each directory once per process instead of per manager.
+        """
         self.project_root = Path(project_root)
         self.analyzer = DecisionAnalyzer()
         self.logger = logging.getLogger(__name__)
         
         # Define record directories
-        self.directories = {
-            'decisions': self.project_root / 'decisions',
-            'changes': self.project_root / 'changes',
-            'debug': self.project_root / 'debug',
-            'handoff': self.project_root / 'handoff'
-        }
+        names = ('decisions', 'changes', 'debug', 'handoff')
+        if context is not None:
+            self.directories = {name: Path(context.dir(name)) for name in names}
+        else:
+            self.directories = {name: self.project_root / name for name in names}
+            for dir_path in self.directories.values():
+                dir_path.mkdir(parents=True, exist_ok=True)
         
-        # Ensure directories exist
-        for dir_path in self.directories.values():
-            dir_path.mkdir(parents=True, exist_ok=True)
+        # Record type -> (directory key, ID prefix)
+        self.record_targets = {
+            'decision': ('decisions', 'decision'),
+            'change': ('changes', 'change'),
+            'debug': ('debug', 'debug')
+        }
     
     def _get_timestamp(self) -> str:
         """Get current timestamp in ISO format."""
         return datetime.now().isoformat()
     
     def _generate_record_id(self, prefix: str) -> str:
-        """Generate a unique record ID."""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        return f"{prefix}_{timestamp}"
+        """Generate a unique, time-sortable record ID (ULID based)."""
+        return new_record_id(prefix)
     
     def _load_record(self, file_path: Path) -> Dict:
         """Load a record file."""
@@ -64,13 +93,101 @@ class RecordManager:
         except Exception as e:
             self.logger.error(f"Error saving {file_path}: {str(e)}")
     
+    def _create_record(self, record_type: str, entry: Dict) -> Path:
+        """Write a new record file holding a single entry.
+        
+        The file is created exclusively, so an existing record is never
+        loaded, appended to or clobbered.
+        """
+        dir_key, prefix = self.record_targets.get(record_type, ('handoff', 'handoff'))
+        data = json.dumps({'entries': [entry]}, indent=2).encode('utf-8')
+        while True:
+            file_path = self.directories[dir_key] / f"{self._generate_record_id(prefix)}.json"
+            try:
+                self._write_new(file_path, data)
+                return file_path
+            except FileExistsError:
+                continue
+            except OSError as e:
+                self.logger.error(f"Error saving {file_path}: {str(e)}")
+                raise
+    
+    @staticmethod
+    def _write_new(file_path: Path, data: bytes) -> None:
+        """Create a record file exclusively and write its content."""
+        fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+    
+    @staticmethod
+    def _ends_in_entries(f: BinaryIO, size: int) -> bool:
+        """Whether the last top-level key of a record file is 'entries'.
+        
+        Only the last TAIL_WINDOW bytes are read when the key is among
+        them; a longer entries list is scanned once and then remembered.
+        """
+        start = max(0, size - TAIL_WINDOW)
+        f.seek(start)
+        tail = f.read(size - start)
+        key = tail.rfind(TOP_LEVEL_KEY)
+        if key >= 0:
+            return tail[key:key + len(ENTRIES_KEY)] == ENTRIES_KEY
+        if start == 0:
+            return False
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            key = m.rfind(TOP_LEVEL_KEY, 0, start + len(TOP_LEVEL_KEY))
+            return key >= 0 and m[key:key + len(ENTRIES_KEY)] == ENTRIES_KEY
+    
+    def _append_entry(self, file_path: Path, entry: Dict) -> bool:
+        """Append an entry to a record file by rewriting only its trailer.
+        
+        Returns False if the file does not end in the expected layout, in
+        which case the caller falls back to a full load and save.
+        """
+        entry_json = json.dumps(entry, indent=2).replace('\n', '\n    ')
+        tail = ("},\n    " + entry_json + "\n  ]\n}").encode('utf-8')
+        key = str(file_path)
+        try:
+            with open(file_path, 'r+b') as f:
+                st = os.fstat(f.fileno())
+                size = st.st_size
+                if size < len(ENTRIES_TRAILER):
+                    return False
+                f.seek(size - len(ENTRIES_TRAILER))
+                if f.read() != ENTRIES_TRAILER:
+                    return False
+                # The trailer closes the last top-level list, which must be 'entries'
+                if (_entries_last.get(key) != (st.st_ino, size, st.st_mtime_ns)
+                        and not self._ends_in_entries(f, size)):
+                    return False
+                # Replace the closing brace of the last entry onwards
+                f.seek(size - len(ENTRIES_TRAILER) + len(b"\n    "))
+                f.write(tail)
+                f.flush()
+                st = os.fstat(f.fileno())
+        except FileNotFoundError:
+            return False
+        _entries_last.pop(key, None)
+        _entries_last[key] = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if len(_entries_last) > MAX_KNOWN_RECORDS:
+            del _entries_last[next(iter(_entries_last))]
+        return True
+    
     def add_entry(self, 
                  record_type: str, 
                  content: Dict, 
                  author: str,
                  related_files: Optional[List[str]] = None,
                  tags: Optional[List[str]] = None) -> str:
-        """Add a new entry to a record."""
+        """Add a new entry to a record.
+        
+        Raises OSError if the record cannot be written. This used to be
+        logged and the path returned anyway, for a record that did not exist.
+        """
         entry = RecordEntry(
             timestamp=self._get_timestamp(),
             author=author,
@@ -80,28 +197,47 @@ class RecordManager:
             tags=tags or []
         )
         
-        # Determine target file based on type
-        if record_type == 'decision':
-            file_path = self.directories['decisions'] / f"{self._generate_record_id('decision')}.json"
-        elif record_type == 'change':
-            file_path = self.directories['changes'] / f"{self._generate_record_id('change')}.json"
-        elif record_type == 'debug':
-            file_path = self.directories['debug'] / f"{self._generate_record_id('debug')}.json"
-        else:
-            file_path = self.directories['handoff'] / f"{self._generate_record_id('handoff')}.json"
-        
-        # Load existing record or create new
-        record = self._load_record(file_path)
-        if 'entries' not in record:
-            record['entries'] = []
-        
-        # Add new entry
-        record['entries'].append(asdict(entry))
+        return str(self._create_record(record_type, asdict(entry)))
+    
+    def add_entries(self, entries: List[Dict]) -> List[str]:
+        """Add many records in one go.
         
-        # Save updated record
-        self._save_record(file_path, record)
+        Each item takes the keyword arguments of add_entry (record_type,
+        content, author and optionally related_files and tags). IDs for the
+        whole batch are reserved at once and every record is encoded before
+        the first file is written, so the files are created in a single
+        pass. Returns the created record paths in input order.
+        """
+        timestamp = self._get_timestamp()
+        targets = [self.record_targets.get(item['record_type'], ('handoff', 'handoff')) for item in entries]
+        ids: Dict[str, List[str]] = {}
+        for prefix in {prefix for _, prefix in targets}:
+            ids[prefix] = new_record_ids(prefix, sum(1 for _, p in targets if p == prefix))[::-1]
+        batch = []
+        for item, (dir_key, prefix) in zip(entries, targets):
+            entry = {
+                'timestamp': timestamp,
+                'author': item['author'],
+                'type': item['record_type'],
+                'content': item['content'],
+                'related_files': item.get('related_files') or [],
+                'tags': item.get('tags') or []
+            }
+            batch.append((self.directories[dir_key] / f"{ids[prefix].pop()}.json",
+                          json.dumps({'entries': [entry]}, indent=2).encode('utf-8'), item['record_type']))
         
-        return str(file_path)
+        paths = []
+        for file_path, data, record_type in batch:
+            try:
+                self._write_new(file_path, data)
+            except FileExistsError:
+                # Only another process reusing an ID gets here; take a fresh one
+                file_path = self._create_record(record_type, json.loads(data)['entries'][0])
+            except OSError as e:
+                self.logger.error(f"Error saving {file_path}: {str(e)}")
+                raise
+            paths.append(str(file_path))
+        return paths
     
     def analyze_decision(self, decision_file: str) -> Dict:
         """Analyze a decision file and return affected files."""
@@ -192,16 +328,20 @@ class RecordManager:
             self.logger.error(f"Record file not found: {file_path}")
             return
         
-        record = self._load_record(path)
-        if 'entries' not in record:
-            record['entries'] = []
-        
-        entry = RecordEntry(
+        entry = asdict(RecordEntry(
             timestamp=self._get_timestamp(),
             author=author,
             type=update_type,
             content=content
-        )
+        ))
+        
+        # Fast path: append in place without parsing the record
+        if self._append_entry(path, entry):
+            return
+        
+        record = self._load_record(path)
+        if 'entries' not in record:
+            record['entries'] = []
         
-        record['entries'].append(asdict(entry))
+        record['entries'].append(entry)
         self._save_record(path, record) 
\ No newline at end of file
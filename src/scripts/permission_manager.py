@@ -1,12 +1,15 @@
 import os
 import stat
-import subprocess
 import sys
 import logging
+import threading
+from collections import OrderedDict
 from enum import Enum
-from typing import List, Set
+from typing import Dict, Hashable, Iterable, List, Optional, Set
 import time
 import getpass
+from .file_attributes import set_immutable
+from .role_trie import RoleTrie
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +28,74 @@ class FileRole(Enum):
     ADMIN = "admin"  # Administrative access
     USER = "user"  # Regular user access
 
+# One bit per role, so a set of roles is a small integer
+ROLE_BITS = {role: 1 << index for index, role in enumerate(FileRole)}
+
+def roles_to_mask(roles: Iterable[FileRole]) -> int:
+    """Pack roles into a bitmask."""
+    mask = 0
+    for role in roles:
+        mask |= ROLE_BITS[role]
+    return mask
+
+def mask_to_roles(mask: int) -> Set[FileRole]:
+    """Unpack a bitmask into roles."""
+    return {role for role, bit in ROLE_BITS.items() if mask & bit}
+
+class PermissionCache:
+    """Bounded LRU cache of permission check results with a TTL.
+    
+    Entries expire ``ttl`` seconds after they were stored and the least
+    recently used entry is evicted once ``maxsize`` entries are held.
+    """
+    
+    def __init__(self, maxsize: int = 4096, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+    
+    def get(self, key: Hashable, now: Optional[float] = None) -> Optional[bool]:
+        """Return a cached result, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now is None:
+            now = time.monotonic()
+        if entry[0] <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+    
+    def put(self, key: Hashable, result: bool, now: Optional[float] = None):
+        """Store a result, evicting the least recently used entry if full."""
+        if now is None:
+            now = time.monotonic()
+        entries = self._entries
+        entries[key] = (now + self.ttl, result)
+        entries.move_to_end(key)
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
+    
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop expired entries and return how many were removed."""
+        if now is None:
+            now = time.monotonic()
+        expired = [key for key, (expires, _) in self._entries.items() if expires <= now]
+        for key in expired:
+            del self._entries[key]
+        return len(expired)
+    
+    def clear(self):
+        """Drop all entries."""
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
 class PermissionManager:
     def __init__(self):
         self.role_permissions = {
@@ -54,16 +125,17 @@ class PermissionManager:
             }
         }
         
-        # Track which roles have access to which files
-        self.file_roles: dict[str, Set[FileRole]] = {}
+        # Role grants on files and directories; directory grants are inherited
+        self.role_trie = RoleTrie()
         
         # Track elevated permissions with timestamps
         self.elevated_permissions: dict[str, float] = {}
         self.elevation_timeout = 300  # 5 minutes
         
-        # Cache for permission checks
-        self.permission_cache: dict[str, dict] = {}
+        # Bounded LRU/TTL cache for permission checks
         self.cache_timeout = 60  # 1 minute
+        self.cache_size = 4096
+        self.permission_cache = PermissionCache(self.cache_size, self.cache_timeout)
         
         # Development mode flag
         self.dev_mode = False
@@ -78,6 +150,64 @@ class PermissionManager:
         
         # Track venv bypass confirmations
         self.venv_bypass_confirmations = set()
+        
+        # Optional persistent store shared across processes
+        self.store = None
+    
+    def attach_store(self, store):
+        """Persist role assignments and saved modes in a RoleStore.
+        
+        Updates are written through to the store. Grant and override rules
+        are loaded into the role trie; there is one per rule, not per file,
+        so state recorded by an earlier run is cheap to load.
+        """
+        self.store = store
+        self.role_trie.clear()
+        for path, values in store.grants().items():
+            self.role_trie.grant(path, roles_to_mask(FileRole(value) for value in values))
+        for path, values in store.overrides().items():
+            self.role_trie.set_override(path, roles_to_mask(FileRole(value) for value in values))
+        if store.dev_session_roots():
+            # A dev mode session begun by an earlier process is still open
+            self.dev_mode = True
+        for role_value, operations in store.role_permissions().items():
+            role = FileRole(role_value)
+            self.role_permissions[role].update(operations)
+        self.permission_cache.clear()
+    
+    def set_role_permission(self, role: FileRole, operation: str, allowed: bool):
+        """Allow or deny an operation for a role."""
+        self.role_permissions[role][operation] = allowed
+        if self.store is not None:
+            self.store.set_role_permission(role.value, operation, allowed)
+        self.permission_cache.clear()
+    
+    def _roles_for(self, file_path: str) -> Set[FileRole]:
+        """Get the roles in effect on a file, including inherited ones."""
+        return mask_to_roles(self.role_trie.resolve(file_path))
+    
+    def _persist_override(self, file_path: str):
+        """Write a path's override, or its absence, through to the store."""
+        if self.store is not None:
+            override = self.role_trie.override(file_path)
+            self.store.set_override(
+                file_path, None if override is None else [role.value for role in mask_to_roles(override)]
+            )
+    
+    def set_role_override(self, file_path: str, roles: Optional[Iterable[FileRole]]):
+        """Pin the exact roles of one file, ignoring inherited grants.
+        
+        Passing None removes the override so the file inherits again.
+        """
+        file_path = os.path.abspath(file_path)
+        self.role_trie.set_override(file_path, None if roles is None else roles_to_mask(roles))
+        self._persist_override(file_path)
+        self.permission_cache.clear()
+    
+    def who_may(self, file_path: str, operation: str) -> Set[FileRole]:
+        """Get the roles that may perform an operation on a file."""
+        return {role for role in self._roles_for(file_path)
+                if self.role_permissions[role].get(operation, False)}
     
     def enable_dev_mode(self, file_path: str = None):
         """Enable development mode for a specific file or all files."""
@@ -102,7 +232,11 @@ class PermissionManager:
                 self._restore_original_permissions(file_path)
             else:
                 self.dev_mode = False
-                for path in list(self.dev_mode_files):
+                paths = set(self.dev_mode_files)
+                if self.store is not None:
+                    # Include files put in dev mode by earlier processes
+                    paths.update(self.store.saved_paths())
+                for path in paths:
                     self._restore_original_permissions(path)
                 self.dev_mode_files.clear()
             logger.info(f"Development mode disabled for {'all files' if file_path is None else file_path}")
@@ -114,11 +248,14 @@ class PermissionManager:
         """Store the original permissions of a file."""
         try:
             if os.path.exists(file_path):
+                st = os.stat(file_path)
                 self.original_permissions[file_path] = {
-                    'mode': os.stat(file_path).st_mode,
-                    'uid': os.stat(file_path).st_uid,
-                    'gid': os.stat(file_path).st_gid
+                    'mode': st.st_mode,
+                    'uid': st.st_uid,
+                    'gid': st.st_gid
                 }
+                if self.store is not None:
+                    self.store.save_mode(file_path, st.st_mode, st.st_uid, st.st_gid)
         except Exception as e:
             logger.error(f"Error storing original permissions: {str(e)}")
             raise
@@ -145,22 +282,30 @@ class PermissionManager:
     def _restore_original_permissions(self, file_path: str):
         """Restore the original permissions of a file."""
         try:
-            if file_path in self.original_permissions:
-                orig = self.original_permissions[file_path]
+            orig = self.original_permissions.pop(file_path, None)
+            if self.store is not None:
+                stored = self.store.pop_mode(file_path)
+                if orig is None:
+                    orig = stored
+            if orig is not None:
                 os.chown(file_path, orig['uid'], orig['gid'])
                 os.chmod(file_path, orig['mode'])
-                del self.original_permissions[file_path]
                 logger.info(f"Restored original permissions for: {file_path}")
         except Exception as e:
             logger.error(f"Error restoring original permissions: {str(e)}")
             raise
 
     def grant_role_access(self, file_path: str, role: FileRole) -> bool:
-        """Grant a role access to a file."""
+        """Grant a role access to a file, or to everything under a directory."""
+        # Rules are stored as absolute paths, the form the role trie resolves
+        file_path = os.path.abspath(file_path)
         try:
-            if file_path not in self.file_roles:
-                self.file_roles[file_path] = set()
-            self.file_roles[file_path].add(role)
+            self.role_trie.grant(file_path, ROLE_BITS[role])
+            if self.store is not None:
+                with self.store.transaction():
+                    self.store.add_role(file_path, role.value)
+                    self._persist_override(file_path)
+            self.permission_cache.clear()
             
             # Apply basic permissions
             self._apply_basic_permissions(file_path, role)
@@ -171,9 +316,16 @@ class PermissionManager:
     
     def revoke_role_access(self, file_path: str, role: FileRole) -> bool:
         """Revoke a role's access to a file."""
+        file_path = os.path.abspath(file_path)
         try:
-            if file_path in self.file_roles and role in self.file_roles[file_path]:
-                self.file_roles[file_path].remove(role)
+            if role in self._roles_for(file_path):
+                # Roles inherited from a directory are masked with an override
+                self.role_trie.revoke(file_path, ROLE_BITS[role])
+                if self.store is not None:
+                    with self.store.transaction():
+                        self.store.remove_role(file_path, role.value)
+                        self._persist_override(file_path)
+                self.permission_cache.clear()
                 self._update_file_permissions(file_path)
             return True
         except Exception as e:
@@ -185,6 +337,8 @@ class PermissionManager:
         try:
             if role in [FileRole.SYSTEM, FileRole.ADMIN]:
                 self.elevated_permissions[file_path] = time.time()
+                if self.store is not None:
+                    self.store.set_elevated(file_path, self.elevated_permissions[file_path])
                 os.chmod(file_path, 0o666)  # Make writable
                 return True
             return False
@@ -213,17 +367,12 @@ class PermissionManager:
     
     def _update_file_permissions(self, file_path: str):
         """Update file permissions based on current roles."""
-        if file_path in self.file_roles:
+        if os.path.exists(file_path):
             # Remove all current permissions
-            if sys.platform == 'linux':
-                subprocess.run(['chattr', '-i', file_path], check=True)
-            elif sys.platform == 'darwin':
-                subprocess.run(['chflags', 'nouchg', file_path], check=True)
-            elif sys.platform == 'win32':
-                subprocess.run(['attrib', '-R', '-S', '-H', file_path], check=True)
+            set_immutable(file_path, False)
             
             # Apply permissions for each role
-            for role in self.file_roles[file_path]:
+            for role in self._roles_for(file_path):
                 self._apply_basic_permissions(file_path, role)
     
     def enable_venv_restriction(self, file_path: str = None):
@@ -287,11 +436,11 @@ class PermissionManager:
                 return True
             
             # Check cache first
-            cache_key = f"{file_path}:{role.value}:{operation}"
-            if cache_key in self.permission_cache:
-                cached = self.permission_cache[cache_key]
-                if time.time() - cached['timestamp'] < self.cache_timeout:
-                    return cached['result']
+            cache_key = (sys.intern(file_path), role, sys.intern(operation))
+            now = time.monotonic()
+            cached = self.permission_cache.get(cache_key, now)
+            if cached is not None:
+                return cached
             
             # Get role permissions
             role_perm = self.role_permissions.get(role)
@@ -299,7 +448,7 @@ class PermissionManager:
                 raise PermissionError(f"Invalid role: {role.value}", role.value, file_path)
             
             # Check if role has access to file
-            if file_path not in self.file_roles or role not in self.file_roles[file_path]:
+            if role not in self._roles_for(file_path):
                 raise PermissionError(
                     f"Role {role.value} does not have access to file: {file_path}",
                     role.value,
@@ -324,10 +473,7 @@ class PermissionManager:
                 )
             
             # Cache result
-            self.permission_cache[cache_key] = {
-                'timestamp': time.time(),
-                'result': result
-            }
+            self.permission_cache.put(cache_key, result, now)
             
             return result
             
@@ -338,6 +484,38 @@ class PermissionManager:
             logger.error(f"Error checking access: {str(e)}")
             raise PermissionError(f"Unexpected error checking access: {str(e)}", role.value, file_path)
     
+    def check_access_many(self, file_paths: Iterable[str], role: FileRole, operation: str) -> List[bool]:
+        """Check one role and operation against many files at once.
+        
+        The role and operation are resolved once and the role trie is walked
+        once per directory, so this skips the per-path cache.
+        Returns one boolean per path, in order, instead of raising. The venv
+        restriction is decided once for the batch and never prompts: inside
+        a virtual environment only paths already confirmed are allowed.
+        """
+        paths = list(file_paths)
+        
+        # Development mode bypass for every file
+        if self.dev_mode and not self.dev_mode_files:
+            return [True] * len(paths)
+        
+        role_perm = self.role_permissions.get(role)
+        allowed = bool(role_perm and role_perm.get(operation, False))
+        bit = ROLE_BITS.get(role, 0)
+        masks = self.role_trie.resolve_many(paths) if allowed else [0] * len(paths)
+        dev_files = self.dev_mode_files if self.dev_mode else ()
+        venv_blocked = self.venv_restricted and 'VIRTUAL_ENV' in os.environ
+        
+        results = []
+        for path, mask in zip(paths, masks):
+            if path in dev_files:
+                results.append(True)
+            elif mask & bit:
+                results.append(not venv_blocked or path in self.venv_bypass_confirmations)
+            else:
+                results.append(False)
+        return results
+    
     def cleanup_expired_permissions(self):
         """Clean up expired elevated permissions and cache entries."""
         current_time = time.time()
@@ -347,12 +525,39 @@ class PermissionManager:
                   if current_time - timestamp > self.elevation_timeout]
         for path in expired:
             del self.elevated_permissions[path]
+        if self.store is not None:
+            self.store.clear_elevated_before(current_time - self.elevation_timeout)
         
         # Clean up permission cache
-        expired = [key for key, data in self.permission_cache.items() 
-                  if current_time - data['timestamp'] > self.cache_timeout]
-        for key in expired:
-            del self.permission_cache[key]
+        self.permission_cache.expire()
 
-# Global permission manager instance
-permission_manager = PermissionManager() 
\ No newline at end of file
+# Global permission manager instance, for callers without a project; it has no store
+permission_manager = PermissionManager()
+
+_managers: Dict[str, PermissionManager] = {}
+_managers_lock = threading.Lock()
+
+def get_permission_manager(project_name: str) -> PermissionManager:
+    """Get the process-wide permission manager of a project.
+
+    Each project has its own manager, role trie and permissions.db, so a
+    process serving several projects (the daemon) never resolves one
+    project's files against another project's rules.
+    """
+    from .project_context import get_project_context
+    from .role_store import RoleStore
+    
+    db_path = get_project_context(project_name).path('permissions.db')
+    manager = _managers.get(db_path)
+    # Reattach if the project directory was removed under the open database
+    if manager is None or not os.path.exists(db_path):
+        with _managers_lock:
+            manager = _managers.get(db_path)
+            if manager is None or not os.path.exists(db_path):
+                if manager is not None:
+                    manager.store.close()
+                    get_project_context(project_name).forget()
+                manager = PermissionManager()
+                manager.attach_store(RoleStore(db_path))
+                _managers[db_path] = manager
+    return manager 
\ No newline at end of file
@@ -0,0 +1,76 @@
+import os
+import logging
+import threading
+from typing import Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Root of all tracked project data, next to src/
+PROJECTS_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                             'tracked_projects')
+
+# Directories every tracked project has
+CONFIG_DIRS = ('logs', 'changes', 'backups', 'ai_conversations', 'thinking', 'handoffs')
+
+class ProjectContext:
+    """Resolved directories of one tracked project.
+
+    Each directory is created at most once per process; afterwards its path
+    comes from memory, so writing a record costs no extra metadata calls.
+    """
+
+    def __init__(self, base_dir: str, name: Optional[str] = None):
+        self.base_dir = os.path.abspath(base_dir)
+        self.name = name or os.path.basename(self.base_dir)
+        self._created: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def path(self, *parts: str) -> str:
+        """Get a path inside the project without creating anything."""
+        return os.path.join(self.base_dir, *parts)
+
+    def dir(self, *parts: str) -> str:
+        """Get a directory inside the project, creating it on first use."""
+        path = os.path.join(self.base_dir, *parts)
+        if path not in self._created:
+            with self._lock:
+                if path not in self._created:
+                    os.makedirs(path, exist_ok=True)
+                    logger.debug(f"Created directory: {path}")
+                    self._created.add(path)
+        return path
+
+    def day_dir(self, kind: str, day: str) -> str:
+        """Get the directory holding one day's records of a kind."""
+        return self.dir(kind, day)
+
+    @property
+    def dirs(self) -> Dict[str, str]:
+        """Get the standard project directories by name."""
+        return {key: self.dir(key) for key in CONFIG_DIRS}
+
+    def forget(self):
+        """Drop cached directories, e.g. after they were removed externally."""
+        with self._lock:
+            self._created.clear()
+
+_contexts: Dict[str, ProjectContext] = {}
+_contexts_lock = threading.Lock()
+
+def get_project_context(project_name: Optional[str] = None, base_dir: Optional[str] = None) -> ProjectContext:
+    """Get the process-wide context of a project.
+
+    Projects are identified by name under tracked_projects, or by an explicit
+    ``base_dir`` for callers that keep records elsewhere.
+    """
+    if base_dir is None:
+        if not project_name:
+            logger.error("Project name cannot be empty")
+            raise ValueError("Project name cannot be empty")
+        base_dir = os.path.join(PROJECTS_ROOT, project_name)
+    key = os.path.abspath(base_dir)
+    context = _contexts.get(key)
+    if context is None:
+        with _contexts_lock:
+            context = _contexts.setdefault(key, ProjectContext(key, project_name))
+    return context
@@ -0,0 +1,357 @@
+"""Read-only HTTP/JSON API over tracked projects.
+
+Endpoints (all GET, newest first, paginated with ``limit`` and ``after``):
+
+    /api/projects
+    /api/projects/<project>/<kind>?limit=&after=&since=&q=
+    /api/projects/<project>/<kind>/<id>
+
+where ``kind`` is one of changes, decisions, sessions or handoffs. Listings
+come from in-memory indexes that the shared watch service invalidates, and
+rendered pages are cached with their ETag and gzip body, so a repeated
+request is answered without touching the disk.
+
+Requests must name a local Host (localhost or 127.0.0.1), so a web page
+cannot read the records through DNS rebinding, and cross-origin reads are
+only allowed for the one origin given with ``allow_origin``.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from .project_context import PROJECTS_ROOT
+from .track_change import read_text_record
+
+logger = logging.getLogger(__name__)
+
+# kind -> (directory, file prefix, file suffix, grouped in YYYYMMDD directories)
+KINDS = {
+    'changes': ('changes', 'change_', '.txt', True),
+    'decisions': ('decisions', 'decision_', '.json', False),
+    'sessions': ('ai_conversations', '', '.json', False),
+    'handoffs': ('handoffs', 'handoff_', '.txt', True),
+}
+KIND_BY_DIR = {directory: kind for kind, (directory, _, _, _) in KINDS.items()}
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+MAX_CACHED_PAGES = 2048
+MAX_CACHED_RECORDS = 8192
+GZIP_MIN_SIZE = 512
+
+# Host header names accepted besides the address the server listens on
+LOCAL_HOSTS = ('localhost', '127.0.0.1')
+
+_TIME_KEY = re.compile(r'(\d{8}_\d{6}(?:_\d{6})?)$')
+
+def _sort_key(record_id: str) -> str:
+    """Order records by the timestamp their ids end with."""
+    match = _TIME_KEY.search(record_id)
+    return match.group(1) if match else record_id
+
+def _normalize(path: str) -> str:
+    """Canonical form of a request path: unquoted, without repeated or trailing slashes."""
+    return re.sub('/+', '/', unquote(path)).rstrip('/') or '/'
+
+def _host_name(host: str) -> str:
+    """The name in a Host header, without its port."""
+    if host.startswith('['):
+        return host[1:host.find(']')]
+    return host.rsplit(':', 1)[0] if host.count(':') == 1 else host
+
+def _since_key(since: str) -> str:
+    if since.isdigit():
+        return since
+    from datetime import datetime
+    return datetime.fromisoformat(since).strftime('%Y%m%d_%H%M%S_%f')
+
+class QueryError(Exception):
+    """A request the API cannot answer, with its HTTP status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class Page:
+    """A rendered response body with its validator and compressed form."""
+    __slots__ = ('body', 'etag', '_gzipped')
+
+    def __init__(self, data):
+        self.body = json.dumps(data, default=str).encode()
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:20] + '"'
+        self._gzipped = None
+
+    @property
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+class QueryIndex:
+    """Per-project record listings and rendered pages, kept in memory.
+
+    Listings are built from directory entries on first use; record files
+    are read when a page first includes them and the latest
+    MAX_CACHED_RECORDS are kept. ``invalidate`` drops what a filesystem
+    change made stale.
+    """
+
+    def __init__(self, root: str = PROJECTS_ROOT):
+        self.root = os.path.abspath(root)
+        self._listings: Dict[Tuple[str, str], List[Tuple[str, str, str]]] = {}
+        self._records: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._pages: 'OrderedDict[Tuple[str, str], Page]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def projects(self) -> List[str]:
+        with os.scandir(self.root) as entries:
+            return sorted(e.name for e in entries if e.is_dir() and not e.name.startswith('.'))
+
+    def _listing(self, project: str, kind: str) -> List[Tuple[str, str, str]]:
+        """Get (sort key, id, path) of a kind's records, newest first."""
+        listing = self._listings.get((project, kind))
+        if listing is not None:
+            return listing
+        directory, prefix, suffix, dated = KINDS[kind]
+        kind_dir = os.path.join(self.root, project, directory)
+        dirs = [kind_dir]
+        if dated:
+            try:
+                with os.scandir(kind_dir) as entries:
+                    dirs = [e.path for e in entries if e.name.isdigit() and e.is_dir()]
+            except FileNotFoundError:
+                dirs = []
+        listing = []
+        for path in dirs:
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        name = entry.name
+                        if name.startswith(prefix) and name.endswith(suffix) and not name.startswith('.'):
+                            record_id = name[:-len(suffix)]
+                            listing.append((_sort_key(record_id), record_id, entry.path))
+            except FileNotFoundError:
+                continue
+        listing.sort(reverse=True)
+        self._listings[(project, kind)] = listing
+        return listing
+
+    def _record(self, path: str) -> Optional[Dict]:
+        record = self._records.get(path)
+        if record is None:
+            if path.endswith('.json'):
+                try:
+                    with open(path) as f:
+                        record = json.load(f)
+                except (FileNotFoundError, ValueError):
+                    return None
+                record.setdefault('id', os.path.basename(path)[:-len('.json')])
+            else:
+                record = read_text_record(path)
+                if record is None:
+                    return None
+                record.pop('path', None)
+            self._records[path] = record
+            while len(self._records) > MAX_CACHED_RECORDS:
+                self._records.popitem(last=False)
+        return record
+
+    def _query(self, project: str, kind: str, params: Dict[str, str]) -> Dict:
+        try:
+            limit = min(int(params.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+            since = _since_key(params['since']) if params.get('since') else None
+        except ValueError as e:
+            raise QueryError(400, f"Invalid parameter: {e}")
+        after = params.get('after')
+        after_key = _sort_key(after) if after else None
+        query = params.get('q', '').lower()
+
+        items = []
+        next_id = None
+        for key, record_id, path in self._listing(project, kind):
+            if after_key is not None and (key, record_id) >= (after_key, after):
+                continue
+            if since is not None and key < since:
+                break
+            record = self._record(path)
+            if record is None or (query and query not in json.dumps(record, default=str).lower()):
+                continue
+            if len(items) == limit:
+                next_id = items[-1]['id']
+                break
+            items.append(record)
+        return {'items': items, 'next': next_id}
+
+    def _build(self, parts: List[str], params: Dict[str, str]):
+        if parts == ['projects']:
+            return {'projects': self.projects()}
+        if len(parts) in (3, 4) and parts[0] == 'projects':
+            project, kind = parts[1], parts[2]
+            if kind not in KINDS or project.startswith('.') or '/' in project:
+                raise QueryError(404, f"Unknown resource: {'/'.join(parts)}")
+            if not os.path.isdir(os.path.join(self.root, project)):
+                raise QueryError(404, f"Unknown project: {project}")
+            if len(parts) == 3:
+                return self._query(project, kind, params)
+            for _, record_id, path in self._listing(project, kind):
+                if record_id == parts[3]:
+                    record = self._record(path)
+                    if record is not None:
+                        return record
+            raise QueryError(404, f"Unknown record: {parts[3]}")
+        raise QueryError(404, f"Unknown resource: {'/'.join(parts)}")
+
+    def page(self, target: str) -> Page:
+        """Get the rendered page for a request target such as /api/projects/x/changes?limit=5."""
+        url = urlsplit(target)
+        # Spellings of one path share a page, so invalidate() finds it
+        path = _normalize(url.path)
+        page = self._pages.get((path, url.query))
+        if page is not None:
+            return page
+        if not path.startswith('/api/'):
+            raise QueryError(404, f"Unknown resource: {path}")
+        parts = path[len('/api/'):].split('/')
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        with self._lock:
+            page = Page(self._build(parts, params))
+            self._pages[(path, url.query)] = page
+            while len(self._pages) > MAX_CACHED_PAGES:
+                self._pages.popitem(last=False)
+        return page
+
+    def invalidate(self, path: str):
+        """Forget listings, records and pages that a change to ``path`` affects."""
+        path = os.path.abspath(path)
+        relative = os.path.relpath(path, self.root).split(os.sep)
+        if relative[0] in ('.', '..'):
+            return
+        project = relative[0]
+        kind = KIND_BY_DIR.get(relative[1]) if len(relative) > 1 else None
+        if len(relative) > 1 and kind is None:
+            return  # logs, backups, permission store: not served
+        with self._lock:
+            self._records.pop(path, None)
+            for key in [key for key in self._listings if key[0] == project and kind in (None, key[1])]:
+                del self._listings[key]
+            prefix = f'/api/projects/{project}/'
+            for key in [key for key in self._pages
+                        if key[0] == '/api/projects' or key[0].startswith(prefix)]:
+                del self._pages[key]
+
+    def watch(self):
+        """Invalidate on filesystem events under the root, through the process-wide watch service."""
+        from watchdog.events import FileSystemEventHandler
+        from .watch_service import get_watch_service
+
+        index = self
+
+        class InvalidatingHandler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.event_type in ('opened', 'closed_no_write'):
+                    return
+                index.invalidate(event.src_path)
+                if getattr(event, 'dest_path', ''):
+                    index.invalidate(event.dest_path)
+
+        get_watch_service().subscribe(id(self), [self.root], InvalidatingHandler())
+
+    def unwatch(self):
+        """Stop invalidating on filesystem events."""
+        from .watch_service import get_watch_service
+        get_watch_service().unsubscribe(id(self))
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """GET/HEAD handler with ETag revalidation, gzip and keep-alive."""
+    protocol_version = 'HTTP/1.1'
+    server_version = 'SigFileQuery/1.0'
+    # Headers and body go out in separate writes; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._respond(include_body=True)
+
+    def do_HEAD(self):
+        self._respond(include_body=False)
+
+    def _respond(self, include_body: bool):
+        host = _host_name(self.headers.get('Host', ''))
+        if host not in LOCAL_HOSTS and host != self.server.server_address[0]:
+            self._send(403, Page({'error': f"Host not allowed: {host}"}), include_body)
+            return
+        try:
+            page = self.server.index.page(self.path)
+        except QueryError as e:
+            self._send(e.status, Page({'error': str(e)}), include_body)
+        except Exception as e:
+            logger.error(f"Error serving {self.path}: {str(e)}")
+            self._send(500, Page({'error': 'Internal error'}), include_body)
+        else:
+            if page.etag in self.headers.get('If-None-Match', ''):
+                self.send_response(304)
+                self.send_header('ETag', page.etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+            else:
+                self._send(200, page, include_body)
+
+    def _send(self, status: int, page: Page, include_body: bool):
+        body = page.body
+        use_gzip = len(body) >= GZIP_MIN_SIZE and 'gzip' in self.headers.get('Accept-Encoding', '')
+        if use_gzip:
+            body = page.gzipped
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', page.etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding, Origin')
+        allowed = self.server.allow_origin
+        if allowed is not None and self.headers.get('Origin') == allowed:
+            self.send_header('Access-Control-Allow-Origin', allowed)
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+class QueryServer(ThreadingHTTPServer):
+    """HTTP server bound to a QueryIndex.
+
+    ``allow_origin`` is the one web origin allowed to read responses
+    cross-origin; by default none is.
+    """
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], index: Optional[QueryIndex] = None,
+                 allow_origin: Optional[str] = None):
+        self.index = index or QueryIndex()
+        self.allow_origin = allow_origin
+        super().__init__(address, QueryRequestHandler)
+
+def serve(host: str = '127.0.0.1', port: int = 8765, root: str = PROJECTS_ROOT,
+          allow_origin: Optional[str] = None):
+    """Run the query API in the foreground until interrupted."""
+    index = QueryIndex(root)
+    index.watch()
+    server = QueryServer((host, port), index, allow_origin)
+    logger.info(f"SigFile query API listening on http://{host}:{server.server_address[1]}/api/projects")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        index.unwatch()
@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
 
+import os
 import json
-from datetime import datetime
-from typing import Dict, List, Any, Optional
+import heapq
+from datetime import date as date_type, datetime, timedelta
+from typing import Dict, Iterator, List, Any, Optional, Tuple, Union
 from pathlib import Path
 
+# Accepted bounds for range queries: datetimes, dates, 'YYYYMMDD' or ISO strings
+TimeBound = Union[datetime, date_type, str, None]
+
 class RecordFormat:
     """Standardized record format for all tracking types."""
     
@@ -76,19 +81,123 @@ class RecordFormat:
         date: Optional[str] = None,
         limit: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """Load records from the appropriate directory."""
+        """Load the records of one day (YYYYMMDD, default today) from the appropriate directory."""
         if date is None:
             date = datetime.now().strftime('%Y%m%d')
         
-        record_dir = base_dir / record_type / date
-        if not record_dir.exists():
-            return []
+        start = datetime.strptime(date, '%Y%m%d')
+        return list(RecordFormat.iter_records(
+            base_dir, record_type, since=start, until=start + timedelta(days=1), limit=limit or None
+        ))
+    
+    @staticmethod
+    def _parse_bound(value: TimeBound) -> Optional[datetime]:
+        """Convert a range bound to a datetime."""
+        if value is None or isinstance(value, datetime):
+            return value
+        if isinstance(value, date_type):
+            return datetime(value.year, value.month, value.day)
+        if len(value) == 8 and value.isdigit():
+            return datetime.strptime(value, '%Y%m%d')
+        return datetime.fromisoformat(value)
+    
+    @staticmethod
+    def _file_time(name: str, day: datetime) -> datetime:
+        """Get a record's time from its file name, falling back to its day.
+        
+        Record files are named ``<type>_YYYYMMDD_HHMMSS[_ffffff].json``.
+        """
+        stem = name[:-5]
+        for fmt, width in (('%Y%m%d_%H%M%S_%f', 22), ('%Y%m%d_%H%M%S', 15)):
+            try:
+                return datetime.strptime(stem[-width:], fmt)
+            except ValueError:
+                continue
+        return day
+    
+    @staticmethod
+    def _iter_type_files(
+        type_dir: Path,
+        since: Optional[datetime],
+        until: Optional[datetime],
+        newest_first: bool
+    ) -> Iterator[Tuple[datetime, str]]:
+        """Yield (time, path) of record files in range, one day at a time.
         
-        records = []
-        for record_file in sorted(record_dir.glob('*.json'), reverse=True):
-            with open(record_file) as f:
-                records.append(json.load(f))
-            if limit and len(records) >= limit:
-                break
+        Only directory listings are read here; no record file is opened.
+        """
+        try:
+            with os.scandir(type_dir) as entries:
+                days = [e.name for e in entries
+                        if len(e.name) == 8 and e.name.isdigit() and e.is_dir()]
+        except FileNotFoundError:
+            return
+        
+        since_day = since.strftime('%Y%m%d') if since else None
+        until_day = until.strftime('%Y%m%d') if until else None
+        days = [d for d in days
+                if (since_day is None or d >= since_day) and (until_day is None or d <= until_day)]
+        days.sort(reverse=newest_first)
         
-        return records 
\ No newline at end of file
+        for day_name in days:
+            day = datetime.strptime(day_name, '%Y%m%d')
+            day_dir = type_dir / day_name
+            with os.scandir(day_dir) as entries:
+                names = [e.name for e in entries if e.name.endswith('.json')]
+            files = []
+            for name in names:
+                file_time = RecordFormat._file_time(name, day)
+                if since is not None and file_time < since:
+                    continue
+                if until is not None and file_time >= until:
+                    continue
+                files.append((file_time, name))
+            files.sort(reverse=newest_first)
+            for file_time, name in files:
+                yield file_time, str(day_dir / name)
+    
+    @staticmethod
+    def iter_records(
+        base_dir: Path,
+        record_type: Union[str, List[str], None] = None,
+        since: TimeBound = None,
+        until: TimeBound = None,
+        newest_first: bool = True,
+        limit: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Lazily iterate records whose time falls in ``[since, until)``.
+        
+        Date directories outside the range are skipped by name and record
+        files are filtered by the time in their file name, so only the
+        records actually yielded are opened. ``record_type`` may be a single
+        type, a list of types, or None for every type under ``base_dir``.
+        Records of several types are merged in time order.
+        """
+        base_dir = Path(base_dir)
+        since_dt = RecordFormat._parse_bound(since)
+        until_dt = RecordFormat._parse_bound(until)
+        
+        if record_type is None:
+            try:
+                with os.scandir(base_dir) as entries:
+                    types = sorted(e.name for e in entries if e.is_dir())
+            except FileNotFoundError:
+                return
+        elif isinstance(record_type, str):
+            types = [record_type]
+        else:
+            types = list(record_type)
+        
+        sources = [RecordFormat._iter_type_files(base_dir / t, since_dt, until_dt, newest_first)
+                   for t in types]
+        merged = sources[0] if len(sources) == 1 else heapq.merge(*sources, reverse=newest_first)
+        
+        count = 0
+        for _, record_file in merged:
+            if limit is not None and count >= limit:
+                return
+            # Closed before yielding, so a caller stopping early leaves no file open
+            with open(record_file) as f:
+                record = json.load(f)
+            yield record
+            count += 1 
\ No newline at end of file
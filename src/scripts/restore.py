@@ -0,0 +1,109 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from .backup_index import BackupEntry, BackupIndex
+from .backup_workers import copy_file
+from .day_sealer import file_hash, load_manifest
+
+logger = logging.getLogger(__name__)
+
+def parse_time(value: str) -> float:
+    """Parse YYYYMMDD (the end of that day) or an ISO 8601 date/time into a timestamp."""
+    if len(value) == 8 and value.isdigit():
+        return (datetime.strptime(value, '%Y%m%d') + timedelta(days=1)).timestamp() - 1e-6
+    return datetime.fromisoformat(value).timestamp()
+
+class _Manifests:
+    """Seal manifests of backup day directories, each loaded once."""
+
+    def __init__(self):
+        self._manifests: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def sha256(self, backup_path: str) -> Optional[str]:
+        directory, name = os.path.split(backup_path)
+        with self._lock:
+            manifest = self._manifests.get(directory)
+            if manifest is None:
+                manifest = self._manifests[directory] = load_manifest(directory)
+        return manifest.get('files', {}).get(name, {}).get('sha256')
+
+def restore_snapshot(index: BackupIndex, at: float, dest: str, root: Optional[str] = None,
+                     workers: Optional[int] = None, verify: bool = True, overwrite: bool = False) -> Dict:
+    """Restore every path as it was at ``at`` under ``dest``, from its newest backup by then.
+
+    Paths are placed relative to ``root`` (default: the deepest directory
+    containing them all). Files are copied on a thread pool, by reflink or
+    in-kernel copy where the filesystem allows, and given the time their
+    backup was taken. With ``verify``, each restored file is hashed and
+    compared with the hash recorded for its backup (in the index, or else
+    in its day's seal manifest); backups without a recorded hash are only
+    checked by size. Files moved before ``at`` are restored at their new
+    path from the backup they were moved from; deleted files are left out.
+
+    Returns counts and the paths that failed, with why.
+    """
+    entries = index.as_of(at)
+    result = {'restored': 0, 'bytes': 0, 'verified': 0, 'skipped': 0, 'failed': {}, 'seconds': 0.0}
+    if not entries:
+        return result
+    start = time.monotonic()
+    absolute = [entry.path for entry in entries if os.path.isabs(entry.path)]
+    if root is None and absolute:
+        root = os.path.dirname(absolute[0]) if len(absolute) == 1 else os.path.commonpath(absolute)
+    targets = []
+    for entry in entries:
+        # Backups indexed by --reindex only know their base name
+        rel_path = os.path.relpath(entry.path, root) if os.path.isabs(entry.path) else entry.path
+        if rel_path == os.pardir or rel_path.startswith(os.pardir + os.sep):
+            result['failed'][entry.path] = f"outside {root}"
+            continue
+        targets.append((entry, os.path.join(dest, rel_path)))
+    # Directories are created up front so the workers only copy
+    for directory in sorted({os.path.dirname(target) for _, target in targets}):
+        os.makedirs(directory, exist_ok=True)
+
+    manifests = _Manifests()
+    lock = threading.Lock()
+
+    def restore_one(entry: BackupEntry, target: str):
+        try:
+            flags = os.O_WRONLY | os.O_CREAT | (os.O_TRUNC if overwrite else os.O_EXCL)
+            with open(entry.backup_path, 'rb') as f_in:
+                with os.fdopen(os.open(target, flags, 0o644), 'wb') as f_out:
+                    copy_file(f_in.fileno(), f_out.fileno())
+            os.utime(target, (entry.taken, entry.taken))
+            expected = (entry.sha256 or manifests.sha256(entry.backup_path)) if verify else None
+            size = os.path.getsize(target)
+            if size != entry.size:
+                problem = f"size {size} != {entry.size}"
+            elif expected is not None and file_hash(target) != expected:
+                problem = 'hash mismatch'
+            else:
+                problem = None
+        except FileExistsError:
+            problem = 'exists'
+        except OSError as e:
+            problem = str(e)
+        with lock:
+            if problem == 'exists':
+                result['skipped'] += 1
+            elif problem is not None:
+                result['failed'][entry.path] = problem
+            else:
+                result['restored'] += 1
+                result['bytes'] += entry.size
+                result['verified'] += expected is not None
+
+    with ThreadPoolExecutor(workers or min(32, (os.cpu_count() or 1) * 4), thread_name_prefix='restore') as pool:
+        for entry, target in targets:
+            pool.submit(restore_one, entry, target)
+    result['seconds'] = time.monotonic() - start
+    logger.info(f"Restored {result['restored']} files ({result['bytes']} bytes) to {dest} "
+                f"in {result['seconds']:.2f}s; {len(result['failed'])} failed")
+    return result
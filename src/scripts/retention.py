@@ -0,0 +1,164 @@
+import os
+import time
+import logging
+from dataclasses import dataclass, field
+from itertools import groupby
+from typing import Callable, Dict, List, Optional
+
+from .backup_index import BackupEntry, BackupIndex
+from .day_sealer import SEAL_MANIFEST, forget_files
+
+logger = logging.getLogger(__name__)
+
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+
+def parse_duration(value: str) -> float:
+    """Parse a duration such as 90s, 30m, 24h, 7d or 2w into seconds."""
+    value = str(value).strip().lower()
+    try:
+        if value[-1:] in _UNITS:
+            return float(value[:-1]) * _UNITS[value[-1]]
+        return float(value)
+    except ValueError:
+        logger.error(f"Invalid duration: {value}")
+        raise ValueError(f"Invalid duration: {value} (use e.g. 30m, 24h, 7d)")
+
+@dataclass
+class RetentionPolicy:
+    """Which backups of a path to keep, by age.
+
+    Every backup younger than ``keep_all`` is kept; up to ``hourly`` old,
+    the newest backup of each hour; up to ``daily`` old, the newest of each
+    day. The newest ``keep_last`` backups of every path are kept forever.
+    """
+    keep_all: float = 24 * 3600
+    hourly: float = 7 * 86400
+    daily: float = 90 * 86400
+    keep_last: int = 3
+
+    def classify(self, versions: List[BackupEntry], now: float) -> Dict[str, str]:
+        """Map the backup path of each version to keep to the rule keeping it; versions are newest first."""
+        kept = {}
+        hours, days = set(), set()
+        for position, entry in enumerate(versions):
+            age = now - entry.taken
+            local = time.localtime(entry.taken)
+            if position < self.keep_last:
+                kept[entry.backup_path] = 'last'
+            elif age <= self.keep_all:
+                kept[entry.backup_path] = 'recent'
+            elif age <= self.hourly and local[:4] not in hours:
+                kept[entry.backup_path] = 'hourly'
+            elif age <= self.daily and local[:3] not in days:
+                kept[entry.backup_path] = 'daily'
+            # A kept version covers its hour and day for the older ones
+            if entry.backup_path in kept:
+                hours.add(local[:4])
+                days.add(local[:3])
+        return kept
+
+@dataclass
+class RetentionPlan:
+    """Backups a policy deletes, and why the others are kept."""
+    delete: List[BackupEntry] = field(default_factory=list)
+    kept: Dict[str, int] = field(default_factory=dict)
+    kept_bytes: int = 0
+
+    @property
+    def reclaimed_bytes(self) -> int:
+        return sum(entry.size for entry in self.delete)
+
+    def report(self, top: int = 10) -> Dict:
+        """Summary for a dry run: counts, bytes reclaimed and the paths reclaiming most."""
+        by_path: Dict[str, List[int]] = {}
+        for entry in self.delete:
+            totals = by_path.setdefault(entry.path, [0, 0])
+            totals[0] += 1
+            totals[1] += entry.size
+        largest = sorted(by_path.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        return {
+            'delete': len(self.delete),
+            'reclaimed_bytes': self.reclaimed_bytes,
+            'keep': sum(self.kept.values()),
+            'kept_bytes': self.kept_bytes,
+            'kept_by_rule': dict(self.kept),
+            'top_paths': [{'path': path, 'backups': count, 'bytes': size}
+                          for path, (count, size) in largest],
+        }
+
+def plan_retention(index: BackupIndex, policy: RetentionPolicy, now: Optional[float] = None) -> RetentionPlan:
+    """Work out what a policy deletes from the index alone; nothing on disk is read."""
+    now = time.time() if now is None else now
+    plan = RetentionPlan()
+    for _, group in groupby(index.entries(), key=lambda entry: entry.path):
+        versions = list(group)
+        kept = policy.classify(versions, now)
+        for entry in versions:
+            rule = kept.get(entry.backup_path)
+            if rule is None:
+                plan.delete.append(entry)
+            else:
+                plan.kept[rule] = plan.kept.get(rule, 0) + 1
+                plan.kept_bytes += entry.size
+    return plan
+
+def _delete_batch(batch: List[BackupEntry]) -> Dict[str, List[str]]:
+    """Delete one batch of backups, unsealing them first; returns the deleted names per directory."""
+    from .file_attributes import apply_immutable
+
+    paths = [entry.backup_path for entry in batch]
+    apply_immutable(paths, immutable=False)
+    deleted: Dict[str, List[str]] = {}
+    for path in paths:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass  # Already gone: only the index entry is left to drop
+        except OSError as e:
+            logger.error(f"Error deleting backup {path}: {str(e)}")
+            continue
+        deleted.setdefault(os.path.dirname(path), []).append(os.path.basename(path))
+    return deleted
+
+def _remove_if_empty(directory: str):
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return
+    if names in ([], [SEAL_MANIFEST]):
+        for name in names:
+            os.unlink(os.path.join(directory, name))
+        os.rmdir(directory)
+
+def apply_retention(index: BackupIndex, plan: RetentionPlan, batch_size: int = 500,
+                    max_rate: Optional[float] = None, sleep: Callable[[float], None] = time.sleep) -> Dict[str, int]:
+    """Delete a plan's backups in batches, at most ``max_rate`` files per second.
+
+    Each batch is unsealed in bulk, unlinked, dropped from the seal
+    manifests and removed from the index in one transaction. Emptied day
+    directories are removed at the end.
+    """
+    result = {'deleted': 0, 'failed': 0, 'reclaimed_bytes': 0}
+    sizes = {entry.backup_path: entry.size for entry in plan.delete}
+    touched = set()
+    start = time.monotonic()
+    for offset in range(0, len(plan.delete), batch_size):
+        batch = plan.delete[offset:offset + batch_size]
+        deleted = _delete_batch(batch)
+        removed = [os.path.join(directory, name) for directory, names in deleted.items() for name in names]
+        for directory, names in deleted.items():
+            forget_files(directory, names)
+            touched.add(directory)
+        index.remove(removed)
+        result['deleted'] += len(removed)
+        result['failed'] += len(batch) - len(removed)
+        result['reclaimed_bytes'] += sum(sizes[path] for path in removed)
+        if max_rate:
+            # Stay under the rate on average, so a large cleanup does not swamp the disk
+            ahead = result['deleted'] / max_rate - (time.monotonic() - start)
+            if ahead > 0:
+                sleep(ahead)
+    for directory in touched:
+        _remove_if_empty(directory)
+    logger.info(f"Deleted {result['deleted']} backups, reclaiming {result['reclaimed_bytes']} bytes")
+    return result
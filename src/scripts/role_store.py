@@ -0,0 +1,246 @@
+import os
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Map up to 64MB of the database into memory for lookups
+MMAP_SIZE = 64 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_roles (
+    path TEXT NOT NULL,
+    role TEXT NOT NULL,
+    PRIMARY KEY (path, role)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS role_overrides (
+    path TEXT PRIMARY KEY,
+    roles TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS role_permissions (
+    role TEXT NOT NULL,
+    operation TEXT NOT NULL,
+    allowed INTEGER NOT NULL,
+    PRIMARY KEY (role, operation)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS saved_modes (
+    path TEXT PRIMARY KEY,
+    mode INTEGER NOT NULL,
+    uid INTEGER NOT NULL,
+    gid INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS elevated (
+    path TEXT PRIMARY KEY,
+    since REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dev_sessions (
+    root TEXT PRIMARY KEY,
+    started REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dev_files (
+    path TEXT PRIMARY KEY,
+    mode INTEGER NOT NULL,
+    immutable INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dev_dirs (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    names TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+def _prefix_range(root: str) -> Tuple[str, str]:
+    """Bounds of the paths strictly under ``root`` for an index range scan."""
+    prefix = root.rstrip(os.sep) + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+class RoleStore:
+    """Persistent store for role assignments and saved file modes.
+
+    Backed by SQLite in WAL mode with memory-mapped I/O, so any process can
+    answer lookups such as "who may write X" straight from the mapped file,
+    and every update is a transaction. Roles are stored by their string
+    value to keep this module independent of the FileRole enum.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        self._conn.executescript(SCHEMA)
+        self._depth = 0
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Group updates into one atomic transaction (nesting is allowed)."""
+        with self._lock:
+            outer = self._depth == 0
+            if outer:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield self._conn
+            except BaseException:
+                self._depth -= 1
+                if outer:
+                    self._conn.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if outer:
+                self._conn.execute("COMMIT")
+
+    def _query(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        """Run a read query and return all rows."""
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    # Role assignments
+
+    def add_role(self, path: str, role: str):
+        """Grant a role on a path."""
+        with self.transaction() as conn:
+            conn.execute("INSERT OR IGNORE INTO file_roles (path, role) VALUES (?, ?)", (path, role))
+
+    def remove_role(self, path: str, role: str):
+        """Revoke a role on a path."""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM file_roles WHERE path = ? AND role = ?", (path, role))
+
+    def grants(self) -> Dict[str, Set[str]]:
+        """Get every role grant as path -> roles."""
+        grants: Dict[str, Set[str]] = {}
+        for path, role in self._query("SELECT path, role FROM file_roles"):
+            grants.setdefault(path, set()).add(role)
+        return grants
+
+    def set_override(self, path: str, roles: Optional[Iterable[str]]):
+        """Pin the exact roles of a path, or clear its override with None."""
+        with self.transaction() as conn:
+            if roles is None:
+                conn.execute("DELETE FROM role_overrides WHERE path = ?", (path,))
+            else:
+                conn.execute("INSERT OR REPLACE INTO role_overrides (path, roles) VALUES (?, ?)",
+                             (path, ','.join(sorted(roles))))
+
+    def overrides(self) -> Dict[str, Set[str]]:
+        """Get every per-path override as path -> roles."""
+        return {path: set(roles.split(',')) if roles else set()
+                for path, roles in self._query("SELECT path, roles FROM role_overrides")}
+
+    # Role permission overrides
+
+    def set_role_permission(self, role: str, operation: str, allowed: bool):
+        """Persist whether a role may perform an operation."""
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO role_permissions (role, operation, allowed) VALUES (?, ?, ?)",
+                         (role, operation, int(allowed)))
+
+    def role_permissions(self) -> Dict[str, Dict[str, bool]]:
+        """Get stored role permissions as role -> operation -> allowed."""
+        permissions: Dict[str, Dict[str, bool]] = {}
+        for role, operation, allowed in self._query("SELECT role, operation, allowed FROM role_permissions"):
+            permissions.setdefault(role, {})[operation] = bool(allowed)
+        return permissions
+
+    # Saved modes
+
+    def save_mode(self, path: str, mode: int, uid: int, gid: int):
+        """Remember a file's mode and ownership, keeping the first one saved."""
+        with self.transaction() as conn:
+            conn.execute("INSERT OR IGNORE INTO saved_modes (path, mode, uid, gid) VALUES (?, ?, ?, ?)",
+                         (path, mode, uid, gid))
+
+    def get_mode(self, path: str) -> Optional[Dict[str, int]]:
+        """Get a saved mode as a dict with mode, uid and gid."""
+        rows = self._query("SELECT mode, uid, gid FROM saved_modes WHERE path = ?", (path,))
+        if not rows:
+            return None
+        mode, uid, gid = rows[0]
+        return {'mode': mode, 'uid': uid, 'gid': gid}
+
+    def pop_mode(self, path: str) -> Optional[Dict[str, int]]:
+        """Remove and return a saved mode."""
+        with self.transaction() as conn:
+            saved = self.get_mode(path)
+            conn.execute("DELETE FROM saved_modes WHERE path = ?", (path,))
+        return saved
+
+    def saved_paths(self) -> List[str]:
+        """Get every path with a saved mode."""
+        return [row[0] for row in self._query("SELECT path FROM saved_modes")]
+
+    # Elevated permissions
+
+    def set_elevated(self, path: str, since: float):
+        """Record that a path's permissions were elevated at ``since``."""
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO elevated (path, since) VALUES (?, ?)", (path, since))
+
+    def elevated(self) -> Dict[str, float]:
+        """Get elevated paths and when they were elevated."""
+        return dict(self._query("SELECT path, since FROM elevated"))
+
+    def clear_elevated_before(self, cutoff: float) -> int:
+        """Forget elevations older than ``cutoff``; return how many."""
+        with self.transaction() as conn:
+            return conn.execute("DELETE FROM elevated WHERE since < ?", (cutoff,)).rowcount
+
+    # Dev mode sessions
+
+    def begin_dev_session(self, root: str, started: float,
+                          files: Iterable[Tuple[str, int, bool]],
+                          dirs: Iterable[Tuple[str, int, List[str]]]):
+        """Record the manifest of a dev mode session atomically.
+
+        ``files`` are (path, mode, immutable) of the files unsealed on entry
+        and ``dirs`` are (path, mtime_ns, names) of every directory under
+        the root, including the root itself.
+        """
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO dev_sessions (root, started) VALUES (?, ?)", (root, started))
+            conn.executemany("INSERT OR REPLACE INTO dev_files (path, mode, immutable) VALUES (?, ?, ?)",
+                             ((path, mode, int(immutable)) for path, mode, immutable in files))
+            conn.executemany("INSERT OR REPLACE INTO dev_dirs (path, mtime_ns, names) VALUES (?, ?, ?)",
+                             ((path, mtime, '\0'.join(names)) for path, mtime, names in dirs))
+
+    def dev_session_started(self, root: str) -> Optional[float]:
+        """Get when the dev mode session on ``root`` started, if one is active."""
+        rows = self._query("SELECT started FROM dev_sessions WHERE root = ?", (root,))
+        return rows[0][0] if rows else None
+
+    def dev_session_roots(self) -> List[str]:
+        """Get the roots of all active dev mode sessions."""
+        return [row[0] for row in self._query("SELECT root FROM dev_sessions")]
+
+    def dev_files(self, root: str) -> List[Tuple[str, int, bool]]:
+        """Get (path, mode, immutable) of the files unsealed under ``root``."""
+        low, high = _prefix_range(root)
+        return [(path, mode, bool(immutable)) for path, mode, immutable in self._query(
+            "SELECT path, mode, immutable FROM dev_files WHERE path >= ? AND path < ?", (low, high))]
+
+    def dev_dirs(self, root: str) -> Dict[str, Tuple[int, Set[str]]]:
+        """Get path -> (mtime_ns, names) of the directories recorded under ``root``."""
+        low, high = _prefix_range(root)
+        rows = self._query("SELECT path, mtime_ns, names FROM dev_dirs WHERE path = ? OR (path >= ? AND path < ?)",
+                           (root, low, high))
+        return {path: (mtime, set(names.split('\0')) if names else set()) for path, mtime, names in rows}
+
+    def end_dev_session(self, root: str):
+        """Forget the manifest of the dev mode session on ``root``."""
+        low, high = _prefix_range(root)
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM dev_sessions WHERE root = ?", (root,))
+            conn.execute("DELETE FROM dev_files WHERE path >= ? AND path < ?", (low, high))
+            conn.execute("DELETE FROM dev_dirs WHERE path = ? OR (path >= ? AND path < ?)", (root, low, high))
@@ -0,0 +1,142 @@
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+class _Node:
+    """One path component with the roles granted there."""
+    __slots__ = ('children', 'mask', 'override')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.mask = 0
+        self.override: Optional[int] = None
+
+class RoleTrie:
+    """Role grants keyed by path component, with roles as bitmasks.
+
+    A grant on a path applies to that path and everything below it, so a
+    directory grant costs one node however many files it covers. A path's
+    roles are the union of the grants on it and its ancestors, unless the
+    path has an override, which replaces the inherited roles for that exact
+    path only.
+    """
+
+    def __init__(self):
+        self._root = _Node()
+
+    @staticmethod
+    def _components(path: str) -> List[str]:
+        return [part for part in os.path.abspath(path).split(os.sep) if part]
+
+    def _node(self, path: str, create: bool = False) -> Optional[_Node]:
+        """Find the node for a path, optionally creating it."""
+        node = self._root
+        for part in self._components(path):
+            child = node.children.get(part)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[part] = _Node()
+            node = child
+        return node
+
+    def grant(self, path: str, mask: int):
+        """Grant roles on a path and everything below it."""
+        node = self._node(path, create=True)
+        node.mask |= mask
+        if node.override is not None:
+            node.override |= mask
+
+    def revoke(self, path: str, mask: int):
+        """Revoke roles on a path.
+
+        Roles still inherited from an ancestor are masked out with an
+        override on this path.
+        """
+        node = self._node(path)
+        if node is not None:
+            node.mask &= ~mask
+        effective = self.resolve(path)
+        if effective & mask:
+            self.set_override(path, effective & ~mask)
+        else:
+            self._prune(path)
+
+    def set_override(self, path: str, mask: Optional[int]):
+        """Pin the exact roles of one path, or clear its override with None."""
+        if mask is None:
+            node = self._node(path)
+            if node is not None:
+                node.override = None
+                self._prune(path)
+        else:
+            self._node(path, create=True).override = mask
+
+    def override(self, path: str) -> Optional[int]:
+        """Get the override of a path, if it has one."""
+        node = self._node(path)
+        return node.override if node is not None else None
+
+    def _prune(self, path: str):
+        """Remove nodes left without grants, overrides or children."""
+        trail = [self._root]
+        parts = self._components(path)
+        for part in parts:
+            child = trail[-1].children.get(part)
+            if child is None:
+                return
+            trail.append(child)
+        for part, parent, node in zip(reversed(parts), reversed(trail[:-1]), reversed(trail[1:])):
+            if node.children or node.mask or node.override is not None:
+                break
+            del parent.children[part]
+
+    def resolve(self, path: str) -> int:
+        """Get the roles in effect on a path."""
+        node = self._root
+        mask = node.mask
+        for part in self._components(path):
+            node = node.children.get(part)
+            if node is None:
+                return mask
+            mask |= node.mask
+        return mask if node.override is None else node.override
+
+    def resolve_many(self, paths: Iterable[str]) -> List[int]:
+        """Get the roles in effect on many paths, resolving each directory once."""
+        parents: Dict[str, Tuple[Optional[_Node], int]] = {}
+        results = []
+        for path in paths:
+            parent, name = os.path.split(os.path.abspath(path))
+            if parent not in parents:
+                node = self._root
+                mask = node.mask
+                for part in self._components(parent):
+                    node = node.children.get(part)
+                    if node is None:
+                        break
+                    mask |= node.mask
+                parents[parent] = (node, mask)
+            node, mask = parents[parent]
+            child = node.children.get(name) if node is not None and name else None
+            if child is None:
+                results.append(mask)
+            else:
+                results.append(mask | child.mask if child.override is None else child.override)
+        return results
+
+    def rules(self) -> Iterator[Tuple[str, int, Optional[int]]]:
+        """Yield (path, mask, override) for every path with a grant or override."""
+        stack = [(os.sep, self._root)]
+        while stack:
+            path, node = stack.pop()
+            if node.mask or node.override is not None:
+                yield path, node.mask, node.override
+            for part, child in node.children.items():
+                stack.append((os.path.join(path, part), child))
+
+    def clear(self):
+        """Drop every grant and override."""
+        self._root = _Node()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.rules())
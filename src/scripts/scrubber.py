@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .day_sealer import SEAL_MANIFEST, load_manifest
+from .project_context import CONFIG_DIRS, ProjectContext
+
+logger = logging.getLogger(__name__)
+
+# Scrub progress and open findings, in the project directory
+SCRUB_STATE = 'scrub_state.json'
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+# Default I/O budget: bytes read per second
+DEFAULT_RATE = 8 * 1024 * 1024
+
+# Files written this recently are likely still being read, so their pages stay cached
+HOT_AGE = 3600
+
+# Progress is saved at least this often, so an interrupted pass loses little work
+SAVE_EVERY = 200
+
+def _read_hash(path: str, throttle: Callable[[int], None]) -> Tuple[int, str]:
+    """Hash a file, leaving the page cache as it was for cold files.
+
+    Pages are read sequentially and dropped with POSIX_FADV_DONTNEED right
+    after hashing, unless the file was modified within HOT_AGE, so a
+    scrub does not push the working set out of the cache.
+    """
+    digest = hashlib.sha256()
+    fd = os.open(path, os.O_RDONLY | getattr(os, 'O_NOFOLLOW', 0))
+    try:
+        fadvise = getattr(os, 'posix_fadvise', None)
+        if fadvise is not None and time.time() - os.fstat(fd).st_mtime < HOT_AGE:
+            fadvise = None
+        if fadvise is not None:
+            fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        offset = 0
+        while True:
+            chunk = os.read(fd, READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            if fadvise is not None:
+                fadvise(fd, offset, len(chunk), os.POSIX_FADV_DONTNEED)
+            offset += len(chunk)
+            throttle(len(chunk))
+    finally:
+        os.close(fd)
+    return offset, digest.hexdigest()
+
+def _components(rel_dir: str) -> Tuple[str, ...]:
+    return tuple(part for part in rel_dir.split('/') if part)
+
+class Scrubber:
+    """Re-verifies a project's sealed records and backups against the hashes recorded at write time.
+
+    Sealed files are checked against their directory's seal manifest, and
+    backups against the hash in the backup index where it was recorded
+    when they were made (the manifest has it otherwise). Work
+    proceeds in path order from a cursor saved in SCRUB_STATE, so a pass
+    can be spread over many short runs and resumes after a restart. Reads
+    are held to ``max_rate`` bytes per second.
+
+    Findings are kept in the state until the file verifies again: a file
+    that is missing, changed size or content, or was made writable again.
+    """
+
+    def __init__(self, context: ProjectContext, index=None, max_rate: Optional[float] = DEFAULT_RATE,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.context = context
+        self.index = index
+        self.max_rate = max_rate
+        self.sleep = sleep
+        self.state_path = context.path(SCRUB_STATE)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def load_state(self) -> Dict:
+        """The saved cursor, pass times, totals and open findings."""
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'cursor': None, 'pass_started': None, 'last_pass': None, 'problems': {}}
+
+    def _save_state(self, state: Dict):
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    def _expected(self, directory: str, kind: str) -> Dict[str, Dict]:
+        """Size and hash recorded for each verifiable file of a directory, by name."""
+        expected = {}
+        if kind == 'backups' and self.index is not None:
+            for backup_path, size, sha256 in self.index.hashes(directory):
+                if sha256:
+                    expected[os.path.basename(backup_path)] = {'size': size, 'sha256': sha256}
+        if os.path.exists(os.path.join(directory, SEAL_MANIFEST)):
+            # Backups' manifest entries leave the hash to the index
+            for name, entry in load_manifest(directory).get('files', {}).items():
+                expected[name] = {**expected.get(name, {}), **entry}
+        return {name: entry for name, entry in expected.items() if entry.get('sha256')}
+
+    def _files(self, cursor: Optional[List[str]]) -> Iterator[Tuple[str, str, Dict]]:
+        """(relative directory, name, expected) for every verifiable file after ``cursor``, in path order."""
+        after = (_components(cursor[0]), cursor[1]) if cursor else None
+        for kind in sorted(CONFIG_DIRS):
+            if kind == 'logs':
+                continue
+            root = self.context.path(kind)
+            for directory, dirnames, _ in os.walk(root):
+                # Sorted children make the walk follow path order, which the cursor relies on
+                dirnames.sort()
+                rel_dir = os.path.relpath(directory, self.context.base_dir).replace(os.sep, '/')
+                position = _components(rel_dir)
+                if after is not None and position < after[0] and after[0][:len(position)] != position:
+                    dirnames[:] = []  # Entirely before the cursor
+                    continue
+                if after is not None and position < after[0]:
+                    continue
+                expected = self._expected(directory, kind)
+                for name in sorted(expected):
+                    if after is not None and (position, name) <= after:
+                        continue
+                    yield rel_dir, name, expected[name]
+
+    def _check(self, path: str, expected: Dict, throttle: Callable[[int], None]) -> Optional[str]:
+        """The problem with one file, if any."""
+        try:
+            st = os.lstat(path)
+        except FileNotFoundError:
+            return 'missing'
+        if st.st_size != expected.get('size', st.st_size):
+            return f"size changed from {expected['size']} to {st.st_size}"
+        if _read_hash(path, throttle)[1] != expected['sha256']:
+            return 'hash mismatch'
+        # Sealing leaves files read-only; backups not sealed yet are still writable
+        if expected.get('sealed_at') and st.st_mode & 0o222:
+            return 'writable'
+        return None
+
+    def scrub(self, max_bytes: Optional[int] = None, max_files: Optional[int] = None,
+              restart: bool = False) -> Dict:
+        """Verify files from the saved cursor until the pass ends or a limit is reached.
+
+        Returns what this run covered: files, bytes, the problems it found,
+        and whether the pass completed.
+        """
+        state = self.load_state()
+        if restart or state.get('cursor') is None:
+            state['cursor'] = None
+            state['pass_started'] = time.time()
+        problems = state.setdefault('problems', {})
+        result = {'files': 0, 'bytes': 0, 'problems': {}, 'complete': False}
+        start = time.monotonic()
+
+        def throttle(read: int):
+            result['bytes'] += read
+            if self.max_rate:
+                ahead = result['bytes'] / self.max_rate - (time.monotonic() - start)
+                if ahead > 0:
+                    self.sleep(ahead)
+
+        files = self._files(state['cursor'])
+        try:
+            for rel_dir, name, expected in files:
+                if self._stop.is_set() or (max_files is not None and result['files'] >= max_files) \
+                        or (max_bytes is not None and result['bytes'] >= max_bytes):
+                    break
+                path = f"{rel_dir}/{name}"
+                try:
+                    problem = self._check(os.path.join(self.context.base_dir, rel_dir, name), expected, throttle)
+                except OSError as e:
+                    problem = f"unreadable: {e.strerror or e}"
+                result['files'] += 1
+                if problem is None:
+                    problems.pop(path, None)
+                else:
+                    if problems.get(path, {}).get('problem') != problem:
+                        logger.error(f"Integrity check failed for {path}: {problem}")
+                    problems[path] = {'problem': problem, 'found': time.time()}
+                    result['problems'][path] = problem
+                state['cursor'] = [rel_dir, name]
+                if result['files'] % SAVE_EVERY == 0:
+                    self._save_state(state)
+            else:
+                result['complete'] = True
+                state['cursor'] = None
+                state['last_pass'] = time.time()
+        finally:
+            files.close()
+            self._save_state(state)
+        logger.info(f"Scrubbed {result['files']} files ({result['bytes']} bytes) of {self.context.name}"
+                    f"{', pass complete' if result['complete'] else ''}; {len(result['problems'])} problems")
+        return result
+
+    def start(self, interval: float = 300, slice_bytes: int = 256 * 1024 * 1024, pass_interval: float = 86400):
+        """Scrub in the background: a slice of up to ``slice_bytes`` every ``interval`` seconds.
+
+        A new pass starts ``pass_interval`` seconds after the previous one did.
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval, slice_bytes, pass_interval),
+                                        name=f'scrub-{self.context.name}', daemon=True)
+        self._thread.start()
+
+    def _run(self, interval: float, slice_bytes: int, pass_interval: float):
+        while not self._stop.wait(interval):
+            state = self.load_state()
+            if state.get('cursor') is None and time.time() - (state.get('pass_started') or 0) < pass_interval:
+                continue
+            try:
+                self.scrub(max_bytes=slice_bytes)
+            except Exception as e:
+                logger.error(f"Error scrubbing {self.context.name}: {str(e)}")
+
+    def stop(self):
+        """Stop background scrubbing, keeping the cursor for the next start."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
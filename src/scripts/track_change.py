@@ -2,29 +2,33 @@
 
 import os
 import sys
-import argparse
+import atexit
 from datetime import datetime, timedelta
-import subprocess
-from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 import json
 import logging
 import threading
-import queue
-import time
 import shutil
-import gzip
 import stat
-from .permission_manager import permission_manager
+import getpass
+import hashlib
+import time
+from .lazy_logging import LazyFileHandler
+from .backup_workers import BackupPool, copy_file
+from .day_sealer import COMPLETE_DAYS, SEAL_MANIFEST, note_record, open_record, seal_directory
+from .project_context import PROJECTS_ROOT, get_project_context
 from enum import Enum
 
+# Development logs of the track_change and CLI loggers
+LOGS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
+
 # Configure logging for development
 def setup_logging():
-    """Set up logging configuration for development."""
-    # Create logs directory if it doesn't exist
-    logs_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
-    os.makedirs(logs_dir, exist_ok=True)
-
+    """Set up logging configuration for development.
+    
+    The log file and its directory are only created when the first record
+    is written, so importing this module stays cheap.
+    """
     # Create logger
     logger = logging.getLogger('sigfile')
     logger.setLevel(logging.DEBUG)
@@ -43,8 +47,8 @@ def setup_logging():
     logger.addHandler(console_handler)
 
     # File handler for detailed logs
-    log_file = os.path.join(logs_dir, 'track_change.log')
-    file_handler = logging.FileHandler(log_file, mode='w')
+    log_file = os.path.join(LOGS_DIR, 'track_change.log')
+    file_handler = LazyFileHandler(log_file, mode='a')
     file_handler.setLevel(logging.DEBUG)
     file_formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -58,19 +62,21 @@ def setup_logging():
 # Initialize logger
 logger = setup_logging()
 
-# Import AI tracking modules
-try:
-    from . import ai_tracking
-    from . import decision_tracking
-    from . import file_watcher
-except ImportError:
-    import ai_tracking
-    import decision_tracking
-    import file_watcher
+# Tracking components are imported on first use; file_watcher pulls in
+# watchdog, which commands such as record and history never need.
+_LAZY_ATTRIBUTES = {
+    'AITracking': ('.ai_tracking', 'AITracking'),
+    'DecisionTracker': ('.decision_tracking', 'DecisionTracker'),
+    'FileWatcher': ('.file_watcher', 'FileWatcher'),
+    'permission_manager': ('.permission_manager', 'permission_manager'),
+}
 
-AITracking = ai_tracking.AITracking
-DecisionTracker = decision_tracking.DecisionTracker
-FileWatcher = file_watcher.FileWatcher
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        import importlib
+        module_name, attribute = _LAZY_ATTRIBUTES[name]
+        return getattr(importlib.import_module(module_name, __package__), attribute)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Configuration
 SIGFILE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -84,6 +90,14 @@ ARCHIVE_CONFIG = {
     'compression_level': 6      # GZIP compression level (1-9)
 }
 
+# Seconds new change records wait, so those written close together are exported in one batch
+ANALYTICS_DELAY = 5.0
+
+_analytics_pending: Dict[str, List[str]] = {}
+_analytics_lock = threading.Lock()
+_analytics_export_lock = threading.Lock()
+_analytics_at_exit = False
+
 class FileRole(Enum):
     """Enum representing different file access roles."""
     SYSTEM = "SYSTEM"
@@ -92,29 +106,15 @@ class FileRole(Enum):
     USER = "USER"
 
 def get_config_dirs(project_name):
-    """Get configuration directories for the specified project."""
-    if not project_name:
-        logger.error("Project name cannot be empty")
-        raise ValueError("Project name cannot be empty")
-        
+    """Get configuration directories for the specified project.
+    
+    Unlike the cached project context used by record writers, this always
+    re-checks that the directories exist.
+    """
+    context = get_project_context(project_name)
     try:
-        # Use root tracked_projects directory
-        base_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'tracked_projects', project_name)
-        dirs = {
-            'logs': os.path.join(base_dir, 'logs'),
-            'changes': os.path.join(base_dir, 'changes'),
-            'backups': os.path.join(base_dir, 'backups'),
-            'ai_conversations': os.path.join(base_dir, 'ai_conversations'),
-            'thinking': os.path.join(base_dir, 'thinking'),
-            'handoffs': os.path.join(base_dir, 'handoffs')
-        }
-        
-        # Create directories if they don't exist
-        for dir_path in dirs.values():
-            os.makedirs(dir_path, exist_ok=True)
-            logger.debug(f"Created directory: {dir_path}")
-            
-        return dirs
+        context.forget()
+        return context.dirs
     except Exception as e:
         logger.error(f"Error creating configuration directories: {str(e)}")
         raise
@@ -164,28 +164,67 @@ def make_mutable(file_path):
         logger.error(f"Error making file mutable: {str(e)}")
         raise
 
-def create_backup(file_path, project_name):
-    """Create a backup of the specified file."""
+def create_backup(file_path, project_name, known_hash=None):
+    """Create a backup of the specified file.
+    
+    ``known_hash(path, st)`` may return the content hash already computed
+    for the file as its stat data ``st`` describes it (the watcher keeps
+    one), so the backup is never read back just to hash it.
+    """
     if not os.path.exists(file_path):
         logger.error(f"File not found: {file_path}")
         raise FileNotFoundError(f"File not found: {file_path}")
         
     try:
-        dirs = get_config_dirs(project_name)
         timestamp = get_timestamp()
-        backup_dir = os.path.join(dirs['backups'], timestamp[:8])
-        os.makedirs(backup_dir, exist_ok=True)
+        backup_dir = get_project_context(project_name).day_dir('backups', timestamp[:8])
         
         backup_path = os.path.join(backup_dir, f"{os.path.basename(file_path)}_{timestamp}")
-        shutil.copy2(file_path, backup_path)
-        # Make backup immutable since it won't be modified
-        make_immutable(backup_path)
-        logger.info(f"Created backup: {backup_path}")
+        taken = time.time()
+        with open(file_path, 'rb') as f_in, open_record(backup_path, 'wb') as f_out:
+            st = os.fstat(f_in.fileno())
+            size = st.st_size
+            sha256 = known_hash(file_path, st) if known_hash is not None else None
+            # Only a plain read copy sees the data, and hashes it on the way
+            digest = hashlib.sha256() if sha256 is None else None
+            method = copy_file(f_in.fileno(), f_out.fileno(), digest)
+            if method == 'read' and digest is not None:
+                sha256 = digest.hexdigest()
+            elif sha256 is not None and _stat_changed(st, os.fstat(f_in.fileno())):
+                sha256 = None  # Written to during the copy: the known hash may not match it
+        # Backups copied without a hash are hashed once, when their day is sealed.
+        # Retention and restore find backups by original path through the index
+        from .backup_index import get_backup_index
+        get_backup_index(project_name).add(os.path.abspath(file_path), backup_path, taken, size, sha256)
+        # Backups are sealed with the rest of their day
+        note_record(backup_dir)
+        logger.info(f"Created backup: {backup_path} ({method})")
+        return backup_path
         
     except Exception as e:
         logger.error(f"Error creating backup: {str(e)}")
         raise
 
+def index_change(change, project_name):
+    """Record a moved or deleted file in the backup index, as of the change's time.
+
+    Snapshots then follow the rename, or leave the deleted file out.
+    """
+    change_type = change.get('metadata', {}).get('change_type')
+    if change_type not in ('moved', 'deleted'):
+        return
+    from .backup_index import get_backup_index
+    index = get_backup_index(project_name)
+    taken = datetime.fromisoformat(change['timestamp']).timestamp()
+    if change_type == 'moved':
+        index.moved(os.path.abspath(change['metadata']['src_path']),
+                    os.path.abspath(change['metadata']['dest_path']), taken)
+    else:
+        index.deleted(os.path.abspath(change['files'][-1]), taken)
+
+def _stat_changed(before: os.stat_result, after: os.stat_result) -> bool:
+    return (before.st_mtime_ns, before.st_size) != (after.st_mtime_ns, after.st_size)
+
 def record_change(description, files_changed, project_name):
     """Record a change with description and files changed.
     
@@ -197,18 +236,19 @@ def record_change(description, files_changed, project_name):
         raise ValueError("Description and files changed are required")
         
     try:
-        dirs = get_config_dirs(project_name)
         timestamp = get_timestamp()
-        changes_dir = os.path.join(dirs['changes'], timestamp[:8])
-        os.makedirs(changes_dir, exist_ok=True)
+        changes_dir = get_project_context(project_name).day_dir('changes', timestamp[:8])
         
         change_file = os.path.join(changes_dir, f"change_{timestamp}.txt")
-        with open(change_file, 'w') as f:
+        with open_record(change_file) as f:
             f.write(f"Description: {description}\n")
             f.write(f"Files Changed: {files_changed}\n")
+            f.write(f"Author: {getpass.getuser()}\n")
             f.write(f"Timestamp: {timestamp}\n")
             
-        # Change files remain mutable until explicitly marked as complete
+        # Change files remain mutable until finalized or the day rolls over
+        note_record(changes_dir)
+        _queue_analytics(project_name, change_file)
         logger.info(f"Recorded change: {change_file}")
         return change_file
         
@@ -216,11 +256,55 @@ def record_change(description, files_changed, project_name):
         logger.error(f"Error recording change: {str(e)}")
         raise
 
+def _queue_analytics(project_name, change_file):
+    """Fold a new change record into the project's analytics export shortly after it is written.
+
+    The export runs on a timer thread, so recording never waits for it or
+    for its imports. Records still queued when the process exits, as after
+    a one-off CLI command, are exported at exit.
+    """
+    global _analytics_at_exit
+    with _analytics_lock:
+        pending = _analytics_pending.setdefault(project_name, [])
+        pending.append(change_file)
+        if not _analytics_at_exit:
+            atexit.register(flush_all_analytics)
+            _analytics_at_exit = True
+        if len(pending) > 1:
+            return  # A flush is already scheduled
+    timer = threading.Timer(ANALYTICS_DELAY, _flush_analytics, (project_name,))
+    timer.daemon = True
+    timer.start()
+
+def _flush_analytics(project_name):
+    """Export the change records queued for a project."""
+    from .analytics import AnalyticsExporter
+    
+    with _analytics_lock:
+        changes = _analytics_pending.pop(project_name, [])
+    # Records removed meanwhile, e.g. with their project, leave nothing to export
+    changes = [path for path in changes if os.path.exists(path)]
+    if not changes:
+        return
+    try:
+        # One export at a time: they append to the same column files
+        with _analytics_export_lock:
+            AnalyticsExporter(project_name).export(changes)
+    except Exception as e:
+        logger.error(f"Error exporting analytics for {project_name}: {str(e)}")
+
+def flush_all_analytics():
+    """Export every queued change record now, without waiting for the timers."""
+    with _analytics_lock:
+        projects = list(_analytics_pending)
+    for project_name in projects:
+        _flush_analytics(project_name)
+
 def finalize_change(change_file):
-    """Mark a change file as complete by making it immutable."""
+    """Mark a change file as complete by sealing it into its day's manifest."""
     try:
         if os.path.exists(change_file):
-            make_immutable(change_file)
+            seal_directory(os.path.dirname(change_file), names={os.path.basename(change_file)})
             logger.info(f"Finalized change file: {change_file}")
         else:
             logger.error(f"Change file not found: {change_file}")
@@ -229,38 +313,151 @@ def finalize_change(change_file):
         logger.error(f"Error finalizing change: {str(e)}")
         raise
 
+def finalize_day(project_name, date=None):
+    """Seal a day's changes, backups and handoffs in bulk (today by default).
+    
+    Returns:
+        int: Number of files sealed
+    """
+    try:
+        context = get_project_context(project_name)
+        date = date or get_timestamp()[:8]
+        sealed = 0
+        for kind in ('changes', 'backups', 'handoffs'):
+            day_dir = context.path(kind, date)
+            if kind == 'backups':
+                # Opening the index lets sealing reuse the hashes recorded in it
+                from .backup_index import get_backup_index
+                get_backup_index(project_name)
+            if os.path.isdir(day_dir):
+                sealed += seal_directory(day_dir, complete=True).succeeded
+        logger.info(f"Finalized {sealed} files for {date}")
+        return sealed
+    except Exception as e:
+        logger.error(f"Error finalizing day: {str(e)}")
+        raise
+
+def read_text_record(path: str) -> Optional[Dict]:
+    """Read a "Key: value" text record such as a change or handoff.
+    
+    Returns None if the file is gone or still empty.
+    """
+    try:
+        with open(path, 'r') as f:
+            content = f.read()
+    except (FileNotFoundError, PermissionError):
+        return None
+    if not content:
+        return None
+    name = os.path.basename(path)
+    record = {'id': name[:-len('.txt')], 'path': path}
+    for line in content.splitlines():
+        key, sep, value = line.partition(': ')
+        if sep:
+            record[key.strip().lower().replace(' ', '_')] = value
+    record['content'] = content
+    return record
+
+def _is_change_file(name: str) -> bool:
+    return name.startswith('change_') and name.endswith('.txt')
+
+def _since_key(since: str) -> str:
+    """Turn YYYYMMDD or an ISO date/time into a key comparable with record names."""
+    if since.isdigit():
+        return since
+    return datetime.fromisoformat(since).strftime('%Y%m%d_%H%M%S_%f')
+
+def iter_history(project_name, date=None, since=None, limit=None, before=None) -> Iterator[Dict]:
+    """Yield change records newest-first, reading each file only when it is reached.
+
+    ``date`` restricts the walk to one YYYYMMDD directory, ``since`` stops it
+    at the first record older than a YYYYMMDD or ISO date/time, and ``limit``
+    stops it after that many records. ``before`` resumes a previous walk
+    after the record with that id.
+    """
+    if limit is not None and limit <= 0:
+        return
+    changes_root = get_project_context(project_name).dir('changes')
+    since_key = _since_key(since) if since else None
+    if date:
+        days = [date] if os.path.isdir(os.path.join(changes_root, date)) else []
+        if not days:
+            logger.warning(f"No changes found for date: {date}")
+    else:
+        with os.scandir(changes_root) as entries:
+            days = sorted((entry.name for entry in entries if entry.is_dir()), reverse=True)
+
+    count = 0
+    before_key = before[len('change_'):] if before else None
+    for day in days:
+        if since_key and day < since_key[:8]:
+            break
+        if before_key and day > before_key[:8]:
+            continue
+        with os.scandir(os.path.join(changes_root, day)) as entries:
+            names = sorted((entry.name for entry in entries
+                            if _is_change_file(entry.name) and entry.is_file()), reverse=True)
+        for name in names:
+            key = name[len('change_'):-len('.txt')]
+            if before_key and key >= before_key:
+                continue
+            if since_key and key < since_key:
+                return
+            record = read_text_record(os.path.join(changes_root, day, name))
+            if record is None:
+                continue
+            yield record
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
+def follow_history(project_name, stop_event: Optional[threading.Event] = None) -> Iterator[Dict]:
+    """Yield change records as they are written, until ``stop_event`` is set.
+
+    Records are picked up from filesystem events (inotify on Linux), so a
+    new record is reported as soon as its writer closes it.
+    """
+    import queue
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+
+    changes_root = get_project_context(project_name).dir('changes')
+    paths = queue.Queue()
+
+    class ChangeEventHandler(FileSystemEventHandler):
+        # A file still empty when seen is picked up again by its close event
+        def on_any_event(self, event):
+            if event.is_directory or event.event_type not in ('created', 'closed', 'modified', 'moved'):
+                return
+            path = getattr(event, 'dest_path', '') or event.src_path
+            if _is_change_file(os.path.basename(path)):
+                paths.put(path)
+
+    observer = Observer()
+    observer.schedule(ChangeEventHandler(), changes_root, recursive=True)
+    observer.start()
+    seen = set()
+    try:
+        while stop_event is None or not stop_event.is_set():
+            try:
+                # The timeout only bounds how long a stop request goes unnoticed
+                path = paths.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if path in seen:
+                continue
+            record = read_text_record(path)
+            if record is not None:
+                seen.add(path)
+                yield record
+    finally:
+        observer.stop()
+        observer.join()
+
 def show_history(date, project_name):
     """Show change history for the specified date."""
     try:
-        dirs = get_config_dirs(project_name)
-        changes = []
-        
-        if date:
-            # If a specific date is provided, look in that date's directory
-            date_dir = os.path.join(dirs['changes'], date)
-            if os.path.exists(date_dir):
-                for item in os.listdir(date_dir):
-                    if item.endswith('.txt') and item.startswith('change_'):
-                        item_path = os.path.join(date_dir, item)
-                        if os.path.isfile(item_path):
-                            with open(item_path, 'r') as f:
-                                content = f.read()
-                                changes.append(content)
-            else:
-                logger.warning(f"No changes found for date: {date}")
-        else:
-            # If no date is provided, look in all date directories
-            for date_dir in os.listdir(dirs['changes']):
-                date_path = os.path.join(dirs['changes'], date_dir)
-                if os.path.isdir(date_path):
-                    for item in os.listdir(date_path):
-                        if item.endswith('.txt') and item.startswith('change_'):
-                            item_path = os.path.join(date_path, item)
-                            if os.path.isfile(item_path):
-                                with open(item_path, 'r') as f:
-                                    content = f.read()
-                                    changes.append(content)
-        
+        changes = [record['content'] for record in iter_history(project_name, date=date)]
         logger.info(f"Retrieved {len(changes)} changes from history")
         return changes
     except Exception as e:
@@ -274,21 +471,19 @@ def generate_handoff(chat_name, chat_id, summary, next_steps, project_name):
         raise ValueError("All handoff fields are required")
         
     try:
-        dirs = get_config_dirs(project_name)
         timestamp = get_timestamp()
-        handoffs_dir = os.path.join(dirs['handoffs'], timestamp[:8])
-        os.makedirs(handoffs_dir, exist_ok=True)
+        handoffs_dir = get_project_context(project_name).day_dir('handoffs', timestamp[:8])
         
         handoff_file = os.path.join(handoffs_dir, f"handoff_{timestamp}.txt")
-        with open(handoff_file, 'w') as f:
+        with open_record(handoff_file) as f:
             f.write(f"Chat Name: {chat_name}\n")
             f.write(f"Chat ID: {chat_id}\n")
             f.write(f"Summary: {summary}\n")
             f.write(f"Next Steps: {next_steps}\n")
             f.write(f"Timestamp: {timestamp}\n")
         
-        # Make handoff immutable since it won't be modified
-        make_immutable(handoff_file)
+        # Handoffs are sealed with the rest of their day
+        note_record(handoffs_dir)
         logger.info(f"Generated handoff: {handoff_file}")
         
     except Exception as e:
@@ -297,6 +492,8 @@ def generate_handoff(chat_name, chat_id, summary, next_steps, project_name):
 
 def setup():
     """Set up SigFile environment."""
+    import subprocess
+    
     # Check for moreutils
     try:
         subprocess.run(['ts', '--version'], capture_output=True, check=True)
@@ -359,6 +556,8 @@ def archive_file(file_path: str) -> str:
     """
     Archive a file using gzip compression and return the archive path.
     """
+    import gzip
+    
     try:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
@@ -372,8 +571,8 @@ def archive_file(file_path: str) -> str:
         archive_path = os.path.join(archive_dir, f"{os.path.basename(file_path)}_{timestamp}.gz")
         
         # Compress file
-        with open(file_path, 'rb') as f_in:
-            with gzip.open(archive_path, 'wb', compresslevel=ARCHIVE_CONFIG['compression_level']) as f_out:
+        with open(file_path, 'rb') as f_in, open_record(archive_path, 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=ARCHIVE_CONFIG['compression_level']) as f_out:
                 shutil.copyfileobj(f_in, f_out)
                 
         # Create metadata file
@@ -384,13 +583,10 @@ def archive_file(file_path: str) -> str:
             'compressed_size': os.path.getsize(archive_path)
         }
         metadata_path = archive_path + '.meta'
-        with open(metadata_path, 'w') as f:
+        with open_record(metadata_path) as f:
             json.dump(metadata, f, indent=2)
             
-        # Make both files immutable
-        make_immutable(archive_path)
-        make_immutable(metadata_path)
-        
+        # Both files are sealed in bulk by seal_directory(archive_dir)
         logger.info(f"Archived file {file_path} to {archive_path}")
         return archive_path
         
@@ -403,14 +599,19 @@ def check_and_archive_directory(directory: str):
     Check all files in a directory and its subdirectories for archiving.
     """
     try:
+        archive_dirs = set()
         for root, _, files in os.walk(directory):
             for file in files:
-                if file.endswith('.gz') or file.endswith('.meta'):
+                if file.endswith('.gz') or file.endswith('.meta') or file in (SEAL_MANIFEST, COMPLETE_DAYS):
                     continue
                     
                 file_path = os.path.join(root, file)
                 if should_archive_file(file_path):
-                    archive_file(file_path)
+                    archive_dirs.add(os.path.dirname(archive_file(file_path)))
+        
+        # Seal the new archives with one pass per archive directory
+        for archive_dir in archive_dirs:
+            seal_directory(archive_dir)
                     
     except Exception as e:
         logger.error(f"Error checking directory for archiving: {str(e)}")
@@ -421,7 +622,7 @@ class ArchiveManager:
     
     def __init__(self, project_name: str):
         self.project_name = project_name
-        self.dirs = get_config_dirs(project_name)
+        self.dirs = get_project_context(project_name).dirs
         self.last_check = None
         
     def should_check_archives(self) -> bool:
@@ -450,17 +651,49 @@ class ArchiveManager:
             raise
 
 class OptimizedCapture:
-    def __init__(self, project_name: str = "sigfile"):
-        """Initialize the OptimizedCapture class."""
+    # Items each capture stream may hold before producers have to wait
+    QUEUE_SIZE = 1000
+
+    def __init__(self, project_name: str = "sigfile", enable_ai_features: bool = True,
+                 watch_paths: Optional[List[str]] = None):
+        """Initialize the OptimizedCapture class.
+        
+        Args:
+            project_name: Project the captured records belong to
+            enable_ai_features: Also capture chat messages and thinking
+            watch_paths: Directories to watch for file changes (default: cwd)
+        """
+        from .capture_engine import CaptureEngine
         self.project_name = project_name
-        self.project_dir = os.path.join('tracked_projects', project_name)
-        self.config_dirs = get_config_dirs(project_name)
+        self.context = get_project_context(project_name)
+        self.project_dir = self.context.base_dir
+        self.config_dirs = self.context.dirs
+        self.enable_ai_features = enable_ai_features
+        self.watch_paths = watch_paths or [os.getcwd()]
         self.logger = logger
         self.logger.info(f"Initializing OptimizedCapture for project: {project_name}")
         
         # Initialize file roles dictionary
         self.file_roles = {}
         
+        # Capture streams run as tasks on one event loop, started by start_capture
+        self.stop_event = threading.Event()
+        handlers = {'file': self._handle_file_change}
+        if enable_ai_features:
+            handlers.update(chat=self._handle_chat_message, thinking=self._handle_thinking)
+        self.engine = CaptureEngine(handlers, maxsize=self.QUEUE_SIZE)
+        # Changed files are backed up by a worker pool, never on the watcher's thread
+        self.backups = BackupPool(lambda file_path: create_backup(
+            file_path, self.project_name, known_hash=self.file_watcher.event_handler.cached_hash))
+        # Sealed records and backups are re-verified in the background while capturing
+        from .backup_index import get_backup_index
+        from .scrubber import Scrubber
+        self.scrubber = Scrubber(self.context, get_backup_index(project_name))
+        
+        # Role assignments and saved modes persist in the project's own store
+        from .permission_manager import get_permission_manager
+        self.permissions = get_permission_manager(project_name)
+        
         # Set up directories
         self._setup_directories()
         
@@ -470,15 +703,9 @@ class OptimizedCapture:
     def _setup_directories(self):
         """Set up project directories."""
         try:
-            # Create base project directory
-            os.makedirs(self.project_dir, exist_ok=True)
-            self.logger.info(f"Created project directory: {self.project_dir}")
-            
-            # Create subdirectories
-            for dir_name in ['changes', 'backups', 'logs', 'ai_conversations', 'thinking']:
-                dir_path = os.path.join(self.project_dir, dir_name)
-                os.makedirs(dir_path, exist_ok=True)
-                self.logger.info(f"Created directory: {dir_path}")
+            # Subdirectories are created once per process by the project context
+            for dir_path in self.config_dirs.values():
+                self.logger.debug(f"Using directory: {dir_path}")
                 
         except Exception as e:
             self.logger.error(f"Error setting up directories: {e}")
@@ -486,41 +713,57 @@ class OptimizedCapture:
     
     def _initialize_components(self):
         """Initialize tracking components."""
+        from .ai_tracking import AITracking
+        from .decision_tracking import DecisionTracker
+        from .file_watcher import FileWatcher
+        from .watch_service import get_watch_service
         try:
             # Initialize AI tracking
-            self.ai_tracker = AITracking(self.project_name)
+            self.ai_tracker = AITracking(self.project_name, self.context)
             self.logger.info("Initialized AI tracking")
             
             # Initialize decision tracking
-            self.decision_tracker = DecisionTracker(self.project_name)
+            self.decision_tracker = DecisionTracker(self.project_name, self.context)
             self.logger.info("Initialized decision tracking")
             
-            # Initialize file watcher
-            self.file_watcher = FileWatcher(self.project_name)
+            # Initialize file watcher on the process-wide observer; SigFile's
+            # own records and logs are not project changes
+            self.file_watcher = FileWatcher(self.watch_paths, enable_ai_features=self.enable_ai_features,
+                                            service=get_watch_service(), backups=self.backups)
+            self.file_watcher.ignore_patterns += [os.path.join(PROJECTS_ROOT, '*'), os.path.join(LOGS_DIR, '*')]
             self.logger.info("Initialized file watcher")
             
         except Exception as e:
             self.logger.error(f"Error initializing components: {e}")
             raise
 
+    @property
+    def file_queue(self):
+        """Queue of the file stream, while capture is running."""
+        return self.engine.queues.get('file')
+
+    @property
+    def chat_queue(self):
+        """Queue of the chat stream, while capture is running."""
+        return self.engine.queues.get('chat')
+
+    @property
+    def thinking_queue(self):
+        """Queue of the thinking stream, while capture is running."""
+        return self.engine.queues.get('thinking')
+
     def start_capture(self):
         """Start the capture system."""
         try:
-            # Start file watcher thread
-            self.file_thread = threading.Thread(target=self._file_capture_loop)
-            self.file_thread.daemon = True
-            self.file_thread.start()
-            
-            # Start chat capture thread if AI features enabled
-            if self.enable_ai_features:
-                self.chat_thread = threading.Thread(target=self._chat_capture_loop)
-                self.chat_thread.daemon = True
-                self.chat_thread.start()
-                
-                self.thinking_thread = threading.Thread(target=self._thinking_capture_loop)
-                self.thinking_thread.daemon = True
-                self.thinking_thread.start()
-                
+            self.stop_event.clear()
+            self.engine.start()
+            self.backups.start()
+            self.scrubber.start()
+            
+            # Watchdog's observer thread hands events to the loop
+            self.file_watcher.subscribe(lambda change: self.engine.submit('file', change))
+            self.file_watcher.start()
+            
             self.logger.info("Capture system started")
             
         except Exception as e:
@@ -528,52 +771,34 @@ class OptimizedCapture:
             raise
 
     def stop_capture(self):
-        """Stop the capture system."""
+        """Stop the capture system, finishing items already queued."""
         try:
             self.stop_event.set()
-            if hasattr(self, 'file_thread'):
-                self.file_thread.join()
-            if hasattr(self, 'chat_thread'):
-                self.chat_thread.join()
-            if hasattr(self, 'thinking_thread'):
-                self.thinking_thread.join()
+            if self.file_watcher.is_watching():
+                self.file_watcher.stop()
+            self.backups.stop()
+            self.scrubber.stop()
+            self.engine.stop()
             self.logger.info("Capture system stopped")
         except Exception as e:
             self.logger.error(f"Error stopping capture system: {str(e)}", exc_info=True)
             raise
 
-    def _file_capture_loop(self):
-        """Main loop for file change capture."""
-        while not self.stop_event.is_set():
-            try:
-                if not self.file_queue.empty():
-                    change = self.file_queue.get()
-                    self._handle_file_change(change)
-            except Exception as e:
-                self.logger.error(f"Error in file capture: {str(e)}", exc_info=True)
-            time.sleep(0.1)
-
-    def _chat_capture_loop(self):
-        """Main loop for chat capture."""
-        while not self.stop_event.is_set():
-            try:
-                if not self.chat_queue.empty():
-                    message = self.chat_queue.get()
-                    self._handle_chat_message(message)
-            except Exception as e:
-                self.logger.error(f"Error in chat capture: {str(e)}", exc_info=True)
-            time.sleep(0.1)
-
-    def _thinking_capture_loop(self):
-        """Main loop for thinking capture."""
-        while not self.stop_event.is_set():
-            try:
-                if not self.thinking_queue.empty():
-                    thought = self.thinking_queue.get()
-                    self._handle_thinking(thought)
-            except Exception as e:
-                self.logger.error(f"Error in thinking capture: {str(e)}", exc_info=True)
-            time.sleep(0.1)
+    def capture_chat(self, message: Dict):
+        """Queue a chat message for recording in the current AI session."""
+        self.engine.submit('chat', message)
+
+    def capture_thinking(self, thought: str, context: Optional[Dict] = None):
+        """Queue a thought for recording."""
+        self.engine.submit('thinking', {'thought': thought, 'context': context})
+
+    def _handle_chat_message(self, message: Dict):
+        """Record a chat message; runs in the engine's thread pool."""
+        self.ai_tracker.record_event('chat', message)
+
+    def _handle_thinking(self, thought: Dict):
+        """Record a thought; runs in the engine's thread pool."""
+        self.ai_tracker.record_thinking(thought['thought'], thought.get('context'))
 
     def _detect_ide(self):
         """Detect the current IDE environment."""
@@ -587,14 +812,12 @@ class OptimizedCapture:
         return 'unknown'
 
     def _handle_file_change(self, change):
-        """Handle file change events."""
+        """Handle a file change event; runs in the engine's thread pool."""
         try:
-            if self.enable_ai_features:
-                # Process with AI features
-                self.file_queue.put(change)
-            else:
-                # Process without AI features
-                self.logger.info(f"File change detected: {change}")
+            self.logger.info(f"File change detected: {change.get('title', change)}")
+            index_change(change, self.project_name)
+            self.file_watcher.changes.append(change)
+            self.file_watcher.change_history.append(change)
         except Exception as e:
             self.logger.error(f"Error handling file change: {str(e)}", exc_info=True)
             raise
@@ -612,17 +835,26 @@ class OptimizedCapture:
             logger.error(f"Directory permission verification failed for {directory}: {str(e)}")
             raise
 
+    def _make_immutable(self, file_path: str):
+        """Make a file read-only and set its immutable flag where supported."""
+        from .file_attributes import set_immutable
+        try:
+            method = set_immutable(file_path)
+            self.logger.debug(f"Made {file_path} immutable using {method}")
+        except Exception as e:
+            self.logger.error(f"Error making {file_path} immutable: {str(e)}")
+            raise
+
     def _record_permission_change(self, file_path: str, role: FileRole, action: str, details: str):
         """Record permission changes in the change history."""
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-            changes_dir = os.path.join('tracked_projects', self.project_name, 'changes')
-            date_dir = os.path.join(changes_dir, datetime.now().strftime("%Y%m%d"))
-            os.makedirs(date_dir, exist_ok=True)
+            changes_dir = self.context.dir('changes')
+            date_dir = self.context.day_dir('changes', get_timestamp()[:8])
             
             change_file = os.path.join(date_dir, f'changes_{timestamp}.txt')
             
-            with open(change_file, 'w') as f:
+            with open_record(change_file) as f:
                 f.write(f"# Permission Change Record - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
                 f.write(f"## File: {file_path}\n")
                 f.write(f"## Role: {role.value}\n")
@@ -633,8 +865,8 @@ class OptimizedCapture:
                 f.write(f"- Operation: {action}\n")
                 f.write(f"- Timestamp: {timestamp}\n")
             
-            # Make the change record immutable
-            self._make_immutable(change_file)
+            # The change record is sealed with the rest of its day
+            note_record(date_dir)
             
             # Update change history
             history_file = os.path.join(changes_dir, 'change_history.txt')
@@ -654,13 +886,12 @@ class OptimizedCapture:
         """Record development decisions, attempts, and changes in direction."""
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-            changes_dir = os.path.join('tracked_projects', self.project_name, 'changes')
-            date_dir = os.path.join(changes_dir, datetime.now().strftime("%Y%m%d"))
-            os.makedirs(date_dir, exist_ok=True)
+            changes_dir = self.context.dir('changes')
+            date_dir = self.context.day_dir('changes', get_timestamp()[:8])
             
             decision_file = os.path.join(date_dir, f'development_decision_{timestamp}.txt')
             
-            with open(decision_file, 'w') as f:
+            with open_record(decision_file) as f:
                 f.write(f"# Development Decision Record - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
                 f.write(f"## Type: {decision_type}\n")
                 f.write(f"## Description: {description}\n")
@@ -677,8 +908,8 @@ class OptimizedCapture:
                 f.write(f"- Decision ID: {timestamp}\n")
                 f.write(f"- Status: {'Implemented' if outcome == 'Success' else 'In Progress'}\n")
             
-            # Make the decision record immutable
-            self._make_immutable(decision_file)
+            # The decision record is sealed with the rest of its day
+            note_record(date_dir)
             
             # Update development history
             history_file = os.path.join(changes_dir, 'development_history.txt')
@@ -702,13 +933,12 @@ class OptimizedCapture:
         """Record a code change and optionally link it to a development decision."""
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-            changes_dir = os.path.join('tracked_projects', self.project_name, 'changes')
-            date_dir = os.path.join(changes_dir, datetime.now().strftime("%Y%m%d"))
-            os.makedirs(date_dir, exist_ok=True)
+            changes_dir = self.context.dir('changes')
+            date_dir = self.context.day_dir('changes', get_timestamp()[:8])
             
             change_file = os.path.join(date_dir, f'code_change_{timestamp}.txt')
             
-            with open(change_file, 'w') as f:
+            with open_record(change_file) as f:
                 f.write(f"# Code Change Record - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
                 f.write(f"## File: {file_path}\n")
                 f.write(f"## Type: {change_type}\n")
@@ -719,8 +949,8 @@ class OptimizedCapture:
                 f.write(f"- Timestamp: {timestamp}\n")
                 f.write(f"- Change ID: {timestamp}\n")
             
-            # Make the change record immutable
-            self._make_immutable(change_file)
+            # The change record is sealed with the rest of its day
+            note_record(date_dir)
             
             # Update change history
             history_file = os.path.join(changes_dir, 'change_history.txt')
@@ -743,8 +973,7 @@ class OptimizedCapture:
     def _link_change_to_decision(self, change_id: str, decision_id: str):
         """Link a code change to a development decision."""
         try:
-            changes_dir = os.path.join('tracked_projects', self.project_name, 'changes')
-            date_dir = os.path.join(changes_dir, datetime.now().strftime("%Y%m%d"))
+            date_dir = self.context.path('changes', get_timestamp()[:8])
             
             # Update the change record
             change_file = os.path.join(date_dir, f'code_change_{change_id}.txt')
@@ -777,6 +1006,7 @@ class OptimizedCapture:
 
     def _setup_dev_environment(self):
         """Set up development environment permissions."""
+        from .dev_manifest import DevModeManifest
         try:
             # Create a development environment file
             dev_env_file = os.path.join(self.project_dir, '.dev_environment')
@@ -793,30 +1023,11 @@ class OptimizedCapture:
                 
                 self.logger.info("Development environment file created")
             
-            # Grant development role access to all files
-            for root, _, files in os.walk(self.project_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    # Skip the development environment file
-                    if file_path == dev_env_file:
-                        continue
-                    
-                    # Make files writable for development
-                    try:
-                        # Remove immutable flags
-                        if sys.platform == 'linux':
-                            subprocess.run(['chattr', '-i', file_path], check=True)
-                        elif sys.platform == 'darwin':
-                            subprocess.run(['chflags', 'nouchg', file_path], check=True)
-                        elif sys.platform == 'win32':
-                            subprocess.run(['attrib', '-R', '-S', '-H', file_path], check=True)
-                        
-                        # Set writable permissions
-                        os.chmod(file_path, stat.S_IREAD | stat.S_IWRITE | stat.S_IRGRP | stat.S_IWGRP)
-                        
-                        self.logger.info(f"Made file writable for development: {file_path}")
-                    except Exception as e:
-                        self.logger.warning(f"Could not make file writable for development: {file_path}, error: {str(e)}")
+            # Unseal sealed files, recording their modes and flags in the manifest
+            result = DevModeManifest(self.permissions.store).enter(self.project_dir, exclude=[dev_env_file])
+            self.logger.info(f"Made {result.succeeded} files writable for development")
+            for file_path, error in result.failures.items():
+                self.logger.warning(f"Could not make file writable for development: {file_path}, error: {error}")
             
             self.logger.info("Development environment permissions set up successfully")
             
@@ -824,16 +1035,29 @@ class OptimizedCapture:
             self.logger.error(f"Error setting up development environment permissions: {str(e)}", exc_info=True)
             raise
     
+    def _teardown_dev_environment(self):
+        """Re-seal the files unsealed or created during development."""
+        from .dev_manifest import DevModeManifest
+        try:
+            result = DevModeManifest(self.permissions.store).exit(self.project_dir)
+            self.logger.info(f"Re-sealed {result.succeeded} files after development")
+            for file_path, error in result.failures.items():
+                self.logger.warning(f"Could not re-seal file after development: {file_path}, error: {error}")
+        except Exception as e:
+            self.logger.error(f"Error tearing down development environment permissions: {str(e)}", exc_info=True)
+            raise
+    
     def enable_dev_mode(self, file_path: str = None):
         """Enable development mode for a specific file or all files."""
         try:
             if file_path:
                 # Enable development mode for a specific file
-                permission_manager.enable_dev_mode(file_path)
+                self.permissions.enable_dev_mode(file_path)
                 self.logger.info(f"Development mode enabled for file: {file_path}")
             else:
                 # Enable development mode for all files
-                permission_manager.enable_dev_mode()
+                self.permissions.enable_dev_mode()
+                self._setup_dev_environment()
                 self.logger.info("Development mode enabled for all files")
         except Exception as e:
             self.logger.error(f"Error enabling development mode: {str(e)}", exc_info=True)
@@ -844,11 +1068,12 @@ class OptimizedCapture:
         try:
             if file_path:
                 # Disable development mode for a specific file
-                permission_manager.disable_dev_mode(file_path)
+                self.permissions.disable_dev_mode(file_path)
                 self.logger.info(f"Development mode disabled for file: {file_path}")
             else:
                 # Disable development mode for all files
-                permission_manager.disable_dev_mode()
+                self._teardown_dev_environment()
+                self.permissions.disable_dev_mode()
                 self.logger.info("Development mode disabled for all files")
         except Exception as e:
             self.logger.error(f"Error disabling development mode: {str(e)}", exc_info=True)
@@ -856,6 +1081,8 @@ class OptimizedCapture:
 
 def main():
     """Main entry point for SigFile."""
+    import argparse
+    
     parser = argparse.ArgumentParser(description='SigFile - AI Development Memory Keeper')
     parser.add_argument('command', choices=['setup', 'backup', 'record', 'history', 'handoff', 'ai-record', 'ai-stop', 'ai-history'])
     parser.add_argument('--project', '-p', default=PROJECT_NAME, help='Project name')
@@ -897,18 +1124,21 @@ def main():
     
     elif args.command == 'ai-record' and args.session_name and args.session_description:
         # Initialize AI tracking
+        from .ai_tracking import AITracking
         ai_tracker = AITracking(args.project)
         ai_tracker.start_session(args.session_name, args.session_description)
         log(f"Started AI session: {args.session_name}")
     
     elif args.command == 'ai-stop':
         # Stop AI tracking
+        from .ai_tracking import AITracking
         ai_tracker = AITracking(args.project)
         ai_tracker.stop_session()
         log("Stopped AI session")
     
     elif args.command == 'ai-history':
         # Show AI session history
+        from .ai_tracking import AITracking
         ai_tracker = AITracking(args.project)
         ai_tracker.show_history()
 
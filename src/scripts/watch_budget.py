@@ -0,0 +1,457 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from watchdog.events import (
+    DirCreatedEvent, DirDeletedEvent, DirMovedEvent, FileCreatedEvent, FileDeletedEvent,
+    FileModifiedEvent, FileMovedEvent
+)
+
+logger = logging.getLogger(__name__)
+
+INOTIFY_PROC_DIR = '/proc/sys/fs/inotify'
+
+# inotify event bits (see linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+DIR_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+                  | IN_ONLYDIR | IN_DONT_FOLLOW | IN_EXCL_UNLINK)
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+# name -> (is_dir, mtime_ns, size)
+Snapshot = Dict[str, Tuple[bool, int, int]]
+
+def inotify_limits() -> Dict[str, int]:
+    """Read the kernel's inotify limits; empty where inotify is not available."""
+    limits = {}
+    for name in ('max_user_watches', 'max_user_instances', 'max_queued_events'):
+        try:
+            with open(os.path.join(INOTIFY_PROC_DIR, name)) as f:
+                limits[name] = int(f.read())
+        except (OSError, ValueError):
+            continue
+    return limits
+
+def _snapshot(path: str) -> Optional[Snapshot]:
+    """List a directory with the stat data needed to spot changes, or None if it is gone."""
+    snapshot = {}
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                snapshot[entry.name] = (entry.is_dir(follow_symlinks=False), st.st_mtime_ns, st.st_size)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return snapshot
+
+def _diff(path: str, old: Snapshot, new: Snapshot) -> list:
+    """Events that turn one snapshot of a directory into another."""
+    events = []
+    for name, (is_dir, mtime, size) in new.items():
+        full_path = os.path.join(path, name)
+        before = old.get(name)
+        if before is None or before[0] != is_dir:
+            if before is not None:
+                events.append((DirDeletedEvent if before[0] else FileDeletedEvent)(full_path))
+            events.append((DirCreatedEvent if is_dir else FileCreatedEvent)(full_path))
+        elif not is_dir and before[1:] != (mtime, size):
+            events.append(FileModifiedEvent(full_path))
+    for name, (is_dir, _, _) in old.items():
+        if name not in new:
+            events.append((DirDeletedEvent if is_dir else FileDeletedEvent)(os.path.join(path, name)))
+    return events
+
+class InotifyGroup:
+    """Non-recursive watches on many directories, held by one inotify instance.
+
+    Each watch scheduled on a watchdog observer gets its own inotify
+    instance and emitter thread, so split roots would use a thread and an
+    instance (of max_user_instances) per hot directory. Their watches share
+    this one instance and one reader thread instead, which turns the kernel
+    events into watchdog events for ``dispatch``.
+    """
+
+    def __init__(self, dispatch: Callable):
+        import ctypes
+        import ctypes.util
+
+        self._dispatch = dispatch
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_CLOEXEC)
+        if self._fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+        self._paths: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        # Written to on close, to wake the reader
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self._read_loop, name='watch-hot-dirs', daemon=True)
+        self._thread.start()
+
+    def add(self, path: str) -> Optional[int]:
+        """Watch one directory; returns the watch descriptor, or None if the kernel refuses."""
+        import ctypes
+
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), DIR_WATCH_MASK)
+        if wd < 0:
+            logger.error(f"Cannot watch {path}: {os.strerror(ctypes.get_errno())}")
+            return None
+        with self._lock:
+            self._paths[wd] = path
+        return wd
+
+    def remove(self, wd: int):
+        """Stop watching a directory; a directory already gone has nothing to remove."""
+        with self._lock:
+            if self._paths.pop(wd, None) is None:
+                return
+        self._libc.inotify_rm_watch(self._fd, wd)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def _read_loop(self):
+        while True:
+            try:
+                ready, _, _ = select.select([self._fd, self._wake_r], [], [])
+                if self._wake_r in ready:
+                    return
+                data = os.read(self._fd, 64 * 1024)
+            except InterruptedError:
+                continue
+            except OSError as e:
+                if e.errno != errno.EBADF:
+                    logger.error(f"Error reading directory watches: {str(e)}")
+                return
+            for event in self._events(data):
+                try:
+                    self._dispatch(event)
+                except Exception as e:
+                    logger.error(f"Error handling {event.event_type} event for {event.src_path}: {str(e)}")
+
+    def _events(self, data: bytes) -> list:
+        """Watchdog events for one read of the inotify fd; moves are paired by cookie."""
+        events = []
+        moved_from: Dict[int, int] = {}
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                logger.warning("Directory watch queue overflowed; changes may have been missed")
+                continue
+            with self._lock:
+                directory = self._paths.pop(wd, None) if mask & IN_IGNORED else self._paths.get(wd)
+            if directory is None or not name or mask & IN_IGNORED:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            is_dir = bool(mask & IN_ISDIR)
+            if mask & IN_MOVED_FROM:
+                # A delete until the matching IN_MOVED_TO turns it into a move
+                moved_from[cookie] = len(events)
+                events.append((DirDeletedEvent if is_dir else FileDeletedEvent)(path))
+            elif mask & IN_MOVED_TO and cookie in moved_from:
+                index = moved_from.pop(cookie)
+                events[index] = (DirMovedEvent if is_dir else FileMovedEvent)(events[index].src_path, path)
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                events.append((DirCreatedEvent if is_dir else FileCreatedEvent)(path))
+            elif mask & IN_DELETE:
+                events.append((DirDeletedEvent if is_dir else FileDeletedEvent)(path))
+            elif mask & (IN_MODIFY | IN_ATTRIB) and not is_dir:
+                events.append(FileModifiedEvent(path))
+        return events
+
+    def close(self):
+        """Stop the reader and release the inotify instance."""
+        os.write(self._wake_w, b'x')
+        self._thread.join()
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            os.close(fd)
+        self._paths.clear()
+
+class _Dir:
+    """A directory of a split root: watched on its own, or polled."""
+    __slots__ = ('activity', 'stamp', 'watch', 'snapshot')
+
+    def __init__(self, activity: float, stamp: float, snapshot: Optional[Snapshot]):
+        self.activity = activity
+        self.stamp = stamp
+        self.watch = None
+        self.snapshot = snapshot
+
+class WatchBudget:
+    """Keeps inotify watches within a budget, polling what does not fit.
+
+    A root whose whole tree fits in the remaining budget gets one recursive
+    watch. A larger root is split: each of its directories is either
+    watched on its own (non-recursively) or listed by a low-frequency
+    scandir poller. The most active directories hold the watches; activity
+    decays with ``half_life`` seconds, and the split is rebalanced every
+    ``rebalance_every`` polls as activity shifts. On Linux the directory
+    watches share one InotifyGroup; elsewhere each is scheduled on the
+    observer.
+    """
+
+    def __init__(self, schedule: Callable, unschedule: Callable, dispatch: Callable,
+                 budget: Optional[int] = None, poll_interval: float = 30.0,
+                 rebalance_every: int = 4, half_life: float = 600.0):
+        self._schedule = schedule
+        self._unschedule = unschedule
+        self._dispatch = dispatch
+        limits = inotify_limits()
+        self.limit = limits.get('max_user_watches')
+        self.instance_limit = limits.get('max_user_instances')
+        # Leave half of the per-user limit to editors and other tools
+        self.budget = budget if budget is not None else (self.limit // 2 if self.limit else None)
+        self.poll_interval = poll_interval
+        self.rebalance_every = rebalance_every
+        self.half_life = half_life
+        self._roots: Dict[str, object] = {}
+        self._recursive_dirs: Dict[str, int] = {}
+        self._dirs: Dict[str, _Dir] = {}
+        self._group: Optional[InotifyGroup] = None
+        self._lock = threading.RLock()
+        self._pending = deque()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.metrics = {'promotions': 0, 'demotions': 0, 'schedule_failures': 0,
+                        'polls': 0, 'last_poll_seconds': 0.0}
+
+    def _activity(self, state: _Dir, now: float) -> float:
+        return state.activity * 0.5 ** ((now - state.stamp) / self.half_life)
+
+    def _bump(self, state: _Dir, amount: float = 1.0):
+        now = time.time()
+        state.activity = self._activity(state, now) + amount
+        state.stamp = now
+
+    def _used(self) -> int:
+        return sum(self._recursive_dirs.values()) + sum(1 for s in self._dirs.values() if s.watch is not None)
+
+    def _watch(self, path: str, recursive: bool):
+        watch = self._schedule(path, recursive)
+        if watch is None:
+            self.metrics['schedule_failures'] += 1
+        return watch
+
+    def _watch_dir(self, path: str):
+        """Watch one directory of a split root, on the shared inotify instance where there is one."""
+        if self._group is None and sys.platform.startswith('linux'):
+            try:
+                self._group = InotifyGroup(self._dispatch)
+            except OSError as e:
+                logger.warning(f"Cannot share an inotify instance, watching directories separately: {e}")
+        if self._group is None:
+            return self._watch(path, False)
+        wd = self._group.add(path)
+        if wd is None:
+            self.metrics['schedule_failures'] += 1
+        return wd
+
+    def _unwatch_dir(self, watch):
+        if self._group is not None:
+            self._group.remove(watch)
+        else:
+            self._unschedule(watch)
+
+    def add_root(self, root: str):
+        """Watch a tree, recursively if it fits the budget and split otherwise."""
+        dirs = []
+        for path, _, _ in os.walk(root):
+            try:
+                dirs.append((path, os.stat(path).st_mtime))
+            except FileNotFoundError:
+                continue
+        with self._lock:
+            if self.budget is None or self._used() + len(dirs) <= self.budget:
+                watch = self._watch(root, True)
+                if watch is not None:
+                    self._roots[root] = watch
+                    self._recursive_dirs[root] = len(dirs)
+                    return
+            logger.info(f"Splitting {root}: {len(dirs)} directories, "
+                        f"{self._used()} of {self.budget} watches in use")
+            self._roots[root] = None
+            now = time.time()
+            for path, mtime in dirs:
+                # Until events come in, a recently changed directory ranks as active
+                self._dirs[path] = _Dir(0.5 ** (max(0.0, now - mtime) / self.half_life), now, _snapshot(path))
+            self._rebalance()
+        self._start_poller()
+
+    def remove_root(self, root: str):
+        """Stop watching and polling a tree."""
+        with self._lock:
+            watch = self._roots.pop(root, None)
+            self._recursive_dirs.pop(root, None)
+            if watch is not None:
+                self._unschedule(watch)
+            self._forget(root)
+
+    def _forget(self, path: str):
+        prefix = path + os.sep
+        for dir_path in [p for p in self._dirs if p == path or p.startswith(prefix)]:
+            state = self._dirs.pop(dir_path)
+            if state.watch is not None:
+                self._unwatch_dir(state.watch)
+
+    def note_event(self, event):
+        """Count an event's activity and track directories appearing in split roots.
+
+        Runs on the observer thread, which must not wait for this object's
+        lock: that lock is held while scheduling watches, which waits for
+        the observer. Events are queued and applied by whoever holds the lock.
+        """
+        if not self._dirs:
+            return
+        self._pending.append(event)
+        if self._lock.acquire(blocking=False):
+            try:
+                self._apply_pending()
+            finally:
+                self._lock.release()
+
+    def _apply_pending(self):
+        while self._pending:
+            event = self._pending.popleft()
+            state = self._dirs.get(os.path.dirname(event.src_path))
+            if state is not None:
+                self._bump(state)
+            if event.is_directory:
+                if event.event_type in ('deleted', 'moved'):
+                    self._forget(event.src_path)
+                created = event.dest_path if event.event_type == 'moved' else event.src_path
+                if event.event_type in ('created', 'moved') and os.path.dirname(created) in self._dirs:
+                    # Polled from an empty listing, so its current entries are reported once
+                    self._dirs.setdefault(created, _Dir(1.0, time.time(), {}))
+
+    def poll_once(self):
+        """List every polled directory once, dispatching the changes found."""
+        start = time.perf_counter()
+        with self._lock:
+            self._apply_pending()
+            polled = [(path, state) for path, state in self._dirs.items() if state.watch is None]
+        for path, state in polled:
+            snapshot = _snapshot(path)
+            if snapshot is None or state.snapshot is None:
+                state.snapshot = snapshot
+                continue
+            events = _diff(path, state.snapshot, snapshot)
+            state.snapshot = snapshot
+            for event in events:
+                self._dispatch(event)
+        with self._lock:
+            self.metrics['polls'] += 1
+            self.metrics['last_poll_seconds'] = time.perf_counter() - start
+            if self.metrics['polls'] % self.rebalance_every == 0:
+                self._rebalance()
+
+    def _rebalance(self):
+        """Give the watches of split roots to their most active directories."""
+        self._apply_pending()
+        if not self._dirs:
+            return
+        now = time.time()
+        available = len(self._dirs) if self.budget is None else max(0, self.budget - sum(self._recursive_dirs.values()))
+        ranked = sorted(self._dirs, key=lambda p: self._activity(self._dirs[p], now), reverse=True)
+        hot = set(ranked[:available])
+        for path, state in self._dirs.items():
+            if state.watch is not None and path not in hot:
+                state.snapshot = _snapshot(path)
+                self._unwatch_dir(state.watch)
+                state.watch = None
+                self.metrics['demotions'] += 1
+        for path in ranked[:available]:
+            state = self._dirs[path]
+            if state.watch is not None:
+                continue
+            state.watch = self._watch_dir(path)
+            if state.watch is None:
+                break  # Out of watches; the rest stays polled
+            # Report what changed between the last poll and the watch taking over
+            snapshot = _snapshot(path)
+            if state.snapshot is not None and snapshot is not None:
+                for event in _diff(path, state.snapshot, snapshot):
+                    self._dispatch(event)
+            state.snapshot = None
+            self.metrics['promotions'] += 1
+
+    def _start_poller(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._poll_loop, name='watch-poller', daemon=True)
+            self._thread.start()
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"Error polling cold directories: {str(e)}", exc_info=True)
+
+    def stats(self) -> Dict[str, object]:
+        """Watch budget usage, for logs and monitoring."""
+        with self._lock:
+            watched = sum(1 for s in self._dirs.values() if s.watch is not None)
+            # One instance per recursive root; split roots share the group's, or take one per watch
+            instances = sum(1 for w in self._roots.values() if w is not None)
+            instances += (1 if self._group is not None else watched) if watched else 0
+            return {
+                'limit': self.limit,
+                'instance_limit': self.instance_limit,
+                'instances': instances,
+                'threads': threading.active_count(),
+                'budget': self.budget,
+                'used': self._used(),
+                'recursive_roots': len(self._recursive_dirs),
+                'split_roots': sum(1 for w in self._roots.values() if w is None),
+                'watched_dirs': watched,
+                'polled_dirs': len(self._dirs) - watched,
+                **self.metrics,
+            }
+
+    def hot_dirs(self, limit: int = 10) -> List[str]:
+        """The most active directories of split roots."""
+        with self._lock:
+            now = time.time()
+            return sorted(self._dirs, key=lambda p: self._activity(self._dirs[p], now), reverse=True)[:limit]
+
+    def stop(self):
+        """Stop the poller and the shared directory watches; root watches are left to their observer."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            if self._group is not None:
+                self._group.close()
+                self._group = None
+            self._roots.clear()
+            self._recursive_dirs.clear()
+            self._dirs.clear()
+            self._pending.clear()
@@ -0,0 +1,169 @@
+import os
+import logging
+import threading
+from typing import Dict, Hashable, Iterable, List, Optional
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from .watch_budget import WatchBudget
+
+logger = logging.getLogger(__name__)
+
+class _RoutingHandler(FileSystemEventHandler):
+    """Receives every event of the shared observer and routes it."""
+
+    def __init__(self, service: 'WatchService'):
+        self.service = service
+
+    def dispatch(self, event):
+        self.service.route(event)
+
+class WatchService:
+    """One watchdog observer shared by all tracked projects.
+
+    Projects subscribe an event handler for their roots. Each directory is
+    watched once, and roots nested in another watched root add no watch of
+    their own. Events go to the projects subscribed to the longest root
+    that contains the event's path, so a nested project gets its own
+    events rather than its parent. Trees too large for the inotify watch
+    budget are partly polled (see watch_budget).
+    """
+
+    def __init__(self, budget: Optional[int] = None, poll_interval: float = 30.0):
+        self.observer: Optional[Observer] = None
+        self._router = _RoutingHandler(self)
+        # root -> subscriber key -> handler; replaced, never mutated, so routing needs no lock
+        self._subscriptions: Dict[str, Dict[Hashable, FileSystemEventHandler]] = {}
+        self._watches = set()
+        self._lock = threading.Lock()
+        self.budget = WatchBudget(self._schedule, self._unschedule, self.route, budget, poll_interval)
+
+    def subscribe(self, key: Hashable, paths: Iterable, handler: FileSystemEventHandler):
+        """Route events under ``paths`` to ``handler``, replacing an earlier subscription of ``key``."""
+        with self._lock:
+            subscriptions = self._without(key)
+            for path in paths:
+                root = os.path.abspath(str(path))
+                subscriptions[root] = {**subscriptions.get(root, {}), key: handler}
+            self._subscriptions = subscriptions
+            self._sync()
+
+    def unsubscribe(self, key: Hashable):
+        """Stop routing events to a subscriber."""
+        with self._lock:
+            self._subscriptions = self._without(key)
+            self._sync()
+
+    def _without(self, key: Hashable) -> Dict[str, Dict[Hashable, FileSystemEventHandler]]:
+        subscriptions = {}
+        for root, handlers in self._subscriptions.items():
+            if key in handlers:
+                handlers = {k: h for k, h in handlers.items() if k != key}
+            if handlers:
+                subscriptions[root] = handlers
+        return subscriptions
+
+    def _covering_roots(self) -> List[str]:
+        """Roots not inside another subscribed root; only these are watched."""
+        roots = set(self._subscriptions)
+        return sorted(root for root in roots if not self._has_ancestor(root, roots))
+
+    @staticmethod
+    def _has_ancestor(root: str, roots) -> bool:
+        parent = os.path.dirname(root)
+        while parent != root:
+            if parent in roots:
+                return True
+            root, parent = parent, os.path.dirname(parent)
+        return False
+
+    def _schedule(self, path: str, recursive: bool):
+        """Add an inotify watch, or return None if the kernel refuses one."""
+        if self.observer is None:
+            self.observer = Observer()
+            self.observer.start()
+        try:
+            return self.observer.schedule(self._router, path, recursive=recursive)
+        except OSError as e:
+            logger.error(f"Cannot watch {path}: {e}")
+            return None
+
+    def _unschedule(self, watch):
+        try:
+            self.observer.unschedule(watch)
+        except KeyError:
+            pass
+
+    def _sync(self):
+        """Add and remove watched roots to match the subscriptions."""
+        needed = set(self._covering_roots())
+        for root in self._watches - needed:
+            self.budget.remove_root(root)
+            self._watches.discard(root)
+        for root in needed - self._watches:
+            if not os.path.isdir(root):
+                logger.warning(f"Path does not exist: {root}")
+                continue
+            self.budget.add_root(root)
+            self._watches.add(root)
+            logger.info(f"Watching path: {root}")
+
+    def owners(self, path: str) -> List[FileSystemEventHandler]:
+        """Handlers subscribed to the longest root containing ``path``."""
+        subscriptions = self._subscriptions
+        path = os.path.abspath(path)
+        while True:
+            handlers = subscriptions.get(path)
+            if handlers:
+                return list(handlers.values())
+            parent = os.path.dirname(path)
+            if parent == path:
+                return []
+            path = parent
+
+    def route(self, event):
+        """Dispatch an event to its owners; a move reaches the owners of both ends."""
+        self.budget.note_event(event)
+        handlers = self.owners(event.src_path)
+        dest_path = getattr(event, 'dest_path', '')
+        if dest_path:
+            handlers += [h for h in self.owners(dest_path) if h not in handlers]
+        for handler in handlers:
+            try:
+                handler.dispatch(event)
+            except Exception as e:
+                logger.error(f"Error handling {event.event_type} event for {event.src_path}: {str(e)}")
+
+    def stats(self) -> Dict[str, object]:
+        """Subscribed and watched roots, subscribers and watch budget usage."""
+        subscriptions = self._subscriptions
+        return {
+            'roots': len(subscriptions),
+            'watches': len(self._watches),
+            'subscribers': len({key for handlers in subscriptions.values() for key in handlers}),
+            **self.budget.stats(),
+        }
+
+    def stop(self):
+        """Stop the observer and drop all subscriptions."""
+        with self._lock:
+            self._subscriptions = {}
+            self._watches = set()
+            self.budget.stop()
+            if self.observer is not None:
+                self.observer.stop()
+                self.observer.join()
+                self.observer = None
+
+_watch_service: Optional[WatchService] = None
+_watch_service_lock = threading.Lock()
+
+def get_watch_service() -> WatchService:
+    """Get the process-wide watch service."""
+    global _watch_service
+    if _watch_service is None:
+        with _watch_service_lock:
+            if _watch_service is None:
+                _watch_service = WatchService()
+    return _watch_service
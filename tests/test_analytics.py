@@ -0,0 +1,110 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.scripts import analytics
+from src.scripts.analytics import AnalyticsExporter
+from src.scripts.project_context import PROJECTS_ROOT
+from src.scripts import track_change
+
+class TestAnalyticsExport(unittest.TestCase):
+    def setUp(self):
+        """Create a small tracked project with changes, decisions and sessions."""
+        self.base_dir = Path(tempfile.mkdtemp())
+        self._write_change('20250401', '20250401_100000_000000', 'alice', 'a.py b.py')
+        self._write_change('20250401', '20250401_110000_000000', 'bob', 'a.py')
+        self._write_change('20250402', '20250402_090000_000000', 'alice', 'c.py')
+        decisions = self.base_dir / 'decisions'
+        decisions.mkdir()
+        self._write_json(decisions / 'decision_1.json', {
+            'id': 'decision_1', 'status': 'proposed', 'timestamp': '2025-04-01T00:00:00'})
+        sessions = self.base_dir / 'ai_conversations'
+        sessions.mkdir()
+        self._write_json(sessions / 'chat_20250401_100000.json', {
+            'session_name': 'chat', 'start_time': '2025-04-01T10:00:00',
+            'end_time': '2025-04-01T10:30:00', 'duration_seconds': 1800.0, 'events': []})
+        self.exporter = AnalyticsExporter('test', base_dir=self.base_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir)
+
+    def _write_change(self, day, timestamp, author, files):
+        day_dir = self.base_dir / 'changes' / day
+        day_dir.mkdir(parents=True, exist_ok=True)
+        (day_dir / f'change_{timestamp}.txt').write_text(
+            f"Description: test\nFiles Changed: {files}\nAuthor: {author}\nTimestamp: {timestamp}\n")
+
+    def _write_json(self, path, data):
+        path.write_text(json.dumps(data))
+
+    def _check_aggregates(self):
+        store = self.exporter.load()
+        self.assertEqual(store.changes_per_day(), {'20250401': 3, '20250402': 1})
+        self.assertEqual(store.changes_per_author(), {'alice': 3, 'bob': 1})
+        self.assertEqual(store.changes_per_file(), {'a.py': 2, 'b.py': 1, 'c.py': 1})
+        self.assertEqual(store.session_lengths(), {os.path.join('ai_conversations', 'chat_20250401_100000.json'): 1800.0})
+        return store
+
+    def test_aggregates_with_numpy_and_array_fallback(self):
+        """NumPy and the pure array fallback give the same answers."""
+        self.exporter.export()
+        self._check_aggregates()
+        with patch.object(analytics, 'np', None):
+            self._check_aggregates()
+
+    def test_incremental_export_only_adds_new_rows(self):
+        """A second export ingests only what changed since the first."""
+        first = self.exporter.export()
+        self.assertEqual(first['changes'], 4)
+        self.assertEqual(self.exporter.export(), {'changes': 0, 'decision_status': 0, 'sessions': 0})
+
+        self._write_change('20250402', '20250402_120000_000000', 'bob', 'd.py')
+        decision = self.base_dir / 'decisions' / 'decision_1.json'
+        self._write_json(decision, {'id': 'decision_1', 'status': 'accepted',
+                                    'timestamp': '2025-04-01T00:00:00',
+                                    'updated_at': '2025-04-03T00:00:00'})
+        os.utime(decision, ns=(1, 1))
+        second = self.exporter.export()
+        self.assertEqual(second, {'changes': 1, 'decision_status': 1, 'sessions': 0})
+
+        store = self.exporter.load()
+        self.assertEqual(store.changes_per_author()['bob'], 2)
+        now = analytics._parse_time('2025-04-04T00:00:00')
+        for np_module in (analytics.np, None):
+            with patch.object(analytics, 'np', np_module):
+                durations = store.decision_status_durations(now=now)
+                self.assertEqual(durations, {'proposed': 2 * 86400.0, 'accepted': 86400.0})
+
+    def test_incremental_export_reads_only_new_state(self):
+        """Later exports reuse the string table read before and keep one mark per day, not every record."""
+        self.exporter.export()
+        self._write_change('20250402', '20250402_120000_000000', 'carol', 'a.py')
+        path = str(self.base_dir / 'changes' / '20250402' / 'change_20250402_120000_000000.txt')
+        with patch.object(AnalyticsExporter, '_load_strings', side_effect=AssertionError('string table reloaded')):
+            self.assertEqual(self.exporter.export(changes=[path])['changes'], 1)
+        manifest = json.loads((self.base_dir / 'analytics' / analytics.MANIFEST_FILE).read_text())
+        self.assertEqual(manifest['change_marks'], {'20250401': 'change_20250401_110000_000000.txt',
+                                                    '20250402': 'change_20250402_120000_000000.txt'})
+        self.assertFalse([key for key in manifest['sources'] if key.startswith('changes')])
+        self.assertEqual(self.exporter.load().changes_per_author(), {'alice': 3, 'bob': 1, 'carol': 1})
+
+    def test_new_change_records_are_exported_as_written(self):
+        """record_change queues its record, and the flush ingests only the queued records."""
+        project = 'test_analytics_hook'
+        self.addCleanup(shutil.rmtree, os.path.join(PROJECTS_ROOT, project), True)
+        with patch.object(track_change, 'ANALYTICS_DELAY', 60):
+            track_change.record_change('hooked', 'x.py y.py', project)
+        # As at process exit, before the timer fires
+        with patch.object(AnalyticsExporter, '_iter_sources', side_effect=AssertionError('full scan')):
+            track_change.flush_all_analytics()
+        exporter = AnalyticsExporter(project)
+        self.assertEqual(exporter.load().changes_per_file(), {'x.py': 1, 'y.py': 1})
+        # Already exported: a later full export adds nothing
+        self.assertEqual(exporter.export()['changes'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import errno
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from watchdog.events import FileModifiedEvent
+
+from src.scripts.backup_workers import BackupPool, copy_file
+from src.scripts.file_watcher import FileWatcher
+
+class TestCopyFile(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.src = os.path.join(self.test_dir, 'src.bin')
+        self.data = os.urandom(3 * 1024 * 1024 + 17)
+        with open(self.src, 'wb') as f:
+            f.write(self.data)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _copy(self, digest=None):
+        dst = os.path.join(self.test_dir, 'dst.bin')
+        with open(self.src, 'rb') as f_in, open(dst, 'wb') as f_out:
+            method = copy_file(f_in.fileno(), f_out.fileno(), digest)
+        with open(dst, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+        return method
+
+    def test_copies_in_kernel(self):
+        """Files are reflinked or copied by the kernel where available."""
+        self.assertIn(self._copy(), ('reflink', 'copy_file_range', 'sendfile', 'read'))
+
+    def test_falls_back_when_methods_are_unsupported(self):
+        """Unsupported methods (e.g. across filesystems) fall through to the next one."""
+        unsupported = OSError(errno.EXDEV, 'Invalid cross-device link')
+        with patch('src.scripts.backup_workers.fcntl', None), \
+                patch('os.copy_file_range', side_effect=unsupported, create=True), \
+                patch('os.sendfile', side_effect=unsupported, create=True):
+            digest = hashlib.sha256()
+            self.assertEqual(self._copy(digest), 'read')
+        # The plain read copy hashes the data it passes through
+        self.assertEqual(digest.hexdigest(), hashlib.sha256(self.data).hexdigest())
+
+class TestBackupPool(unittest.TestCase):
+    def setUp(self):
+        self.done = []
+        self.release = threading.Event()
+
+    def _backup(self, file_path):
+        self.release.wait(5)
+        self.done.append(file_path)
+
+    def test_keeps_per_file_order_and_coalesces(self):
+        """A path already waiting is not queued twice; others run in submission order."""
+        pool = BackupPool(self._backup, workers=1)
+        pool.start()
+        for path in ('a', 'b', 'a', 'c', 'b'):
+            pool.submit(path)
+        self.release.set()
+        pool.stop()
+        self.assertEqual(self.done, ['a', 'b', 'c'])
+        self.assertEqual(pool.stats()['coalesced'], 2)
+
+    def test_full_queue_applies_backpressure(self):
+        """Submitting to a full queue waits, then drops the backup at its timeout."""
+        pool = BackupPool(self._backup, workers=1, maxsize=1)
+        pool.start()
+        pool.submit('busy')
+        time.sleep(0.05)
+        pool.submit('queued')
+        start = time.monotonic()
+        self.assertFalse(pool.submit('dropped', timeout=0.1))
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+        self.release.set()
+        pool.stop()
+        self.assertEqual(self.done, ['busy', 'queued'])
+        self.assertEqual(pool.stats()['dropped'], 1)
+
+    def test_watcher_does_not_wait_for_backups(self):
+        """A slow backup does not hold up the delivery of change records."""
+        test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, test_dir)
+        file_path = os.path.join(test_dir, 'large.bin')
+        with open(file_path, 'wb') as f:
+            f.write(b'x' * 1024)
+        pool = BackupPool(self._backup)
+        pool.start()
+        records = []
+        watcher = FileWatcher([test_dir], enable_ai_features=False, backups=pool)
+        watcher.subscribe(records.append)
+        start = time.monotonic()
+        watcher.event_handler.dispatch(FileModifiedEvent(file_path))
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(len(records), 1)
+        self.assertEqual(self.done, [])
+        self.release.set()
+        pool.stop()
+        self.assertEqual(self.done, [file_path])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from src.scripts.capture_engine import CaptureEngine
+from src.scripts.project_context import PROJECTS_ROOT
+from src.scripts.track_change import OptimizedCapture
+
+PROJECT = 'test_capture_engine'
+
+class TestCaptureEngine(unittest.TestCase):
+    def test_items_are_handled_in_order(self):
+        """Each stream handles its items in submission order, off the loop thread."""
+        handled = []
+        threads = set()
+
+        def handler(item):
+            threads.add(threading.current_thread().name)
+            handled.append(item)
+
+        engine = CaptureEngine({'file': handler})
+        engine.start()
+        for i in range(50):
+            engine.submit('file', i)
+        engine.stop()
+        self.assertEqual(handled, list(range(50)))
+        self.assertTrue(all(name.startswith('capture') and name != 'capture-loop' for name in threads))
+        self.assertFalse(engine.running)
+
+    def test_full_queue_applies_backpressure(self):
+        """Producers wait while a queue is full and drop only after their timeout."""
+        release = threading.Event()
+        engine = CaptureEngine({'file': lambda item: release.wait()}, maxsize=1)
+        engine.start()
+        self.assertTrue(engine.submit('file', 'taken by the handler'))
+        time.sleep(0.05)
+        self.assertTrue(engine.submit('file', 'queued'))
+        self.assertFalse(engine.submit('file', 'dropped', timeout=0.1))
+        self.assertEqual(engine.dropped['file'], 1)
+        release.set()
+        engine.stop()
+
+class TestOptimizedCaptureEngine(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.capture = OptimizedCapture(PROJECT, watch_paths=[self.test_dir])
+
+    def tearDown(self):
+        self.capture.stop_capture()
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(os.path.join(PROJECTS_ROOT, PROJECT), ignore_errors=True)
+
+    def test_capture_streams_share_one_loop(self):
+        """File events and chat messages flow through the engine and stop cleanly."""
+        self.assertTrue(self.capture.enable_ai_features)
+        self.assertIsNone(self.capture.file_queue)
+        self.capture.start_capture()
+        self.assertEqual(self.capture.file_queue.maxsize, OptimizedCapture.QUEUE_SIZE)
+
+        with open(os.path.join(self.test_dir, 'watched.txt'), 'w') as f:
+            f.write('content')
+        self.capture.ai_tracker.start_session('engine', 'Engine test')
+        self.capture.capture_chat({'role': 'user', 'text': 'hello'})
+        deadline = time.monotonic() + 2
+        while not self.capture.file_watcher.changes and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+        self.capture.stop_capture()
+        self.assertTrue(self.capture.stop_event.is_set())
+        self.assertTrue(any('watched.txt' in c['title'] for c in self.capture.file_watcher.changes))
+        self.assertEqual(self.capture.ai_tracker.get_session_history('engine')[0]['events'][0]['type'], 'chat')
+
+if __name__ == '__main__':
+    unittest.main()
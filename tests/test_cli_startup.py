@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestCliStartup(unittest.TestCase):
+    def _modules_after(self, statement):
+        """Run a statement in a fresh interpreter and return its loaded modules."""
+        code = f"import sys; {statement}; print('\\n'.join(sys.modules))"
+        output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout
+        return set(output.split())
+
+    def test_record_path_skips_heavy_imports(self):
+        """Importing the record writers does not load watchdog or the permission stack."""
+        modules = self._modules_after('import src.scripts.track_change')
+        self.assertNotIn('watchdog', modules)
+        self.assertNotIn('src.scripts.file_watcher', modules)
+        self.assertNotIn('src.scripts.permission_manager', modules)
+        self.assertNotIn('sqlite3', modules)
+
+    def test_package_imports_submodules_lazily(self):
+        """The package only imports a submodule when it is accessed."""
+        modules = self._modules_after('import src.scripts')
+        self.assertNotIn('src.scripts.track_change', modules)
+        modules = self._modules_after('import src.scripts; src.scripts.decision_tracking')
+        self.assertIn('src.scripts.decision_tracking', modules)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from argparse import Namespace
+from unittest.mock import patch
+
+from src.scripts.cli import run_remote
+from src.scripts.daemon import SigfileService, create_server
+from src.scripts.daemon_client import DaemonClient, DaemonError, DaemonUnavailable, call
+from src.scripts.project_context import PROJECTS_ROOT
+
+PROJECT = 'test_daemon'
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'sigfiled.sock')
+        self.watched = os.path.join(self.test_dir, 'src')
+        os.makedirs(self.watched)
+        self.server = create_server(self.path, SigfileService())
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(os.path.join(PROJECTS_ROOT, PROJECT), ignore_errors=True)
+
+    def test_requests_share_a_connection(self):
+        """Several requests run over one connection and see each other's writes."""
+        with DaemonClient(self.path) as client:
+            self.assertEqual(client.call('ping')['pid'], os.getpid())
+            change_file = client.call('record', project=PROJECT, description='Via daemon', files='a.py')
+            self.assertTrue(os.path.isfile(change_file))
+            records = client.call('history', project=PROJECT, limit=5)
+            self.assertEqual([r['description'] for r in records], ['Via daemon'])
+
+            start = time.perf_counter()
+            for _ in range(100):
+                client.call('ping')
+            self.assertLess((time.perf_counter() - start) / 100, 0.01)
+
+    def test_errors_are_reported(self):
+        """Failed commands raise DaemonError and leave the daemon running."""
+        with self.assertRaises(DaemonError):
+            call('backup', self.path, project=PROJECT, file=os.path.join(self.test_dir, 'missing'))
+        with self.assertRaises(DaemonError):
+            call('no-such-command', self.path)
+        self.assertIn('uptime', call('ping', self.path))
+
+    def test_projects_are_captured_on_request(self):
+        """Only a capture request starts capture, from the project's own root, until the daemon shuts down."""
+        call('history', self.path, project=PROJECT, limit=1)
+        self.assertEqual(self.server.service._roots, {})
+        self.assertEqual(call('capture', self.path, project=PROJECT, root=self.watched), self.watched)
+        capture = self.server.service._trackers[PROJECT]
+        self.assertTrue(capture.file_watcher.is_watching())
+        with self.assertRaises(DaemonError):
+            call('capture', self.path, project='other', root=self.test_dir)
+
+        path = os.path.join(self.watched, 'module.py')
+        with open(path, 'w') as f:
+            f.write('print(1)\n')
+        deadline = time.monotonic() + 5
+        while not any(path in change['files'] for change in list(capture.file_watcher.changes)):
+            self.assertLess(time.monotonic(), deadline, "Change was not captured")
+            time.sleep(0.05)
+
+        self.server.server_close()
+        self.assertFalse(capture.file_watcher.is_watching())
+
+    def test_second_daemon_refused(self):
+        """A second daemon refuses to start while the first one answers."""
+        with self.assertRaises(RuntimeError):
+            create_server(self.path)
+        with self.assertRaises(DaemonUnavailable):
+            call('ping', os.path.join(self.test_dir, 'other.sock'))
+
+    def test_call_is_not_repeated_when_daemon_goes_away(self):
+        """A command sent before the daemon went away is not run again in-process."""
+        path = os.path.join(self.test_dir, 'dying.sock')
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(listener.close)
+        listener.bind(path)
+        listener.listen(1)
+
+        def accept_and_drop():
+            conn, _ = listener.accept()
+            conn.recv(4096)
+            conn.close()
+
+        thread = threading.Thread(target=accept_and_drop)
+        thread.start()
+        args = Namespace(command='record', project=PROJECT, description='Once', files=['a.py'])
+        with patch.dict(os.environ, {'SIGFILE_SOCKET': path}):
+            with self.assertRaises(RuntimeError):
+                run_remote(args)
+        thread.join()
+        with patch.dict(os.environ, {'SIGFILE_SOCKET': os.path.join(self.test_dir, 'none.sock')}):
+            self.assertFalse(run_remote(args))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.scripts import day_sealer
+from src.scripts.day_sealer import (
+    load_manifest, note_record, open_record, seal_directory, verify_directory, WRITER_MODE
+)
+from src.scripts.file_attributes import apply_immutable
+from src.scripts.track_change import finalize_change
+
+class TestDaySealer(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.test_dir, 'changes')
+        day_sealer._current_days.clear()
+
+    def tearDown(self):
+        paths = [os.path.join(root, name) for root, _, names in os.walk(self.test_dir) for name in names]
+        apply_immutable(paths, immutable=False, mode=0o644)
+        shutil.rmtree(self.test_dir)
+
+    def _write(self, day, name, content='record'):
+        day_dir = os.path.join(self.root, day)
+        os.makedirs(day_dir, exist_ok=True)
+        path = os.path.join(day_dir, name)
+        with open_record(path) as f:
+            f.write(content)
+        note_record(day_dir)
+        return path
+
+    def test_records_stay_writable_until_rollover(self):
+        """Today's records are writer-only; the next day seals them in bulk."""
+        first = self._write('20241019', 'change_1.txt')
+        self.assertEqual(stat.S_IMODE(os.stat(first).st_mode), WRITER_MODE)
+        with open(first, 'a') as f:
+            f.write(' linked')
+
+        second = self._write('20241020', 'change_2.txt')
+        self.assertEqual(stat.S_IMODE(os.stat(first).st_mode), 0o444)
+        self.assertEqual(stat.S_IMODE(os.stat(second).st_mode), WRITER_MODE)
+        manifest = load_manifest(os.path.dirname(first))
+        self.assertTrue(manifest['complete'])
+        self.assertEqual(manifest['files']['change_1.txt']['size'], len('record linked'))
+
+    def test_complete_days_are_not_reread(self):
+        """A process's first write skips the manifests of days already sealed as complete."""
+        first = self._write('20241019', 'change_1.txt')
+        self._write('20241020', 'change_2.txt')
+        day_sealer._current_days.clear()
+        with patch('src.scripts.day_sealer.load_manifest', wraps=load_manifest) as loads:
+            self._write('20241021', 'change_3.txt')
+        self.assertNotIn(os.path.dirname(first), [call.args[0] for call in loads.call_args_list])
+        self.assertTrue(load_manifest(os.path.join(self.root, '20241020'))['complete'])
+
+    def test_finalize_seals_new_files_only(self):
+        """Repeated seals of a day only add files sealed since the last pass."""
+        first = self._write('20241019', 'change_1.txt')
+        day_dir = os.path.dirname(first)
+        self.assertEqual(seal_directory(day_dir).succeeded, 1)
+        self._write('20241019', 'change_2.txt')
+        self.assertEqual(seal_directory(day_dir).succeeded, 1)
+        self.assertEqual(sorted(load_manifest(day_dir)['files']), ['change_1.txt', 'change_2.txt'])
+        self.assertEqual(verify_directory(day_dir), {})
+
+    def test_finalize_change_seals_only_that_change(self):
+        """Finalizing one change leaves the day's other records writable."""
+        first = self._write('20241019', 'change_1.txt')
+        second = self._write('20241019', 'change_2.txt')
+        finalize_change(first)
+        self.assertEqual(stat.S_IMODE(os.stat(first).st_mode), 0o444)
+        self.assertEqual(stat.S_IMODE(os.stat(second).st_mode), WRITER_MODE)
+        self.assertEqual(list(load_manifest(os.path.dirname(first))['files']), ['change_1.txt'])
+
+    def test_verify_detects_tampering(self):
+        """Content that no longer matches the manifest hash is reported."""
+        path = self._write('20241019', 'change_1.txt')
+        seal_directory(os.path.dirname(path))
+        apply_immutable([path], immutable=False, mode=0o644)
+        with open(path, 'w') as f:
+            f.write('tampered')
+        self.assertEqual(verify_directory(os.path.dirname(path)), {'change_1.txt': 'hash mismatch'})
+
+if __name__ == '__main__':
+    unittest.main()
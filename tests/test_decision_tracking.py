@@ -0,0 +1,90 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.scripts.decision_tracking import DecisionTracker
+
+def _record_opens(func, *args, **kwargs):
+    """Call func and return the basenames of every file it opened."""
+    opened = []
+    real_open = open
+
+    def tracking_open(path, *open_args, **open_kwargs):
+        opened.append(Path(path).name)
+        return real_open(path, *open_args, **open_kwargs)
+
+    with patch('builtins.open', tracking_open):
+        result = func(*args, **kwargs)
+    return opened, result
+
+class TestDecisionPagination(unittest.TestCase):
+    def setUp(self):
+        """Point a tracker at a temporary decisions directory."""
+        self.test_dir = tempfile.mkdtemp()
+        self.tracker = DecisionTracker('sigfile')
+        self.tracker.decisions_dir = Path(self.test_dir)
+        for i in range(7):
+            decision = {
+                'id': f'decision_20250101_00000{i}',
+                'title': f'Decision {i}',
+                'description': 'desc',
+                'timestamp': f'2025-01-01T00:00:0{i}',
+                'status': 'proposed'
+            }
+            with open(Path(self.test_dir) / f"{decision['id']}.json", 'w') as f:
+                json.dump(decision, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+        self.tracker._header_cache_path().unlink(missing_ok=True)
+
+    def test_cursor_pages_cover_all_decisions_newest_first(self):
+        """Pages chained by cursor return every decision exactly once."""
+        pages = list(self.tracker.iter_header_pages(page_size=3))
+        self.assertEqual([len(p) for p in pages], [3, 3, 1])
+        ids = [h['id'] for page in pages for h in page]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(set(pages[0][0]), {'id', 'title', 'description', 'timestamp', 'status'})
+
+    def test_next_page_does_not_reread_earlier_pages(self):
+        """Only files of the requested page are opened."""
+        first = self.tracker.list_headers(limit=3)
+        opened, second = _record_opens(self.tracker.list_headers, after=first[-1]['id'], limit=3)
+        decision_files = [name for name in opened if name.startswith('decision_')]
+        self.assertEqual(sorted(decision_files), sorted(f"{h['id']}.json" for h in second))
+
+    def test_header_cache_persists_across_trackers(self):
+        """A fresh tracker serves headers from the persisted cache."""
+        self.tracker.list_headers()
+        tracker = DecisionTracker('sigfile')
+        tracker.decisions_dir = Path(self.test_dir)
+        opened, headers = _record_opens(tracker.list_headers, limit=2)
+        self.assertFalse([name for name in opened if name.startswith('decision_')])
+        self.assertEqual(headers[0]['title'], 'Decision 6')
+        self.assertFalse(tracker._headers_dirty)
+
+    def test_saving_headers_keeps_the_id_listing(self):
+        """Persisting the header cache does not invalidate the cached id listing."""
+        self.tracker.list_headers()
+        with patch('os.scandir') as scandir:
+            self.assertEqual(len(self.tracker.list_headers()), 7)
+        scandir.assert_not_called()
+
+    def test_old_cache_entries_are_reread(self):
+        """Headers cached without a description are refreshed from their files."""
+        self.tracker.list_headers()
+        for header in self.tracker._headers.values():
+            del header['description']
+        self.assertEqual({h['description'] for h in self.tracker.list_headers()}, {'desc'})
+
+    def test_list_decisions_after_cursor(self):
+        """Full decisions honour the cursor as well."""
+        decisions = self.tracker.list_decisions(limit=2, after='decision_20250101_000003')
+        self.assertEqual([d['id'] for d in decisions],
+                         ['decision_20250101_000002', 'decision_20250101_000001'])
+
+if __name__ == '__main__':
+    unittest.main()
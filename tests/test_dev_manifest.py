@@ -0,0 +1,100 @@
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.scripts.day_sealer import seal_directory
+from src.scripts.dev_manifest import DevModeManifest
+from src.scripts.file_attributes import apply_immutable, is_immutable, set_immutable
+from src.scripts.role_store import RoleStore
+
+class TestDevModeManifest(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.test_dir, 'project')
+        os.makedirs(os.path.join(self.root, 'changes', '20241019'))
+        self.sealed = os.path.join(self.root, 'changes', '20241019', 'change_1.json')
+        self.writable = os.path.join(self.root, 'changes', 'notes.txt')
+        for path in (self.sealed, self.writable):
+            with open(path, 'w') as f:
+                f.write('record')
+        set_immutable(self.sealed)
+        self.db_path = os.path.join(self.test_dir, 'permissions.db')
+        self.store = RoleStore(self.db_path)
+
+    def tearDown(self):
+        self.store.close()
+        paths = [os.path.join(root, name) for root, _, names in os.walk(self.test_dir) for name in names]
+        apply_immutable(paths, immutable=False, mode=0o644)
+        shutil.rmtree(self.test_dir)
+
+    def test_round_trip_restores_only_changed_files(self):
+        """Entering unseals sealed files; leaving restores them and seals new files."""
+        flagged = is_immutable(self.sealed)
+        result = DevModeManifest(self.store).enter(self.root)
+        self.assertEqual(result.succeeded, 1)
+        with open(self.sealed, 'a') as f:
+            f.write(' edited')
+
+        created = os.path.join(self.root, 'changes', '20241020', 'change_2.json')
+        os.makedirs(os.path.dirname(created))
+        with open(created, 'w') as f:
+            f.write('new record')
+
+        result = DevModeManifest(self.store).exit(self.root)
+        self.assertEqual(result.succeeded, 2)
+        self.assertEqual(stat.S_IMODE(os.stat(self.sealed).st_mode), 0o444)
+        self.assertEqual(is_immutable(self.sealed), flagged)
+        self.assertEqual(stat.S_IMODE(os.stat(created).st_mode), 0o444)
+        # Files that were writable before dev mode are left alone
+        self.assertTrue(os.stat(self.writable).st_mode & stat.S_IWUSR)
+        self.assertFalse(DevModeManifest(self.store).is_active(self.root))
+
+    def test_session_survives_restart(self):
+        """A session begun by one process can be ended by another."""
+        DevModeManifest(self.store).enter(self.root)
+        self.store.close()
+
+        self.store = RoleStore(self.db_path)
+        manifest = DevModeManifest(self.store)
+        self.assertTrue(manifest.is_active(self.root))
+        manifest.exit(self.root)
+        self.assertEqual(stat.S_IMODE(os.stat(self.sealed).st_mode), 0o444)
+
+    def test_deleted_files_are_not_failures(self):
+        """Files removed during the session are skipped when re-sealing."""
+        DevModeManifest(self.store).enter(self.root)
+        os.remove(self.sealed)
+        result = DevModeManifest(self.store).exit(self.root)
+        self.assertEqual(result.failed, 0)
+
+    def test_sealed_days_are_taken_from_their_manifests(self):
+        """Files of completed days are unsealed without probing them, and new files there are sealed on exit."""
+        day_dir = os.path.join(self.root, 'changes', '20241018')
+        os.makedirs(day_dir)
+        paths = [os.path.join(day_dir, f'change_{i}.json') for i in range(3)]
+        for path in paths:
+            with open(path, 'w') as f:
+                f.write('record')
+        seal_directory(day_dir, complete=True)
+
+        with patch('src.scripts.dev_manifest.is_immutable', wraps=is_immutable) as probe, \
+                patch('os.scandir', wraps=os.scandir) as scandir:
+            result = DevModeManifest(self.store).enter(self.root)
+        self.assertEqual(result.succeeded, 4)
+        self.assertEqual([call.args[0] for call in probe.call_args_list], [self.sealed])
+        self.assertNotIn(day_dir, [call.args[0] for call in scandir.call_args_list])
+        self.assertTrue(all(os.stat(path).st_mode & stat.S_IWUSR for path in paths))
+
+        created = os.path.join(day_dir, 'change_3.json')
+        with open(created, 'w') as f:
+            f.write('late record')
+        result = DevModeManifest(self.store).exit(self.root)
+        self.assertEqual(result.succeeded, 5)
+        for path in paths + [created]:
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o444)
+
+if __name__ == '__main__':
+    unittest.main()
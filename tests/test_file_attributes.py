@@ -0,0 +1,68 @@
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+from src.scripts.file_attributes import apply_immutable, set_immutable
+
+class TestFileAttributes(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.paths = []
+        for i in range(600):
+            path = os.path.join(self.test_dir, f'record_{i}.txt')
+            with open(path, 'w') as f:
+                f.write('record')
+            self.paths.append(path)
+
+    def tearDown(self):
+        apply_immutable(self.paths, immutable=False, mode=0o644)
+        shutil.rmtree(self.test_dir)
+
+    def test_set_and_clear_single_file(self):
+        """Sealing makes a file read-only and, where supported, immutable."""
+        path = self.paths[0]
+        method = set_immutable(path)
+        self.assertIn(method, ('ioctl', 'chflags', 'chmod'))
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o444)
+        if method != 'chmod':
+            with self.assertRaises(PermissionError):
+                with open(path, 'w') as f:
+                    f.write('tamper')
+
+        set_immutable(path, False, 0o644)
+        with open(path, 'w') as f:
+            f.write('writable again')
+
+    def test_resealing_changes_mode(self):
+        """A sealed file can be resealed with a different mode."""
+        path = self.paths[0]
+        set_immutable(path)
+        set_immutable(path, True, 0o400)
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o400)
+
+    def test_bulk_reports_failures_in_aggregate(self):
+        """Bulk changes cover every file and collect per-file errors."""
+        missing = os.path.join(self.test_dir, 'missing.txt')
+        result = apply_immutable(self.paths + [missing], max_workers=4)
+        self.assertEqual(result.succeeded, len(self.paths))
+        self.assertEqual(list(result.failures), [missing])
+        self.assertEqual(sum(result.methods.values()), len(self.paths))
+        self.assertTrue(all(stat.S_IMODE(os.stat(p).st_mode) == 0o444 for p in self.paths))
+
+        result = apply_immutable(self.paths, immutable=False, mode=0o644)
+        self.assertEqual(result.failed, 0)
+        self.assertTrue(all(stat.S_IMODE(os.stat(p).st_mode) == 0o644 for p in self.paths))
+
+    def test_symlinks_are_not_followed(self):
+        """A symlink is reported as a failure and its target is left alone."""
+        link = os.path.join(self.test_dir, 'link.txt')
+        os.symlink(self.paths[0], link)
+        result = apply_immutable([link, self.paths[1]])
+        self.assertEqual(list(result.failures), [link])
+        self.assertEqual(result.succeeded, 1)
+        self.assertEqual(stat.S_IMODE(os.stat(self.paths[0]).st_mode), 0o644)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from watchdog.events import FileCreatedEvent, FileDeletedEvent, FileModifiedEvent, FileMovedEvent
+
+from src.scripts.file_watcher import FileChangeHandler, FileWatcher
+from src.scripts.watch_service import get_watch_service
+
+class TestFileChangeHandlerMoves(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.records = []
+        self.handler = FileChangeHandler(self.records.append, move_window=0.05)
+
+    def tearDown(self):
+        self.handler.flush_deletes(force=True)
+        shutil.rmtree(self.test_dir)
+
+    def _write(self, name, content):
+        path = os.path.join(self.test_dir, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def _changes(self):
+        return [(r['metadata']['change_type'], r['files']) for r in self.records]
+
+    def test_rename_is_one_moved_record_without_rehash(self):
+        """A rename carries the cached hash over to the new path."""
+        src = self._write('a.txt', 'content')
+        self.handler.dispatch(FileModifiedEvent(src))
+        dest = os.path.join(self.test_dir, 'b.txt')
+        os.rename(src, dest)
+        with patch('src.scripts.file_watcher.hashlib.sha256', wraps=hashlib.sha256) as sha256:
+            self.handler.dispatch(FileMovedEvent(src, dest))
+        sha256.assert_not_called()
+        self.assertEqual(self._changes()[-1], ('moved', [src, dest]))
+        self.assertEqual(self.records[-1]['context']['file_info']['hash'],
+                         self.records[0]['context']['file_info']['hash'])
+
+    def test_atomic_save_is_a_modification(self):
+        """Renaming a temporary file over a known file records a modification of that file."""
+        target = self._write('doc.txt', 'old')
+        self.handler.dispatch(FileModifiedEvent(target))
+        temp = self._write('.doc.txt.tmp', 'new')
+        os.replace(temp, target)
+        self.handler.dispatch(FileMovedEvent(temp, target))
+        self.assertEqual(self._changes()[-1], ('modified', [target]))
+        self.assertEqual(self.records[-1]['metadata']['replaced_by'], temp)
+
+    def test_renames_not_named_like_temporary_copies_are_moves(self):
+        """A rename whose source merely contains the target's name, or replaces a known file, is a move."""
+        for name in ('old_notes.md', 'notes.md.bak'):
+            target = self._write('notes.md', 'old')
+            self.handler.dispatch(FileModifiedEvent(target))
+            src = self._write(name, 'new')
+            os.replace(src, target)
+            self.handler.dispatch(FileMovedEvent(src, target))
+            self.assertEqual(self._changes()[-1], ('moved', [src, target]))
+        temp = self._write('.notes.md.a1B2c3', 'saved')
+        os.replace(temp, target)
+        self.handler.dispatch(FileMovedEvent(temp, target))
+        self.assertEqual(self._changes()[-1], ('modified', [target]))
+
+    def test_save_over_unhashed_target_is_a_modification(self):
+        """An editor's temporary copy renamed over a file never seen before modifies that file and backs it up."""
+        target = self._write('a.txt', 'old')
+        backups = Mock()
+        watcher = FileWatcher([self.test_dir], enable_ai_features=False, service=get_watch_service(),
+                              backups=backups)
+        watcher.subscribe(self.records.append)
+        temp = self._write('.a.txt.swp', 'new')
+        os.replace(temp, target)
+        watcher.event_handler.dispatch(FileMovedEvent(temp, target))
+        self.assertEqual(self._changes(), [('modified', [target])])
+        backups.submit.assert_called_once_with(target)
+
+    def test_delete_and_create_of_same_inode_is_a_move(self):
+        """Platforms reporting a move as delete plus create still produce one moved record."""
+        src = self._write('a.txt', 'content')
+        self.handler.dispatch(FileModifiedEvent(src))
+        dest = os.path.join(self.test_dir, 'sub.txt')
+        os.rename(src, dest)
+        self.handler.dispatch(FileDeletedEvent(src))
+        self.handler.dispatch(FileCreatedEvent(dest))
+        time.sleep(0.15)
+        self.assertEqual(self._changes()[1:], [('moved', [src, dest])])
+
+    def test_delete_and_create_of_same_content_is_a_move(self):
+        """Without a matching inode, the content hash pairs the delete with the create."""
+        src = self._write('a.txt', 'content')
+        self.handler.dispatch(FileModifiedEvent(src))
+        dest = self._write('copy.txt', 'content')
+        os.remove(src)
+        self.handler.dispatch(FileDeletedEvent(src))
+        self.handler.dispatch(FileCreatedEvent(dest))
+        self.assertEqual(self._changes()[1:], [('moved', [src, dest])])
+
+    def test_unmatched_delete_is_recorded_after_window(self):
+        """A delete with no matching create is recorded once the move window has passed."""
+        path = self._write('a.txt', 'content')
+        os.remove(path)
+        self.handler.dispatch(FileDeletedEvent(path))
+        self.assertEqual(self.records, [])
+        time.sleep(0.15)
+        self.assertEqual(self._changes(), [('deleted', [path])])
+
+    def test_large_file_rename_is_metadata_only(self):
+        """A large file that was never hashed is not read to record its rename."""
+        src = self._write('big.bin', 'x' * 64)
+        dest = os.path.join(self.test_dir, 'big2.bin')
+        os.rename(src, dest)
+        with patch('src.scripts.file_watcher.LARGE_FILE_SIZE', 16), \
+                patch('src.scripts.file_watcher.hashlib.sha256', wraps=hashlib.sha256) as sha256:
+            self.handler.dispatch(FileMovedEvent(src, dest))
+        sha256.assert_not_called()
+        self.assertEqual(self._changes(), [('moved', [src, dest])])
+        self.assertEqual(self.records[0]['context']['file_info']['size'], 64)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import unittest
+from argparse import Namespace
+from unittest.mock import patch
+
+from src.scripts.cli import run_scan
+from src.scripts.file_watcher import FileWatcher
+from src.scripts.git_index import GitChangeDetector, read_index
+
+def git(cwd, *args):
+    subprocess.run(['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com', *args],
+                   cwd=cwd, check=True, stdout=subprocess.DEVNULL)
+
+@unittest.skipUnless(shutil.which('git'), 'git is needed to build test repositories')
+class TestGitIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = os.path.realpath(tempfile.mkdtemp())
+        git(self.test_dir, 'init', '-q')
+        git(self.test_dir, 'config', 'core.untrackedCache', 'true')
+        for path, content in (('src/app.py', 'print(1)\n'), ('src/lib/util.py', 'x = 1\n'),
+                              ('README.md', 'readme\n'), ('.gitignore', '*.log\n')):
+            self._write(path, content)
+        git(self.test_dir, 'add', '.')
+        git(self.test_dir, 'commit', '-qm', 'initial')
+        # Let the index's timestamp pass the files' so they are not racily clean
+        time.sleep(0.05)
+        git(self.test_dir, 'status', '--porcelain')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _write(self, path, content, mode='w'):
+        full_path = os.path.join(self.test_dir, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, mode) as f:
+            f.write(content)
+        return full_path
+
+    def _status(self):
+        detector = GitChangeDetector.for_path(self.test_dir)
+        return {os.path.relpath(path, self.test_dir): status for path, (status, _) in detector.changes().items()}
+
+    def test_reads_index_versions(self):
+        """Versions 2, 3 and 4 of the index list the same entries, and the untracked cache is read."""
+        index_path = os.path.join(self.test_dir, '.git', 'index')
+        expected = ['.gitignore', 'README.md', 'src/app.py', 'src/lib/util.py']
+        git(self.test_dir, 'update-index', '--index-version', '2')
+        index = read_index(index_path)
+        self.assertEqual((index.version, [e.path for e in index.entries]), (2, expected))
+        # Extended flags need version 3 or later
+        git(self.test_dir, 'update-index', '--skip-worktree', 'README.md')
+        for version in ('3', '4'):
+            git(self.test_dir, 'update-index', '--index-version', version)
+            index = read_index(index_path)
+            self.assertEqual((index.version, [e.path for e in index.entries]), (int(version), expected))
+            self.assertEqual([e.path for e in index.entries if e.assume_unchanged], ['README.md'])
+        self.assertIsNotNone(index.untracked)
+        self.assertEqual(index.untracked.root.dirs[0].name, 'src')
+
+    def test_changes_match_git_status(self):
+        """Modified, deleted and untracked paths are found; ignored and touched-only files are not."""
+        self._write('src/app.py', 'print(2)\n', 'a')
+        os.remove(os.path.join(self.test_dir, 'README.md'))
+        self._write('src/new.py', 'new\n')
+        self._write('docs/guide.md', 'guide\n')
+        self._write('debug.log', 'ignored\n')
+        os.utime(os.path.join(self.test_dir, 'src/lib/util.py'))
+        self.assertEqual(self._status(), {
+            'src/app.py': 'modified',
+            'README.md': 'deleted',
+            'src/new.py': 'untracked',
+            'docs/guide.md': 'untracked',
+        })
+
+    def test_same_size_rewrite_is_modified(self):
+        """A rewrite keeping the size is caught by comparing content hashes."""
+        self._write('src/lib/util.py', 'x = 2\n')
+        self.assertEqual(self._status(), {'src/lib/util.py': 'modified'})
+
+    def test_watcher_scan_reports_changes_since_last_scan(self):
+        """FileWatcher.scan uses the index and dispatches only new changes."""
+        records = []
+        watcher = FileWatcher([self.test_dir], enable_ai_features=False)
+        watcher.subscribe(records.append)
+        self._write('src/app.py', 'print(2)\n', 'a')
+        self.assertEqual(watcher.scan(), [])
+
+        self._write('src/app.py', 'print(3)\n', 'a')
+        new_file = self._write('src/new.py', 'new\n')
+        events = {(e.event_type, os.path.relpath(e.src_path, self.test_dir)) for e in watcher.scan()}
+        self.assertEqual(events, {('modified', 'src/app.py'), ('created', 'src/new.py')})
+        self.assertEqual(len(records), 2)
+
+        os.remove(new_file)
+        events = [(e.event_type, e.src_path) for e in watcher.scan()]
+        self.assertEqual(events, [('deleted', new_file)])
+        self.assertEqual(watcher.scan(), [])
+
+    def test_scan_command_backs_up_uncommitted_changes(self):
+        """The scan command backs up every file that differs from the index, without a baseline."""
+        self._write('src/app.py', 'print(2)\n', 'a')
+        new_file = self._write('src/new.py', 'new\n')
+        os.remove(os.path.join(self.test_dir, 'README.md'))
+        args = Namespace(paths=[self.test_dir], dry_run=False, project='test_git_scan')
+        with patch('src.scripts.track_change.create_backup') as create_backup:
+            run_scan(args)
+        backed_up = sorted(call.args for call in create_backup.call_args_list)
+        self.assertEqual(backed_up, [(os.path.join(self.test_dir, 'src', 'app.py'), 'test_git_scan'),
+                                     (new_file, 'test_git_scan')])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import shutil
+import threading
+import time
+import unittest
+
+from src.scripts.project_context import PROJECTS_ROOT, get_project_context
+from src.scripts.track_change import follow_history, iter_history, record_change, show_history
+
+PROJECT = 'test_history_stream'
+
+class TestHistory(unittest.TestCase):
+    def setUp(self):
+        self.context = get_project_context(PROJECT)
+        self.context.forget()
+
+    def tearDown(self):
+        shutil.rmtree(os.path.join(PROJECTS_ROOT, PROJECT), ignore_errors=True)
+
+    def _write(self, timestamp, description):
+        day_dir = self.context.day_dir('changes', timestamp[:8])
+        with open(os.path.join(day_dir, f'change_{timestamp}.txt'), 'w') as f:
+            f.write(f"Description: {description}\nFiles Changed: a.py\nAuthor: tester\nTimestamp: {timestamp}\n")
+
+    def test_records_stream_newest_first(self):
+        """Records come newest-first across days and stop at limit and since."""
+        self._write('20241018_090000_000000', 'first')
+        self._write('20241019_080000_000000', 'second')
+        self._write('20241019_100000_000000', 'third')
+
+        records = list(iter_history(PROJECT))
+        self.assertEqual([r['description'] for r in records], ['third', 'second', 'first'])
+        self.assertEqual(records[0]['files_changed'], 'a.py')
+        self.assertEqual([r['description'] for r in iter_history(PROJECT, limit=2)], ['third', 'second'])
+        self.assertEqual([r['description'] for r in iter_history(PROJECT, since='2024-10-19T09:00')], ['third'])
+        self.assertEqual([r['description'] for r in iter_history(PROJECT, date='20241018')], ['first'])
+        self.assertEqual(len(show_history(None, PROJECT)), 3)
+
+    def test_follow_yields_new_records(self):
+        """A record written after following started is reported promptly."""
+        stop = threading.Event()
+        received = []
+
+        def follow():
+            for record in follow_history(PROJECT, stop):
+                received.append(record)
+                stop.set()
+
+        thread = threading.Thread(target=follow)
+        thread.start()
+        time.sleep(0.3)  # Let the observer start watching
+        start = time.monotonic()
+        record_change('Followed change', ['b.py'], PROJECT)
+        thread.join(timeout=5)
+        stop.set()
+        self.assertEqual([r['description'] for r in received], ['Followed change'])
+        self.assertLess(time.monotonic() - start, 1.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.scripts.permission_manager import (
+    PermissionCache, PermissionManager, FileRole, PermissionError, ROLE_BITS, get_permission_manager
+)
+from src.scripts.project_context import PROJECTS_ROOT
+from src.scripts.role_store import RoleStore
+from src.scripts.role_trie import RoleTrie
+
+class TestPermissionCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted once the cache is full."""
+        cache = PermissionCache(maxsize=2, ttl=60)
+        cache.put('a', True, now=0)
+        cache.put('b', True, now=0)
+        self.assertTrue(cache.get('a', now=1))
+        cache.put('c', True, now=1)
+        self.assertIsNone(cache.get('b', now=1))
+        self.assertEqual(len(cache), 2)
+
+    def test_ttl_expiry(self):
+        """Entries expire after the TTL, on access or via expire()."""
+        cache = PermissionCache(maxsize=10, ttl=5)
+        cache.put('a', True, now=0)
+        cache.put('b', True, now=3)
+        self.assertIsNone(cache.get('a', now=5))
+        self.assertEqual(cache.expire(now=9), 1)
+        self.assertEqual(len(cache), 0)
+
+class TestCheckAccess(unittest.TestCase):
+    def setUp(self):
+        self.manager = PermissionManager()
+        for i in range(100):
+            self.manager.role_trie.grant(f'/tmp/file_{i}', ROLE_BITS[FileRole.ADMIN])
+
+    def test_check_access_is_cached_and_bounded(self):
+        """Checks are cached under tuple keys and the cache stays bounded."""
+        self.manager.permission_cache = PermissionCache(maxsize=10, ttl=60)
+        for i in range(100):
+            self.assertTrue(self.manager.check_access(f'/tmp/file_{i}', FileRole.ADMIN, 'write'))
+        self.assertEqual(len(self.manager.permission_cache), 10)
+        self.assertIn(('/tmp/file_99', FileRole.ADMIN, 'write'), self.manager.permission_cache)
+
+    def test_revoke_invalidates_cache(self):
+        """A revoked role is not served from the cache."""
+        self.manager.check_access('/tmp/file_1', FileRole.ADMIN, 'read')
+        with patch.object(self.manager, '_update_file_permissions'):
+            self.manager.revoke_role_access('/tmp/file_1', FileRole.ADMIN)
+        with self.assertRaises(PermissionError):
+            self.manager.check_access('/tmp/file_1', FileRole.ADMIN, 'read')
+
+    def test_check_access_many_returns_vector(self):
+        """Batch checks return one result per path without raising."""
+        paths = ['/tmp/file_1', '/tmp/unknown', '/tmp/file_2']
+        self.assertEqual(self.manager.check_access_many(paths, FileRole.ADMIN, 'write'),
+                         [True, False, True])
+        self.assertEqual(self.manager.check_access_many(paths, FileRole.USER, 'read'),
+                         [False, False, False])
+        self.assertEqual(self.manager.check_access_many(paths, FileRole.ADMIN, 'fly'),
+                         [False, False, False])
+
+    def test_check_access_many_dev_mode(self):
+        """Dev mode files are always allowed."""
+        self.manager.dev_mode = True
+        self.manager.dev_mode_files = {'/tmp/unknown'}
+        self.assertEqual(self.manager.check_access_many(['/tmp/unknown', '/tmp/other'], FileRole.USER, 'write'),
+                         [True, False])
+        self.manager.dev_mode_files = set()
+        self.assertEqual(self.manager.check_access_many(['/tmp/other'], FileRole.USER, 'write'), [True])
+
+    def test_check_access_many_never_prompts_in_a_venv(self):
+        """Inside a restricted venv a batch denies unconfirmed paths instead of asking per file."""
+        self.manager.venv_restricted = True
+        self.manager.venv_bypass_confirmations.add('/tmp/file_2')
+        with patch.dict(os.environ, {'VIRTUAL_ENV': '/venv'}), patch('builtins.input') as prompt:
+            self.assertEqual(self.manager.check_access_many(['/tmp/file_1', '/tmp/file_2'], FileRole.ADMIN, 'write'),
+                             [False, True])
+        prompt.assert_not_called()
+
+class TestRoleTrie(unittest.TestCase):
+    def test_inheritance_and_overrides(self):
+        """Grants apply below their path; overrides pin one exact path."""
+        trie = RoleTrie()
+        trie.grant('/project/changes', 0b01)
+        trie.grant('/project/changes/day/a.json', 0b10)
+        self.assertEqual(trie.resolve('/project/changes/day/a.json'), 0b11)
+        self.assertEqual(trie.resolve('/project/changes/day/b.json'), 0b01)
+        self.assertEqual(trie.resolve('/project/backups/b.json'), 0)
+
+        trie.revoke('/project/changes/day/a.json', 0b01)
+        self.assertEqual(trie.resolve('/project/changes/day/a.json'), 0b10)
+        self.assertEqual(trie.resolve_many(['/project/changes/day/a.json', '/project/changes/day/c.json',
+                                            '/elsewhere']), [0b10, 0b01, 0])
+
+    def test_rules_scale_with_grants(self):
+        """A directory grant is one rule however many files it covers."""
+        trie = RoleTrie()
+        trie.grant('/project', 0b100)
+        self.assertEqual(len(trie), 1)
+        self.assertTrue(all(trie.resolve_many(f'/project/day/{i}.json' for i in range(1000))))
+        trie.revoke('/project', 0b100)
+        self.assertEqual(len(trie), 0)
+        self.assertEqual(trie._root.children, {})
+
+class TestRoleStorePersistence(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, 'permissions.db')
+        self.file_path = os.path.join(self.test_dir, 'record.txt')
+        with open(self.file_path, 'w') as f:
+            f.write('record')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _manager(self):
+        """A fresh manager, as a new CLI invocation would create."""
+        manager = PermissionManager()
+        manager.attach_store(RoleStore(self.db_path))
+        return manager
+
+    def test_roles_survive_restart(self):
+        """Grants made by one process are visible to the next."""
+        self._manager().grant_role_access(self.file_path, FileRole.ADMIN)
+        manager = self._manager()
+        self.assertEqual(len(manager.role_trie), 1)
+        self.assertEqual(manager.who_may(self.file_path, 'write'), {FileRole.ADMIN})
+        self.assertTrue(manager.check_access(self.file_path, FileRole.ADMIN, 'write'))
+        self.assertEqual(manager.check_access_many([self.file_path, '/nope'], FileRole.ADMIN, 'read'),
+                         [True, False])
+
+    def test_relative_paths_are_stored_absolute(self):
+        """Rules granted on a relative path are saved as the absolute path they resolve to."""
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.test_dir)
+        manager = self._manager()
+        self.assertTrue(manager.grant_role_access('record.txt', FileRole.ADMIN))
+        manager.set_role_override('record.txt', [FileRole.USER])
+        store = RoleStore(self.db_path)
+        self.addCleanup(store.close)
+        self.assertEqual(list(store.grants()), [self.file_path])
+        self.assertEqual(list(store.overrides()), [self.file_path])
+        os.chdir('/')
+        self.assertEqual(self._manager().who_may(self.file_path, 'read'), {FileRole.USER})
+
+    def test_dev_mode_restored_by_later_process(self):
+        """Modes saved when entering dev mode are restored after a restart."""
+        os.chmod(self.file_path, 0o444)
+        manager = self._manager()
+        with patch('os.chown'):
+            manager.enable_dev_mode(self.file_path)
+        self.assertEqual(stat.S_IMODE(os.stat(self.file_path).st_mode), 0o644)
+
+        with patch('os.chown'):
+            self._manager().disable_dev_mode()
+        self.assertEqual(stat.S_IMODE(os.stat(self.file_path).st_mode), 0o444)
+        self.assertEqual(RoleStore(self.db_path).saved_paths(), [])
+
+    def test_directory_grants_and_overrides_persist(self):
+        """Directory grants are inherited and per-file revocations survive a restart."""
+        manager = self._manager()
+        self.assertTrue(manager.grant_role_access(self.test_dir, FileRole.ADMIN))
+        other = os.path.join(self.test_dir, 'nested', 'other.txt')
+        self.assertEqual(manager.check_access_many([self.file_path, other], FileRole.ADMIN, 'write'),
+                         [True, True])
+        with patch.object(manager, '_update_file_permissions'):
+            manager.revoke_role_access(self.file_path, FileRole.ADMIN)
+
+        manager = self._manager()
+        self.assertEqual(manager.who_may(self.file_path, 'read'), set())
+        self.assertEqual(manager.who_may(other, 'read'), {FileRole.ADMIN})
+        manager.set_role_override(self.file_path, None)
+        self.assertEqual(self._manager().who_may(self.file_path, 'read'), {FileRole.ADMIN})
+
+    def test_role_permission_overrides_persist(self):
+        """Role permission changes are reloaded on attach."""
+        self._manager().set_role_permission(FileRole.USER, 'write', True)
+        self.assertTrue(self._manager().role_permissions[FileRole.USER]['write'])
+
+    def test_transaction_rolls_back(self):
+        """A failed transaction leaves the store unchanged."""
+        store = RoleStore(self.db_path)
+        with self.assertRaises(RuntimeError):
+            with store.transaction():
+                store.add_role(self.file_path, 'admin')
+                raise RuntimeError('abort')
+        self.assertEqual(store.grants(), {})
+
+class TestPerProjectManagers(unittest.TestCase):
+    def test_projects_do_not_share_rules(self):
+        """Each project resolves roles from its own store and trie."""
+        projects = ('test_permissions_a', 'test_permissions_b')
+        for project in projects:
+            self.addCleanup(shutil.rmtree, os.path.join(PROJECTS_ROOT, project), True)
+        first, second = (get_permission_manager(project) for project in projects)
+        self.assertIsNot(first, second)
+        self.assertIs(get_permission_manager(projects[0]), first)
+        first.grant_role_access('/shared/file.txt', FileRole.ADMIN)
+        self.assertEqual(first.who_may('/shared/file.txt', 'write'), {FileRole.ADMIN})
+        self.assertEqual(second.who_may('/shared/file.txt', 'write'), set())
+        self.assertNotEqual(first.store.db_path, second.store.db_path)
+
+if __name__ == '__main__':
+    unittest.main()
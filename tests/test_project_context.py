@@ -0,0 +1,43 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.scripts.project_context import CONFIG_DIRS, get_project_context
+from src.scripts.models.record_manager import RecordManager
+
+class TestProjectContext(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_context_is_shared_per_project(self):
+        """The same base directory always yields the same context."""
+        context = get_project_context(base_dir=self.test_dir)
+        self.assertIs(get_project_context(base_dir=os.path.join(self.test_dir, '.')), context)
+        with self.assertRaises(ValueError):
+            get_project_context('')
+
+    def test_directories_created_once(self):
+        """Directories are created on first use and then served from memory."""
+        context = get_project_context(base_dir=self.test_dir)
+        self.assertEqual(sorted(context.dirs), sorted(CONFIG_DIRS))
+        context.day_dir('changes', '20241019')
+        with patch('os.makedirs') as makedirs:
+            context.dirs
+            context.day_dir('changes', '20241019')
+            RecordManager(self.test_dir, context)
+            RecordManager(self.test_dir, context)
+        # Only RecordManager's directories not already known: decisions, debug, handoff
+        self.assertEqual(makedirs.call_count, 3)
+        self.assertTrue(os.path.isdir(os.path.join(self.test_dir, 'changes', '20241019')))
+
+        context.forget()
+        shutil.rmtree(os.path.join(self.test_dir, 'changes'))
+        self.assertTrue(os.path.isdir(context.day_dir('changes', '20241019')))
+
+if __name__ == '__main__':
+    unittest.main()
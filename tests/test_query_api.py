@@ -0,0 +1,132 @@
+import gzip
+import http.client
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from src.scripts.query_api import QueryIndex, QueryServer
+from src.scripts.watch_service import get_watch_service
+
+class TestQueryApi(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for i in range(5):
+            self._write_change(f'20241019_10000{i}_000000', f'Change {i}')
+        decisions_dir = os.path.join(self.test_dir, 'demo', 'decisions')
+        os.makedirs(decisions_dir)
+        with open(os.path.join(decisions_dir, 'decision_20241019_090000.json'), 'w') as f:
+            json.dump({'id': 'decision_20241019_090000', 'title': 'Use sqlite'}, f)
+
+        self.index = QueryIndex(self.test_dir)
+        self.server = QueryServer(('127.0.0.1', 0), self.index)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.conn = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1])
+
+    def tearDown(self):
+        self.conn.close()
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        shutil.rmtree(self.test_dir)
+
+    def _write_change(self, timestamp, description):
+        day_dir = os.path.join(self.test_dir, 'demo', 'changes', timestamp[:8])
+        os.makedirs(day_dir, exist_ok=True)
+        path = os.path.join(day_dir, f'change_{timestamp}.txt')
+        with open(path, 'w') as f:
+            f.write(f"Description: {description}\nTimestamp: {timestamp}\n")
+        return path
+
+    def _get(self, target, **headers):
+        self.conn.request('GET', target, headers=headers)
+        response = self.conn.getresponse()
+        return response, response.read()
+
+    def test_listing_is_paginated_and_filtered(self):
+        """Records come newest first, page by page, over one connection."""
+        response, body = self._get('/api/projects/demo/changes?limit=2')
+        page = json.loads(body)
+        self.assertEqual([r['description'] for r in page['items']], ['Change 4', 'Change 3'])
+
+        _, body = self._get(f"/api/projects/demo/changes?limit=2&after={page['next']}")
+        self.assertEqual([r['description'] for r in json.loads(body)['items']], ['Change 2', 'Change 1'])
+        _, body = self._get('/api/projects/demo/changes?q=change+0')
+        self.assertEqual([r['description'] for r in json.loads(body)['items']], ['Change 0'])
+        _, body = self._get('/api/projects/demo/decisions/decision_20241019_090000')
+        self.assertEqual(json.loads(body)['title'], 'Use sqlite')
+        _, body = self._get('/api/projects')
+        self.assertEqual(json.loads(body)['projects'], ['demo'])
+
+        response, _ = self._get('/api/projects/demo/unknown')
+        self.assertEqual(response.status, 404)
+
+    def test_cached_pages_revalidate_without_disk_access(self):
+        """A repeated request is served from memory and honours If-None-Match."""
+        response, body = self._get('/api/projects/demo/changes', **{'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.getheader('Content-Encoding'), 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(body))['items']), 5)
+        etag = response.getheader('ETag')
+
+        with patch('os.scandir') as scandir, patch('builtins.open') as opened:
+            response, body = self._get('/api/projects/demo/changes', **{'If-None-Match': etag})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(body, b'')
+        scandir.assert_not_called()
+        opened.assert_not_called()
+
+        self.index.invalidate(self._write_change('20241019_110000_000000', 'Change 5'))
+        response, body = self._get('/api/projects/demo/changes', **{'If-None-Match': etag})
+        self.assertEqual(response.status, 200)
+        self.assertEqual(json.loads(body)['items'][0]['description'], 'Change 5')
+
+    def test_watch_subscribes_to_the_shared_service(self):
+        """New records invalidate cached pages through the process-wide watch service."""
+        _, body = self._get('/api/projects/demo/changes')
+        self.assertEqual(len(json.loads(body)['items']), 5)
+        self.index.watch()
+        self.addCleanup(self.index.unwatch)
+        self.assertTrue(get_watch_service().owners(os.path.join(self.test_dir, 'demo')))
+
+        self._write_change('20241019_110000_000000', 'Change 5')
+        deadline = time.monotonic() + 5
+        while len(json.loads(self._get('/api/projects/demo/changes')[1])['items']) != 6:
+            self.assertLess(time.monotonic(), deadline, "Page was not invalidated")
+            time.sleep(0.05)
+
+    def test_foreign_hosts_and_origins_are_refused(self):
+        """Only local Host names are served, and no origin may read cross-origin unless allowed."""
+        response, _ = self._get('/api/projects', Host='attacker.example:8765')
+        self.assertEqual(response.status, 403)
+        response, _ = self._get('/api/projects', Host='localhost', Origin='http://attacker.example')
+        self.assertEqual(response.status, 200)
+        self.assertIsNone(response.getheader('Access-Control-Allow-Origin'))
+
+        self.server.allow_origin = 'http://localhost:3000'
+        response, _ = self._get('/api/projects', Origin='http://localhost:3000')
+        self.assertEqual(response.getheader('Access-Control-Allow-Origin'), 'http://localhost:3000')
+
+    def test_path_spellings_share_one_invalidated_page(self):
+        """Trailing, repeated and percent-encoded spellings of a path are cached and invalidated as one."""
+        for target in ('/api/projects/demo/changes/', '//api/projects/%64emo/changes'):
+            _, body = self._get(target)
+            self.assertEqual(len(json.loads(body)['items']), 5)
+        self.assertEqual(list(self.index._pages), [('/api/projects/demo/changes', '')])
+
+        self.index.invalidate(self._write_change('20241019_110000_000000', 'Change 5'))
+        self.assertEqual(self.index._pages, {})
+
+    def test_record_cache_is_bounded(self):
+        """Only the most recently read records are kept in memory."""
+        with patch('src.scripts.query_api.MAX_CACHED_RECORDS', 2):
+            _, body = self._get('/api/projects/demo/changes')
+        self.assertEqual(len(json.loads(body)['items']), 5)
+        self.assertEqual(len(self.index._records), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from src.scripts.record_format import RecordFormat
+
+class TestRecordRangeQueries(unittest.TestCase):
+    def setUp(self):
+        """Create 30 days of records, 4 per day, for two record types."""
+        self.base_dir = Path(tempfile.mkdtemp())
+        self.start = datetime(2025, 3, 1)
+        for record_type in ('file_change', 'decision'):
+            for day in range(30):
+                for hour in range(4):
+                    when = self.start + timedelta(days=day, hours=hour * 6, minutes=1 if record_type == 'decision' else 0)
+                    day_dir = self.base_dir / record_type / when.strftime('%Y%m%d')
+                    day_dir.mkdir(parents=True, exist_ok=True)
+                    record_id = f"{record_type}_{when.strftime('%Y%m%d_%H%M%S')}"
+                    with open(day_dir / f"{record_id}.json", 'w') as f:
+                        json.dump({'type': record_type, 'timestamp': when.isoformat(),
+                                   'metadata': {'record_id': record_id}}, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir)
+
+    def _opened(self, iterator):
+        opened = []
+        real_open = open
+
+        def tracking_open(path, *args, **kwargs):
+            opened.append(str(path))
+            return real_open(path, *args, **kwargs)
+
+        with patch('builtins.open', tracking_open):
+            records = list(iterator)
+        return records, opened
+
+    def test_limit_opens_only_yielded_files(self):
+        """The last 50 records of a month touch 50 files."""
+        records, opened = self._opened(
+            RecordFormat.iter_records(self.base_dir, 'file_change', limit=50))
+        self.assertEqual(len(records), 50)
+        self.assertEqual(len(opened), 50)
+        stamps = [r['timestamp'] for r in records]
+        self.assertEqual(stamps, sorted(stamps, reverse=True))
+
+    def test_no_file_is_held_open_between_records(self):
+        """A caller that stops early leaves no record file open."""
+        handles = []
+        real_open = open
+
+        def tracking_open(path, *args, **kwargs):
+            handles.append(real_open(path, *args, **kwargs))
+            return handles[-1]
+
+        with patch('builtins.open', tracking_open):
+            records = RecordFormat.iter_records(self.base_dir, 'file_change')
+            next(records)
+            self.assertTrue(all(f.closed for f in handles))
+            records.close()
+
+    def test_half_open_range_oldest_first(self):
+        """since is inclusive, until is exclusive, and order can be ascending."""
+        since = self.start + timedelta(days=2, hours=6)
+        until = self.start + timedelta(days=3, hours=6)
+        records = list(RecordFormat.iter_records(
+            self.base_dir, 'file_change', since=since, until=until, newest_first=False))
+        self.assertEqual([r['timestamp'] for r in records], [
+            (since + timedelta(hours=6 * i)).isoformat() for i in range(4)])
+
+    def test_all_types_are_merged_in_time_order(self):
+        """Without a type filter, records of every type interleave by time."""
+        records = list(RecordFormat.iter_records(self.base_dir, since='20250305', until='20250306'))
+        self.assertEqual(len(records), 8)
+        self.assertEqual([r['type'] for r in records[:2]], ['decision', 'file_change'])
+
+    def test_load_records_single_day(self):
+        """load_records keeps returning one day's records."""
+        records = RecordFormat.load_records(self.base_dir, 'decision', date='20250310', limit=3)
+        self.assertEqual(len(records), 3)
+        self.assertTrue(all(r['timestamp'].startswith('2025-03-10') for r in records))
+
+if __name__ == '__main__':
+    unittest.main()
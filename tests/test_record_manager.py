@@ -0,0 +1,113 @@
+import json
+import shutil
+import tempfile
+import os
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.scripts.models.record_id import generate_ulid, ulid_timestamp
+from src.scripts.models import record_manager
+from src.scripts.models.record_manager import RecordManager
+
+class TestRecordIds(unittest.TestCase):
+    def test_ulids_are_unique_and_sorted(self):
+        """IDs generated back to back never collide and sort by creation."""
+        ids = [generate_ulid() for _ in range(5000)]
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(ids, sorted(ids))
+        self.assertTrue(all(len(i) == 26 for i in ids))
+
+    def test_ulid_timestamp_roundtrip(self):
+        """The encoded timestamp is the generation time."""
+        import time
+        before = time.time()
+        stamp = ulid_timestamp(generate_ulid())
+        self.assertAlmostEqual(stamp, before, delta=1.0)
+
+class TestRecordManagerIngestion(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.manager = RecordManager(self.test_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_same_second_records_do_not_merge(self):
+        """Records created within one second get their own files."""
+        paths = [self.manager.add_entry('change', {'n': i}, 'tester') for i in range(50)]
+        self.assertEqual(len(set(paths)), 50)
+        for path in paths:
+            with open(path) as f:
+                self.assertEqual(len(json.load(f)['entries']), 1)
+
+    def test_add_entries_batch(self):
+        """Batch ingestion writes one record per item in input order."""
+        items = [{'record_type': 'debug', 'content': {'n': i}, 'author': 'bot', 'tags': ['x']}
+                 for i in range(20)]
+        paths = self.manager.add_entries(items)
+        self.assertEqual(len(set(paths)), 20)
+        self.assertEqual(paths, sorted(paths))
+        with open(paths[3]) as f:
+            entry = json.load(f)['entries'][0]
+        self.assertEqual(entry['content'], {'n': 3})
+        self.assertEqual(entry['tags'], ['x'])
+
+    def test_update_record_appends_in_place(self):
+        """Appended entries leave the file identical to a full rewrite."""
+        path = self.manager.create_decision_record('t', 'c', 'd', 'me')
+        for i in range(3):
+            self.manager.update_record(path, 'status_update', {'step': i}, 'me')
+        text = Path(path).read_text()
+        data = json.loads(text)
+        self.assertEqual(len(data['entries']), 4)
+        self.assertEqual(text, json.dumps(data, indent=2))
+
+    def test_appends_read_only_the_tail(self):
+        """Once a long record is known to end in its entries, appends no longer scan it."""
+        path = self.manager.create_decision_record('t', 'c', 'd', 'me')
+        with patch.object(record_manager, 'TAIL_WINDOW', 64):
+            self.manager.update_record(path, 'status_update', {'step': 0}, 'me')
+            with patch('mmap.mmap', side_effect=AssertionError('scanned the whole record')):
+                for i in range(1, 3):
+                    self.manager.update_record(path, 'status_update', {'step': i}, 'me')
+        data = json.loads(Path(path).read_text())
+        self.assertEqual([e['content'].get('step') for e in data['entries'][1:]], [0, 1, 2])
+
+    def test_new_records_survive_short_writes(self):
+        """Records are written in full even when the OS writes a few bytes at a time."""
+        real_write = os.write
+        with patch('os.write', side_effect=lambda fd, data: real_write(fd, bytes(data[:7]))):
+            path = self.manager.add_entry('change', {'text': 'x' * 100}, 'me')
+        self.assertEqual(json.loads(Path(path).read_text())['entries'][0]['content']['text'], 'x' * 100)
+
+    def test_add_entries_reserves_ids_in_one_go(self):
+        """A mixed batch gets consecutive IDs per type, in input order."""
+        items = [{'record_type': kind, 'content': {}, 'author': 'bot'} for kind in ('change', 'debug', 'change')]
+        paths = self.manager.add_entries(items)
+        self.assertEqual([Path(p).parent.name for p in paths], ['changes', 'debug', 'changes'])
+        self.assertLess(paths[0], paths[2])
+
+    def test_append_only_extends_entries(self):
+        """A record whose last list is not 'entries' is not appended to in place."""
+        path = Path(self.test_dir) / 'changes' / 'other.json'
+        path.write_text(json.dumps({'entries': [], 'notes': [{'n': 1}]}, indent=2))
+        self.manager.update_record(str(path), 'note', {'x': 1}, 'me')
+        data = json.loads(path.read_text())
+        self.assertEqual((len(data['entries']), data['notes']), (1, [{'n': 1}]))
+
+    def test_add_entry_raises_when_unwritable(self):
+        """Write errors are logged and raised rather than returning a missing path."""
+        shutil.rmtree(Path(self.test_dir) / 'debug')
+        with self.assertLogs('src.scripts.models.record_manager', 'ERROR'), self.assertRaises(OSError):
+            self.manager.add_entry('debug', {}, 'me')
+
+    def test_update_record_falls_back_for_foreign_layout(self):
+        """Files in another layout are still updated via load and save."""
+        path = Path(self.test_dir) / 'changes' / 'legacy.json'
+        path.write_text(json.dumps({'entries': []}))
+        self.manager.update_record(str(path), 'note', {'x': 1}, 'me')
+        self.assertEqual(len(json.loads(path.read_text())['entries']), 1)
+
+if __name__ == '__main__':
+    unittest.main()
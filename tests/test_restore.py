@@ -0,0 +1,148 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from src.scripts.backup_index import BackupIndex
+from src.scripts.day_sealer import seal_directory
+from src.scripts.file_attributes import apply_immutable
+from src.scripts.record_format import RecordFormat
+from src.scripts.restore import parse_time, restore_snapshot
+from src.scripts.track_change import index_change
+
+class TestRestore(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.index = BackupIndex(os.path.join(self.test_dir, 'backups.db'))
+        self.dest = os.path.join(self.test_dir, 'restored')
+        self.day_dir = os.path.join(self.test_dir, 'backups', '20240615')
+        os.makedirs(self.day_dir)
+
+    def tearDown(self):
+        self.index.close()
+        paths = [os.path.join(self.day_dir, name) for name in os.listdir(self.day_dir)]
+        apply_immutable(paths, immutable=False, mode=0o644)
+        shutil.rmtree(self.test_dir)
+
+    def _backup(self, path, taken, content, sha256=True):
+        backup_path = os.path.join(self.day_dir, f"{os.path.basename(path)}_{taken}")
+        with open(backup_path, 'wb') as f:
+            f.write(content)
+        digest = hashlib.sha256(content).hexdigest() if sha256 else None
+        self.index.add(path, backup_path, taken, len(content), digest)
+        return backup_path
+
+    def _read(self, rel_path):
+        with open(os.path.join(self.dest, rel_path), 'rb') as f:
+            return f.read()
+
+    def test_restores_newest_backup_before_the_time(self):
+        """Every path gets its newest backup taken at or before the time, relative to their common parent."""
+        self._backup('/proj/a.py', 100, b'a1')
+        self._backup('/proj/a.py', 200, b'a2')
+        self._backup('/proj/a.py', 300, b'a3')
+        self._backup('/proj/pkg/b.py', 150, b'b1')
+        self._backup('/proj/pkg/c.py', 250, b'c1')  # Taken after the time
+        result = restore_snapshot(self.index, 200, self.dest)
+        self.assertEqual((result['restored'], result['verified'], result['failed']), (2, 2, {}))
+        self.assertEqual(self._read('a.py'), b'a2')
+        self.assertEqual(self._read(os.path.join('pkg', 'b.py')), b'b1')
+        self.assertFalse(os.path.exists(os.path.join(self.dest, 'pkg', 'c.py')))
+        self.assertEqual(os.path.getmtime(os.path.join(self.dest, 'a.py')), 200)
+
+    def test_moves_and_deletions_are_followed(self):
+        """Moved files restore at their new path from the source's backup; deleted files are left out."""
+        self._backup('/proj/a.py', 100, b'a1')
+        self._backup('/proj/b.py', 100, b'b1')
+        self._backup('/proj/c.py', 100, b'c1')
+        self.index.moved('/proj/a.py', '/proj/pkg/a.py', 150)
+        self.index.moved('/proj/pkg/a.py', '/proj/d.py', 160)
+        self.index.deleted('/proj/b.py', 150)
+        self.index.deleted('/proj/c.py', 150)
+        self._backup('/proj/c.py', 200, b'c2')  # Created again
+
+        self.assertEqual([entry.path for entry in self.index.as_of(120)], ['/proj/a.py', '/proj/b.py', '/proj/c.py'])
+        self.assertEqual([entry.path for entry in self.index.as_of(155)], ['/proj/pkg/a.py'])
+        result = restore_snapshot(self.index, 200, self.dest, root='/proj')
+        self.assertEqual((result['restored'], result['verified'], result['failed']), (2, 2, {}))
+        self.assertEqual(sorted(os.listdir(self.dest)), ['c.py', 'd.py'])
+        self.assertEqual(self._read('d.py'), b'a1')
+        self.assertEqual(self._read('c.py'), b'c2')
+
+    def test_moves_are_forgotten_with_their_backup(self):
+        """Removing a backup drops the moves that pointed at it."""
+        backup_path = self._backup('/proj/a.py', 100, b'a1')
+        self.index.moved('/proj/a.py', '/proj/b.py', 150)
+        self.index.remove([backup_path])
+        self.assertEqual(self.index.as_of(200), [])
+
+    def test_captured_moves_and_deletions_are_indexed(self):
+        """Moved and deleted change records reach the index at the time of the change."""
+        self._backup('/proj/a.py', 100, b'a1')
+        moved = RecordFormat.create_record(record_type='file_change', title='File Moved: b.py', description='',
+                                           files=['/proj/a.py', '/proj/b.py'],
+                                           metadata={'change_type': 'moved', 'src_path': '/proj/a.py',
+                                                     'dest_path': '/proj/b.py'})
+        deleted = RecordFormat.create_record(record_type='file_change', title='File Deleted: b.py', description='',
+                                             files=['/proj/b.py'], metadata={'change_type': 'deleted'})
+        with patch('src.scripts.backup_index.get_backup_index', return_value=self.index):
+            index_change(moved, 'test_restore')
+            self.assertEqual([(entry.path, entry.taken) for entry in self.index.as_of(time.time())],
+                             [('/proj/b.py', 100)])
+            index_change(deleted, 'test_restore')
+        self.assertEqual(self.index.as_of(time.time()), [])
+
+    def test_existing_files_are_kept_unless_overwriting(self):
+        """Restoring does not replace files already in the target directory by default."""
+        self._backup('/proj/a.py', 100, b'backup')
+        os.makedirs(self.dest)
+        with open(os.path.join(self.dest, 'a.py'), 'wb') as f:
+            f.write(b'local')
+        result = restore_snapshot(self.index, 100, self.dest, root='/proj')
+        self.assertEqual((result['restored'], result['skipped']), (0, 1))
+        self.assertEqual(self._read('a.py'), b'local')
+        result = restore_snapshot(self.index, 100, self.dest, root='/proj', overwrite=True)
+        self.assertEqual(result['restored'], 1)
+        self.assertEqual(self._read('a.py'), b'backup')
+
+    def test_corrupt_backups_are_reported(self):
+        """A backup that no longer matches its recorded hash fails verification."""
+        backup_path = self._backup('/proj/a.py', 100, b'original', sha256=False)
+        self._backup('/proj/b.py', 100, b'fine')
+        seal_directory(self.day_dir, complete=True)
+        # Same size, different content: only the hash catches it
+        apply_immutable([backup_path], immutable=False, mode=0o644)
+        with open(backup_path, 'wb') as f:
+            f.write(b'0riginal')
+        result = restore_snapshot(self.index, 100, self.dest)
+        self.assertEqual(result['failed'], {'/proj/a.py': 'hash mismatch'})
+        self.assertEqual(result['restored'], 1)
+
+    def test_restores_many_files_quickly(self):
+        """Thousands of files restore in well under a few seconds."""
+        rows = []
+        for i in range(5000):
+            backup_path = os.path.join(self.day_dir, f"f{i}.txt_1")
+            with open(backup_path, 'wb') as f:
+                f.write(b'%d' % i)
+            rows.append((f'/proj/d{i % 50}/f{i}.txt', backup_path))
+        with self.index.transaction():
+            for path, backup_path in rows:
+                self.index.add(path, backup_path, 1, os.path.getsize(backup_path))
+        start = time.monotonic()
+        result = restore_snapshot(self.index, 1, self.dest)
+        self.assertEqual(result['restored'], 5000)
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(self._read(os.path.join('d7', 'f4957.txt')), b'4957')
+
+    def test_parse_time(self):
+        """A bare date means the end of that day."""
+        end_of_day = parse_time('20240615')
+        self.assertLess(end_of_day, parse_time('2024-06-16T00:00:00'))
+        self.assertGreater(end_of_day, parse_time('2024-06-15T23:59:59'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from src.scripts.backup_index import BackupIndex, get_backup_index
+from src.scripts.file_attributes import apply_immutable
+from src.scripts.day_sealer import file_hash, load_manifest, seal_directory
+from src.scripts.project_context import PROJECTS_ROOT
+from src.scripts.retention import RetentionPolicy, apply_retention, parse_duration, plan_retention
+from src.scripts.track_change import create_backup
+
+HOUR = 3600
+DAY = 24 * HOUR
+PROJECT = 'test_retention'
+
+class TestRetention(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.index = BackupIndex(os.path.join(self.test_dir, 'backups.db'))
+        # Noon, so hour and day buckets do not depend on when the test runs
+        self.now = time.mktime(time.strptime('2024-06-15 12:00:00', '%Y-%m-%d %H:%M:%S'))
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.test_dir)
+
+    def _backup(self, path, age, day='20240615', size=10):
+        day_dir = os.path.join(self.test_dir, 'backups', day)
+        os.makedirs(day_dir, exist_ok=True)
+        backup_path = os.path.join(day_dir, f"{os.path.basename(path)}_{age}")
+        with open(backup_path, 'wb') as f:
+            f.write(b'x' * size)
+        self.index.add(path, backup_path, self.now - age, size)
+        return backup_path
+
+    def test_policy_thins_by_age(self):
+        """Recent backups stay; older ones thin to one per hour, then one per day."""
+        ages = {
+            'recent': [10 * 60, 2 * HOUR],
+            'hourly': [2 * DAY - 10 * 60, 2 * DAY],  # Same hour: only the newer is kept
+            'daily': [30 * DAY, 30 * DAY + HOUR],  # Same day: only the newer is kept
+            'expired': [200 * DAY],
+        }
+        backups = {rule: [self._backup('/src/a.py', age) for age in rule_ages] for rule, rule_ages in ages.items()}
+        policy = RetentionPolicy(parse_duration('24h'), parse_duration('7d'), parse_duration('90d'), keep_last=0)
+        plan = plan_retention(self.index, policy, now=self.now)
+        self.assertEqual(sorted(e.backup_path for e in plan.delete),
+                         sorted([backups['hourly'][1], backups['daily'][1], backups['expired'][0]]))
+        self.assertEqual(plan.kept, {'recent': 2, 'hourly': 1, 'daily': 1})
+        self.assertEqual(plan.report()['reclaimed_bytes'], 30)
+
+        # The newest backups of a file are kept whatever their age
+        plan = plan_retention(self.index, RetentionPolicy(0, 0, 0, keep_last=2), now=self.now)
+        self.assertEqual(plan.kept, {'last': 2})
+
+    def test_apply_deletes_in_rate_limited_batches(self):
+        """Deletion unseals files, updates manifests and the index, and removes emptied days."""
+        old = [self._backup(f'/src/{name}.py', 100 * DAY, day='20240301') for name in 'abcde']
+        keep = self._backup('/src/a.py', HOUR)
+        seal_directory(os.path.dirname(old[0]), complete=True)
+        plan = plan_retention(self.index, RetentionPolicy(DAY, DAY, DAY, keep_last=0), now=self.now)
+        self.assertEqual(len(plan.delete), 5)
+
+        sleeps = []
+        result = apply_retention(self.index, plan, batch_size=2, max_rate=10, sleep=sleeps.append)
+        self.assertEqual(result, {'deleted': 5, 'failed': 0, 'reclaimed_bytes': 50})
+        self.assertEqual(len(sleeps), 3)
+        self.assertFalse(os.path.exists(os.path.dirname(old[0])))
+        self.assertTrue(os.path.exists(keep))
+        self.assertEqual(self.index.totals(), {'backups': 1, 'paths': 1, 'bytes': 10})
+
+    def test_backups_are_indexed_when_made(self):
+        """create_backup records the original path and size in the project's index."""
+        source = os.path.join(self.test_dir, 'source.txt')
+        with open(source, 'w') as f:
+            f.write('content')
+        self.addCleanup(shutil.rmtree, os.path.join(PROJECTS_ROOT, PROJECT), True)
+        backup_path = create_backup(source, PROJECT)
+        versions = get_backup_index(PROJECT).versions(os.path.abspath(source))
+        self.assertEqual([(v.backup_path, v.size) for v in versions], [(backup_path, 7)])
+        self.assertEqual(load_manifest(os.path.dirname(backup_path))['files'], {})
+
+    def test_backups_are_hashed_once(self):
+        """A backup's hash is kept in the index or in its seal manifest, and backups are not read back to hash them."""
+        source = os.path.join(self.test_dir, 'source.txt')
+        with open(source, 'w') as f:
+            f.write('content')
+        self.addCleanup(shutil.rmtree, os.path.join(PROJECTS_ROOT, PROJECT), True)
+        known = file_hash(source)
+        # An in-kernel copy: the data never passes through the process
+        in_kernel = lambda src_fd, dst_fd, digest: os.sendfile(dst_fd, src_fd, 0, 7) and 'sendfile'
+        with patch('src.scripts.day_sealer.file_hash') as rehash, \
+                patch('src.scripts.track_change.copy_file', side_effect=in_kernel):
+            watched = create_backup(source, PROJECT, known_hash=lambda path, st: known)
+            unhashed = create_backup(source, PROJECT)
+        rehash.assert_not_called()
+        index = get_backup_index(PROJECT)
+        self.assertEqual([v.sha256 for v in index.versions(os.path.abspath(source))], [None, known])
+
+        day_dir = os.path.dirname(watched)
+        self.addCleanup(apply_immutable, [watched, unhashed], immutable=False, mode=0o644)
+        seal_directory(day_dir, complete=True)
+        files = load_manifest(day_dir)['files']
+        self.assertNotIn('sha256', files[os.path.basename(watched)])
+        self.assertEqual(files[os.path.basename(unhashed)]['sha256'], known)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from src.scripts.backup_index import BackupIndex
+from src.scripts.day_sealer import file_hash, seal_directory
+from src.scripts.file_attributes import apply_immutable
+from src.scripts.project_context import ProjectContext
+from src.scripts.scrubber import Scrubber
+
+class TestScrubber(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.context = ProjectContext(self.test_dir, 'test_scrubber')
+        self.index = BackupIndex(self.context.path('backups.db'))
+        self.day_dir = self.context.dir('changes', '20240615')
+
+    def tearDown(self):
+        self.index.close()
+        paths = [os.path.join(root, name) for root, _, names in os.walk(self.test_dir) for name in names]
+        apply_immutable(paths, immutable=False, mode=0o644)
+        shutil.rmtree(self.test_dir)
+
+    def _write(self, directory, name, content, age=0):
+        path = os.path.join(directory, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        if age:
+            os.utime(path, (time.time() - age, time.time() - age))
+        return path
+
+    def _scrubber(self, **kwargs):
+        kwargs.setdefault('max_rate', None)
+        return Scrubber(self.context, self.index, **kwargs)
+
+    def test_reports_tampering_until_fixed(self):
+        """Changed, writable and missing sealed files are reported, and dropped once they verify again."""
+        paths = [self._write(self.day_dir, f'change_{i}.txt', f'record {i}') for i in range(4)]
+        seal_directory(self.day_dir, complete=True)
+        self.assertEqual(self._scrubber().scrub()['problems'], {})
+
+        apply_immutable(paths[:3], immutable=False, mode=0o644)
+        self._write(self.day_dir, 'change_0.txt', 'record X')  # Same size
+        os.unlink(paths[2])
+        result = self._scrubber().scrub()
+        self.assertEqual(result['problems'], {'changes/20240615/change_0.txt': 'hash mismatch',
+                                              'changes/20240615/change_1.txt': 'writable',
+                                              'changes/20240615/change_2.txt': 'missing'})
+        self.assertTrue(result['complete'])
+
+        self._write(self.day_dir, 'change_0.txt', 'record 0')
+        apply_immutable(paths[:2], immutable=True)
+        self._scrubber().scrub()
+        self.assertEqual(list(self._scrubber().load_state()['problems']), ['changes/20240615/change_2.txt'])
+
+    def test_resumes_from_cursor(self):
+        """A pass split over runs verifies every file once, across directories and kinds."""
+        for day in ('20240614', '20240615'):
+            day_dir = self.context.dir('changes', day)
+            for i in range(3):
+                self._write(day_dir, f'change_{i}.txt', 'record')
+            seal_directory(day_dir, complete=True)
+        backup_path = self._write(self.context.dir('backups', '20240615'), 'a.py_1', 'backup')
+        self.index.add('/src/a.py', backup_path, 1, 6, file_hash(backup_path))
+
+        runs = []
+        while True:
+            result = self._scrubber().scrub(max_files=2)
+            runs.append(result['files'])
+            if result['complete']:
+                break
+        self.assertEqual(runs, [2, 2, 2, 1])
+        state = self._scrubber().load_state()
+        self.assertIsNone(state['cursor'])
+        self.assertIsNotNone(state['last_pass'])
+
+    def test_unsealed_backups_are_checked_against_the_index(self):
+        """Backups not sealed yet are verified by the hash recorded when they were made."""
+        backup_dir = self.context.dir('backups', '20240615')
+        backup_path = self._write(backup_dir, 'a.py_1', 'backup')
+        self.index.add('/src/a.py', backup_path, 1, 6, file_hash(backup_path))
+        self._write(backup_dir, 'a.py_1', 'b@ckup')
+        self.assertEqual(self._scrubber().scrub()['problems'], {'backups/20240615/a.py_1': 'hash mismatch'})
+
+    def test_reads_are_rate_limited_and_leave_cold_pages_uncached(self):
+        """Reads stay within the I/O budget and cold files are dropped from the page cache."""
+        for i in range(4):
+            self._write(self.day_dir, f'change_{i}.txt', 'x' * 1000, age=2 * 3600)
+        self._write(self.day_dir, 'hot.txt', 'x' * 1000)
+        seal_directory(self.day_dir, complete=True)
+        sleeps = []
+        with patch('os.posix_fadvise', create=True) as fadvise:
+            result = self._scrubber(max_rate=1000, sleep=sleeps.append).scrub()
+        self.assertEqual(result['bytes'], 5000)
+        self.assertEqual(len(sleeps), 5)
+        self.assertAlmostEqual(sleeps[-1], 5, delta=0.5)
+        dropped = [call for call in fadvise.call_args_list if call.args[3] == os.POSIX_FADV_DONTNEED]
+        self.assertEqual(len(dropped), 4)
+
+if __name__ == '__main__':
+    unittest.main()
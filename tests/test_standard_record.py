@@ -0,0 +1,75 @@
+import json
+import unittest
+from dataclasses import asdict
+
+from src.scripts.models.record_format import (
+    StandardRecord, RecordMetadata, RecordType, RecordStatus,
+    DecisionContent, dumps_many, loads_many
+)
+
+def make_decision(record_id='decision_1'):
+    return StandardRecord(
+        metadata=RecordMetadata(
+            record_id=record_id,
+            record_type=RecordType.DECISION,
+            timestamp='2025-04-02T16:54:11',
+            author='tester',
+            project='sigfile',
+            version='1.0',
+            status=RecordStatus.DRAFT,
+            tags=['decision'],
+            related_records=[]
+        ),
+        content=DecisionContent(
+            title='Use compact JSON',
+            context='Serialization dominates exports',
+            decision='Hand-rolled codecs',
+            rationale='Speed',
+            alternatives=['asdict'],
+            consequences=['Faster exports'],
+            implementation_status='pending',
+            affected_files=['src/scripts/models/record_format.py']
+        )
+    )
+
+class TestStandardRecordCodecs(unittest.TestCase):
+    def test_json_roundtrip_restores_enums(self):
+        """from_json(to_json()) gives back an equal record with enum members."""
+        record = make_decision()
+        restored = StandardRecord.from_json(record.to_json())
+        self.assertEqual(restored, record)
+        self.assertIs(restored.metadata.record_type, RecordType.DECISION)
+        self.assertIs(restored.metadata.status, RecordStatus.DRAFT)
+
+    def test_compact_on_disk_pretty_for_display(self):
+        """Storage JSON is compact; pretty output is indented."""
+        record = make_decision()
+        self.assertNotIn('\n', record.to_json())
+        self.assertNotIn(', ', record.to_json())
+        self.assertIn('\n  "metadata"', record.to_json(pretty=True))
+        self.assertEqual(json.loads(record.to_json()), json.loads(record.to_json(pretty=True)))
+
+    def test_to_dict_matches_asdict(self):
+        """The hand-rolled codec produces the same shape as asdict."""
+        record = make_decision()
+        expected = asdict(record)
+        expected['metadata']['record_type'] = 'decision'
+        expected['metadata']['status'] = 'draft'
+        self.assertEqual(record.to_dict(), expected)
+
+    def test_slots(self):
+        """Record classes do not carry a per-instance __dict__."""
+        record = make_decision()
+        self.assertFalse(hasattr(record, '__dict__'))
+        self.assertFalse(hasattr(record.metadata, '__dict__'))
+        self.assertFalse(hasattr(record.content, '__dict__'))
+
+    def test_bulk_roundtrip(self):
+        """dumps_many/loads_many round-trip a batch of records."""
+        records = [make_decision(f'decision_{i}') for i in range(10)]
+        text = dumps_many(records)
+        self.assertEqual(len(text.splitlines()), 10)
+        self.assertEqual(loads_many(text), records)
+
+if __name__ == '__main__':
+    unittest.main()
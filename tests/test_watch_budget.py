@@ -0,0 +1,106 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from watchdog.events import FileSystemEventHandler
+
+from src.scripts.watch_budget import inotify_limits
+from src.scripts.watch_service import WatchService
+
+class RecordingHandler(FileSystemEventHandler):
+    def __init__(self):
+        self.events = []
+
+    def on_any_event(self, event):
+        self.events.append((event.event_type, event.src_path))
+
+class TestWatchBudget(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = os.path.realpath(tempfile.mkdtemp())
+        self.dirs = [os.path.join(self.test_dir, f'd{i}') for i in range(5)]
+        old = time.time() - 86400
+        for path in self.dirs:
+            os.makedirs(path)
+            os.utime(path, (old, old))
+        os.utime(self.test_dir, (old, old))
+        self.handler = RecordingHandler()
+
+    def tearDown(self):
+        self.service.stop()
+        shutil.rmtree(self.test_dir)
+
+    def _write(self, directory, name):
+        path = os.path.join(directory, name)
+        with open(path, 'w') as f:
+            f.write('x')
+        return path
+
+    def _subscribe(self, budget):
+        self.service = WatchService(budget=budget, poll_interval=3600)
+        self.service.subscribe('project', [self.test_dir], self.handler)
+        return self.service.budget
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'inotify limits are Linux only')
+    def test_reads_kernel_limits(self):
+        """The per-user watch limit comes from /proc and sets the default budget."""
+        self.assertGreater(inotify_limits()['max_user_watches'], 0)
+        budget = self._subscribe(None)
+        self.assertEqual(budget.budget, budget.limit // 2)
+        self.assertEqual(self.service.stats()['recursive_roots'], 1)
+
+    def test_large_tree_is_split_and_polled(self):
+        """Directories beyond the budget are polled, and their changes still reported."""
+        budget = self._subscribe(3)
+        stats = self.service.stats()
+        self.assertEqual((stats['split_roots'], stats['watched_dirs'], stats['polled_dirs']), (1, 3, 3))
+
+        polled = [path for path in self.dirs if path not in budget.hot_dirs(3)]
+        new_file = os.path.join(polled[0], 'cold.txt')
+        with open(new_file, 'w') as f:
+            f.write('x')
+        budget.poll_once()
+        self.assertIn(('created', new_file), self.handler.events)
+        with open(new_file, 'a') as f:
+            f.write('more')
+        budget.poll_once()
+        self.assertIn(('modified', new_file), self.handler.events)
+
+    def test_active_directory_is_promoted(self):
+        """A polled directory that keeps changing takes over a watch."""
+        budget = self._subscribe(2)
+        cold = [path for path in self.dirs if path not in budget.hot_dirs(2)][0]
+        for i in range(budget.rebalance_every):
+            with open(os.path.join(cold, f'file{i}.txt'), 'w') as f:
+                f.write('x')
+            budget.poll_once()
+        self.assertIn(cold, budget.hot_dirs(2))
+        self.assertIsNotNone(budget._dirs[cold].watch)
+        stats = self.service.stats()
+        self.assertEqual((stats['watched_dirs'], stats['promotions'] >= 1, stats['demotions'] >= 1), (2, True, True))
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'inotify is Linux only')
+    def test_watched_directories_share_one_instance(self):
+        """Hot directories of a split root add one reader thread and one inotify instance in all."""
+        threads = threading.active_count()
+        budget = self._subscribe(5)
+        stats = self.service.stats()
+        self.assertEqual((stats['watched_dirs'], stats['instances']), (5, 1))
+        # The shared reader and the cold poller
+        self.assertLessEqual(stats['threads'] - threads, 2)
+
+        hot = budget.hot_dirs(1)[0]
+        new_file = os.path.join(hot, 'hot.txt')
+        os.rename(self._write(self.test_dir, 'draft.txt'), new_file)
+        with open(new_file, 'a') as f:
+            f.write('more')
+        deadline = time.monotonic() + 5
+        while ('modified', new_file) not in self.handler.events:
+            self.assertLess(time.monotonic(), deadline, "Change in a watched directory was not reported")
+            time.sleep(0.05)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from watchdog.events import FileSystemEventHandler
+
+from src.scripts.file_watcher import FileWatcher
+from src.scripts.watch_service import WatchService
+
+class RecordingHandler(FileSystemEventHandler):
+    def __init__(self):
+        self.paths = []
+
+    def on_any_event(self, event):
+        self.paths.append(event.src_path)
+
+class TestWatchService(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = os.path.realpath(tempfile.mkdtemp())
+        self.nested = os.path.join(self.test_dir, 'nested')
+        os.makedirs(self.nested)
+        self.service = WatchService()
+
+    def tearDown(self):
+        self.service.stop()
+        shutil.rmtree(self.test_dir)
+
+    def _wait_for(self, condition):
+        deadline = time.monotonic() + 2
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+    def test_overlapping_roots_share_one_watch(self):
+        """Many projects on overlapping roots use one watch and one observer."""
+        threads = threading.active_count()
+        self.service.subscribe('outer', [self.test_dir], RecordingHandler())
+        threads_after_first = threading.active_count()
+        for i in range(30):
+            self.service.subscribe(f'project{i}', [self.nested, self.test_dir], RecordingHandler())
+        stats = self.service.stats()
+        self.assertEqual((stats['roots'], stats['watches'], stats['subscribers']), (2, 1, 31))
+        self.assertEqual(threading.active_count(), threads_after_first)
+        self.assertGreater(threads_after_first, threads)
+
+        self.service.unsubscribe('outer')
+        for i in range(30):
+            self.service.unsubscribe(f'project{i}')
+        stats = self.service.stats()
+        self.assertEqual((stats['roots'], stats['watches'], stats['subscribers']), (0, 0, 0))
+
+    def test_events_go_to_longest_root(self):
+        """A nested project receives its own events; its parent does not."""
+        outer, inner = RecordingHandler(), RecordingHandler()
+        self.service.subscribe('outer', [self.test_dir], outer)
+        self.service.subscribe('inner', [self.nested], inner)
+
+        inner_file = os.path.join(self.nested, 'inner.txt')
+        outer_file = os.path.join(self.test_dir, 'outer.txt')
+        for path in (inner_file, outer_file):
+            with open(path, 'w') as f:
+                f.write('x')
+        self._wait_for(lambda: inner_file in inner.paths and outer_file in outer.paths)
+        self.assertIn(inner_file, inner.paths)
+        self.assertNotIn(inner_file, outer.paths)
+        self.assertNotIn(outer_file, inner.paths)
+
+        # Without the outer project, the nested root gets a watch of its own
+        self.service.unsubscribe('outer')
+        self.assertEqual(self.service.stats()['watches'], 1)
+        with open(inner_file, 'a') as f:
+            f.write('y')
+        self._wait_for(lambda: inner.paths.count(inner_file) > 1)
+        self.assertGreater(inner.paths.count(inner_file), 1)
+
+    def test_file_watchers_use_the_service(self):
+        """FileWatchers given a service subscribe on start and leave on stop."""
+        watcher = FileWatcher([self.test_dir], service=self.service)
+        self.assertIsNone(watcher.observer)
+        watcher.start()
+        self.assertTrue(watcher.is_watching())
+        watcher.stop()
+        self.assertFalse(watcher.is_watching())
+
+if __name__ == '__main__':
+    unittest.main()